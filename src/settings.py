@@ -228,6 +228,13 @@ MEDIA_URL = '/media/'  # URL for media files (uploads, images, etc.)
 # Directory for media files (uploads)
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  # Directory for uploaded media files
 
+# Uploaded attachments and images are stored once per distinct content (BlobStorage)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'blobs': {'BACKEND': 'web_apis.blog.storage.BlobStorage'},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -563,6 +570,7 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
+        'upload_start': os.getenv('BLOG_UPLOAD_START_RATE', '30/hour'),
     },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -787,11 +795,13 @@ CACHES = {
     }
 }
 
+REDIS_URL = os.getenv('REDIS_URL')
+
 # In production, switch to Redis if available
-if not DEBUG and os.getenv('REDIS_URL'):
+if not DEBUG and REDIS_URL:
     CACHES['default'] = {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': os.getenv('REDIS_URL'),
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             'SOCKET_CONNECT_TIMEOUT': 5,
@@ -802,6 +812,181 @@ if not DEBUG and os.getenv('REDIS_URL'):
     
     
 
+# ======================== Blog View Counter ========================
+# Views are buffered (in REDIS_URL when set, otherwise per process) and
+# written to BlogPost.view_count every BLOG_VIEW_COUNT_FLUSH_INTERVAL seconds
+BLOG_VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('BLOG_VIEW_COUNT_FLUSH_INTERVAL', '30'))
+
+
+
+# ======================== Blog Event Queue ========================
+# Analytics rows from the blog signal handlers are written with bulk_create
+# once BLOG_EVENT_BATCH_SIZE rows are queued or the oldest is BLOG_EVENT_BATCH_MAX_AGE
+# seconds old. Set BLOG_EVENT_QUEUE_SYNC=True (e.g. in tests) to write immediately.
+BLOG_EVENT_QUEUE_SYNC = os.getenv('BLOG_EVENT_QUEUE_SYNC', 'False').lower() in ('true', '1', 't')
+BLOG_EVENT_BATCH_SIZE = int(os.getenv('BLOG_EVENT_BATCH_SIZE', '200'))
+BLOG_EVENT_BATCH_MAX_AGE = float(os.getenv('BLOG_EVENT_BATCH_MAX_AGE', '5'))
+
+
+
+# ======================== Blog Search ========================
+# Text search configuration used for BlogPost.search_vector (PostgreSQL) and the
+# maximum number of ranked matches taken from the SQLite FTS5 fallback
+BLOG_SEARCH_CONFIG = os.getenv('BLOG_SEARCH_CONFIG', 'english')
+BLOG_SEARCH_MAX_RESULTS = int(os.getenv('BLOG_SEARCH_MAX_RESULTS', '500'))
+
+
+
+# ======================== Blog Related Posts ========================
+# Neighbours kept per post, share of the score from TF-IDF text similarity
+# (the rest comes from shared categories and tags) and vocabulary size cap
+BLOG_RELATED_POSTS_TOP_K = int(os.getenv('BLOG_RELATED_POSTS_TOP_K', '5'))
+BLOG_RELATED_POSTS_TEXT_WEIGHT = float(os.getenv('BLOG_RELATED_POSTS_TEXT_WEIGHT', '0.7'))
+BLOG_RELATED_POSTS_MAX_FEATURES = int(os.getenv('BLOG_RELATED_POSTS_MAX_FEATURES', '5000'))
+
+
+
+# ======================== Blog Trending ========================
+# The compute_trending worker recomputes the scores every BLOG_TRENDING_INTERVAL seconds
+# from the last BLOG_TRENDING_WINDOW_HOURS of engagement, halving every BLOG_TRENDING_HALF_LIFE_HOURS
+BLOG_TRENDING_INTERVAL = int(os.getenv('BLOG_TRENDING_INTERVAL', '300'))
+BLOG_TRENDING_WINDOW_HOURS = int(os.getenv('BLOG_TRENDING_WINDOW_HOURS', '72'))
+BLOG_TRENDING_HALF_LIFE_HOURS = float(os.getenv('BLOG_TRENDING_HALF_LIFE_HOURS', '24'))
+BLOG_TRENDING_SIZE = int(os.getenv('BLOG_TRENDING_SIZE', '20'))
+
+
+
+# ======================== Blog Analytics Rollups ========================
+# rollup_analytics only folds in rows older than this many seconds, so rows
+# still being written by the event queue are picked up by the next run
+BLOG_ANALYTICS_ROLLUP_LAG = int(os.getenv('BLOG_ANALYTICS_ROLLUP_LAG', '300'))
+
+
+
+# ======================== Blog Visitor Sketches ========================
+# HyperLogLog precision (2 ** p registers, relative error 1.04 / sqrt(2 ** p);
+# changing it requires manage.py rebuild_visitor_sketches) and merge interval
+BLOG_VISITOR_SKETCH_PRECISION = int(os.getenv('BLOG_VISITOR_SKETCH_PRECISION', '12'))
+BLOG_VISITOR_SKETCH_FLUSH_INTERVAL = int(os.getenv('BLOG_VISITOR_SKETCH_FLUSH_INTERVAL', '60'))
+
+
+
+# ======================== Blog Analytics Retention ========================
+# Views, read events, clicks, searches and processed admin activity older than this move to
+# monthly columnar files under BLOG_ARCHIVE_ROOT (manage.py archive_analytics)
+BLOG_ARCHIVE_ROOT = os.getenv('BLOG_ARCHIVE_ROOT', os.path.join(BASE_DIR, 'archive'))
+BLOG_ARCHIVE_RETENTION_DAYS = int(os.getenv('BLOG_ARCHIVE_RETENTION_DAYS', '90'))
+BLOG_ARCHIVE_CHUNK_SIZE = int(os.getenv('BLOG_ARCHIVE_CHUNK_SIZE', '5000'))
+BLOG_ARCHIVE_PARTITION_MONTHS_AHEAD = int(os.getenv('BLOG_ARCHIVE_PARTITION_MONTHS_AHEAD', '3'))
+
+
+
+# ======================== Blog Reading Progress ========================
+# Only the latest scroll position per reader and post is kept and upserted every
+# flush interval; a reader who scrolls through the percentage of the document
+# height has completed the post
+BLOG_READ_PROGRESS_FLUSH_INTERVAL = int(os.getenv('BLOG_READ_PROGRESS_FLUSH_INTERVAL', '15'))
+BLOG_READ_PROGRESS_COMPLETE_PERCENT = int(os.getenv('BLOG_READ_PROGRESS_COMPLETE_PERCENT', '90'))
+BLOG_READ_PROGRESS_SESSION_GAP = int(os.getenv('BLOG_READ_PROGRESS_SESSION_GAP', '1800'))
+
+
+
+# ======================== Blog Comment Threads ========================
+# A post's approved comments are loaded in one query and cached as a serialized
+# tree for this many seconds; saving or deleting a comment drops its thread
+BLOG_COMMENT_THREAD_CACHE_TIMEOUT = int(os.getenv('BLOG_COMMENT_THREAD_CACHE_TIMEOUT', '600'))
+
+
+
+# ======================== Blog Scheduled Publishing ========================
+# SCHEDULED posts are published when due by the manage.py publish_scheduled
+# worker; scheduling a post wakes it through PostgreSQL LISTEN/NOTIFY, and it
+# also re-reads upcoming due times every BLOG_PUBLISHING_RESCAN_INTERVAL
+# seconds. It publishes BATCH_SIZE per UPDATE
+BLOG_PUBLISHING_RESCAN_INTERVAL = int(os.getenv('BLOG_PUBLISHING_RESCAN_INTERVAL', '300'))
+BLOG_PUBLISHING_BATCH_SIZE = int(os.getenv('BLOG_PUBLISHING_BATCH_SIZE', '500'))
+
+
+
+# ======================== Blog Revisions ========================
+# Every BLOG_REVISION_SNAPSHOT_INTERVAL-th revision of a post stores its full text,
+# the ones in between a line delta from the previous revision; rebuilt texts are
+# cached for BLOG_REVISION_CONTENT_CACHE_TIMEOUT seconds (manage.py compact_revisions
+# re-encodes existing revisions)
+BLOG_REVISION_SNAPSHOT_INTERVAL = int(os.getenv('BLOG_REVISION_SNAPSHOT_INTERVAL', '10'))
+BLOG_REVISION_CONTENT_CACHE_TIMEOUT = int(os.getenv('BLOG_REVISION_CONTENT_CACHE_TIMEOUT', '3600'))
+# Diffs between two revisions (/posts/<slug>/revision-diff/) are cached per pair and mode
+BLOG_REVISION_DIFF_CACHE_TIMEOUT = int(os.getenv('BLOG_REVISION_DIFF_CACHE_TIMEOUT', '86400'))
+
+
+
+# ======================== Blog Feeds & Sitemaps ========================
+# RSS/Atom feeds carry the latest BLOG_FEED_SIZE posts; feeds and sitemaps are
+# cached under a version stamp derived from the posts, categories and tags in the database
+BLOG_FEED_SIZE = int(os.getenv('BLOG_FEED_SIZE', '50'))
+BLOG_FEED_SITEMAP_PAGE_SIZE = int(os.getenv('BLOG_FEED_SITEMAP_PAGE_SIZE', '10000'))
+BLOG_FEED_CACHE_TIMEOUT = int(os.getenv('BLOG_FEED_CACHE_TIMEOUT', '3600'))
+
+
+
+# ======================== Blog Image Variants ========================
+# Uploaded featured, profile, cover and service images are re-encoded as WebP and
+# JPEG at each of BLOG_IMAGE_WIDTHS (never upscaled) plus a square thumbnail, in a
+# pool of BLOG_IMAGE_WORKERS processes; manage.py generate_image_variants backfills
+# existing images. Set BLOG_IMAGE_SYNC=True (e.g. in tests) to render inline.
+BLOG_IMAGE_WIDTHS = tuple(int(width) for width in os.getenv('BLOG_IMAGE_WIDTHS', '320,640,960,1280,1920').split(','))
+BLOG_IMAGE_QUALITY = int(os.getenv('BLOG_IMAGE_QUALITY', '80'))
+BLOG_IMAGE_THUMBNAIL_SIZE = int(os.getenv('BLOG_IMAGE_THUMBNAIL_SIZE', '160'))
+BLOG_IMAGE_DEFAULT_WIDTH = int(os.getenv('BLOG_IMAGE_DEFAULT_WIDTH', '640'))
+BLOG_IMAGE_WORKERS = int(os.getenv('BLOG_IMAGE_WORKERS', '2'))
+BLOG_IMAGE_SYNC = os.getenv('BLOG_IMAGE_SYNC', 'False').lower() in ('true', '1', 't')
+
+
+
+# ======================== Blog Resumable Uploads ========================
+# Attachments can be sent in chunks of up to BLOG_UPLOAD_CHUNK_SIZE bytes through
+# /api/blog/uploads/; unfinished uploads idle for BLOG_UPLOAD_EXPIRY seconds are deleted
+# by manage.py purge_uploads. Starting an upload is throttled (BLOG_UPLOAD_START_RATE,
+# per user or IP) and each uploader may hold BLOG_UPLOAD_MAX_PENDING unattached uploads
+BLOG_UPLOAD_CHUNK_SIZE = int(os.getenv('BLOG_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+BLOG_UPLOAD_MAX_SIZE = int(os.getenv('BLOG_UPLOAD_MAX_SIZE', str(512 * 1024 * 1024)))
+BLOG_UPLOAD_EXPIRY = int(os.getenv('BLOG_UPLOAD_EXPIRY', '86400'))
+BLOG_UPLOAD_MAX_PENDING = int(os.getenv('BLOG_UPLOAD_MAX_PENDING', '10'))
+
+
+
+# ======================== Blog Media Blobs ========================
+# manage.py collect_blobs recounts blob references and deletes the blobs nothing
+# points at, once they are older than BLOG_BLOB_GRACE_PERIOD seconds
+BLOG_BLOB_GRACE_PERIOD = int(os.getenv('BLOG_BLOB_GRACE_PERIOD', '86400'))
+
+
+
+# ======================== Blog Newsletter ========================
+# Publishing a post queues a newsletter that manage.py send_newsletters sends to the
+# matching subscribers in batches of BLOG_NEWSLETTER_BATCH_SIZE, BLOG_NEWSLETTER_WORKERS
+# requests at a time. BLOG_NEWSLETTER_API_URL can point at a local stub for load tests.
+BLOG_NEWSLETTER_AUTO_SEND = os.getenv('BLOG_NEWSLETTER_AUTO_SEND', 'True').lower() in ('true', '1', 't')
+BLOG_NEWSLETTER_API_URL = os.getenv('BLOG_NEWSLETTER_API_URL', 'https://api.brevo.com/v3/smtp/email')
+BLOG_NEWSLETTER_BATCH_SIZE = int(os.getenv('BLOG_NEWSLETTER_BATCH_SIZE', '500'))
+BLOG_NEWSLETTER_WORKERS = int(os.getenv('BLOG_NEWSLETTER_WORKERS', '8'))
+BLOG_NEWSLETTER_MAX_ATTEMPTS = int(os.getenv('BLOG_NEWSLETTER_MAX_ATTEMPTS', '3'))
+BLOG_NEWSLETTER_TIMEOUT = int(os.getenv('BLOG_NEWSLETTER_TIMEOUT', '30'))
+BLOG_NEWSLETTER_POLL_INTERVAL = int(os.getenv('BLOG_NEWSLETTER_POLL_INTERVAL', '30'))
+
+
+
+# ======================== Blog Notifications ========================
+# Unread notification counts are cached per user and kept up to date on insert and
+# read; BLOG_NOTIFICATION_CACHE_TIMEOUT bounds how long a drifted count can live.
+# Only a shared cache (Redis) keeps them; with the per-process LocMem cache every read counts
+BLOG_NOTIFICATION_CACHE_TIMEOUT = int(os.getenv('BLOG_NOTIFICATION_CACHE_TIMEOUT', '3600'))
+# Admin notifications about views, comments, reactions, favorites and shares of a post are
+# coalesced into one row per BLOG_ADMIN_NOTIFICATION_WINDOW seconds (0 keeps one row per event)
+BLOG_ADMIN_NOTIFICATION_WINDOW = int(os.getenv('BLOG_ADMIN_NOTIFICATION_WINDOW', '900'))
+
+
+
 # ======================== Sentry Configuration ========================
 if not DEBUG and os.getenv('SENTRY_DSN'):
     import sentry_sdk
@@ -9,6 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 from enum import Enum
+from web_apis.blog.storage import blob_storage
 
 
 
@@ -151,6 +152,8 @@ class Profile(models.Model):
     # Profile Media
     profile_image = models.ImageField(
         upload_to='profile_images/',
+        storage=blob_storage,
+        max_length=255,
         blank=True,
         null=True
     )
@@ -158,11 +161,15 @@ class Profile(models.Model):
         max_length=500,
         blank=True
     )
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     cover_image = models.ImageField(
         upload_to='cover_images/',
+        storage=blob_storage,
+        max_length=255,
         blank=True,
         null=True
     )
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Privacy Settings
     show_email = models.BooleanField(default=False)
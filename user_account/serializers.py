@@ -12,6 +12,7 @@ from rest_framework.exceptions import ValidationError
 from .validators.password_reset_validators import PasswordResetValidator
 from .validators.change_password_validators import ChangePasswordValidator
 from django.contrib.auth import get_user_model
+from web_apis.blog.serializers.image_serializers import ImageVariantsField
 
 
 
@@ -290,6 +291,8 @@ class ProfileSerializer(serializers.ModelSerializer):
         allow_blank=True,
         write_only=True
     )
+    profile_image_variants = ImageVariantsField()
+    cover_image_variants = ImageVariantsField()
 
     class Meta:
         model = Profile
@@ -297,10 +300,12 @@ class ProfileSerializer(serializers.ModelSerializer):
             'id', 'user', 'bio', 'headline', 'phone_number', 'location', 'birth_date',
             'company', 'job_title', 'website', 'twitter_url', 'linkedin_url', 'github_url',
             'profile_image', 'profile_image_url', 'cover_image', 'show_email', 'show_phone',
-            'show_location', 'created_at', 'updated_at', 'initials', 'image_url'
+            'show_location', 'created_at', 'updated_at', 'initials', 'image_url',
+            'profile_image_variants', 'cover_image_variants'
         )
         read_only_fields = (
-            'id', 'initials', 'image_url', 'created_at', 'updated_at'
+            'id', 'initials', 'image_url', 'created_at', 'updated_at',
+            'profile_image_variants', 'cover_image_variants'
         )
 
     def get_initials(self, obj):
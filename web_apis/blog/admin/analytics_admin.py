@@ -142,9 +142,7 @@ class ReadHistoryAdmin(admin.ModelAdmin):
     user_link.short_description = "User"
 
     def progress_percentage(self, obj):
-        if obj.post.word_count > 0:
-            return f"{min(100, (obj.scroll_position / obj.post.word_count) * 100):.1f}%"
-        return "0%"
+        return f"{obj.read_percentage}%"
     progress_percentage.short_description = "Progress"
 
     def reading_status(self, obj):
@@ -45,7 +45,9 @@ class TagAdmin(admin.ModelAdmin):
 class BlogPostRevisionInline(admin.TabularInline):
     model = BlogPostRevision
     extra = 0
-    readonly_fields = ('revision_number', 'title', 'updated_by', 'created_at')
+    # Content lives in snapshot/delta chains, editing a row here would break them
+    fields = ('revision_number', 'title', 'content_length', 'is_snapshot', 'updated_by', 'created_at')
+    readonly_fields = fields
     can_delete = False
 
     def has_add_permission(self, request, obj=None):
@@ -78,6 +80,8 @@ class BlogPostAdmin(admin.ModelAdmin):
         'view_count',
         'comment_count',
         'like_count',
+        'reaction_count',
+        'favorite_count',
         'reading_time',
         'word_count',
         'admin_view_link',
@@ -133,6 +137,8 @@ class BlogPostAdmin(admin.ModelAdmin):
                 'view_count',
                 'comment_count',
                 'like_count',
+                'reaction_count',
+                'favorite_count',
                 'word_count'
             )
         }),
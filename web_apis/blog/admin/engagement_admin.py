@@ -4,6 +4,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from web_apis.blog.models import Comment, CommentReaction, Like, PostReaction, Favorite
+from web_apis.blog.services.comment_tree_service import CommentTreeService
+from web_apis.blog.services.engagement_counter_service import EngagementCounterService
 
 class CommentReactionInline(admin.TabularInline):
     model = CommentReaction
@@ -119,11 +121,18 @@ class CommentAdmin(admin.ModelAdmin):
     truncated_content.short_description = "Content"
 
     def approve_comments(self, request, queryset):
+        # update() skips post_save, so refresh the threads and counters here
+        post_ids = set(queryset.values_list('post_id', flat=True))
         queryset.update(is_approved=True)
+        CommentTreeService.invalidate_many(post_ids)
+        EngagementCounterService.reconcile(post_ids)
     approve_comments.short_description = "Approve selected comments"
 
     def mark_as_spam(self, request, queryset):
+        post_ids = set(queryset.values_list('post_id', flat=True))
         queryset.update(is_spam=True, is_approved=False)
+        CommentTreeService.invalidate_many(post_ids)
+        EngagementCounterService.reconcile(post_ids)
     mark_as_spam.short_description = "Mark selected as spam"
 
 # ... rest of your admin classes remain the same ...
@@ -5,6 +5,7 @@ from django.urls import reverse
 from django.apps import apps
 import json
 from web_apis.blog.models.notification_models import Notification, AdminNotification
+from web_apis.blog.services.notification_service import NotificationService
 from user_account.models import CustomUser
 
 @admin.register(Notification)
@@ -97,11 +98,17 @@ class NotificationAdmin(admin.ModelAdmin):
     time_since_created.short_description = "Time Since"
 
     def mark_as_read(self, request, queryset):
+        # Collected first: with the is_read filter active the queryset is empty after the update
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
         queryset.update(is_read=True)
+        NotificationService.invalidate_users(user_ids)
     mark_as_read.short_description = "Mark selected as read"
 
     def mark_as_unread(self, request, queryset):
+        # Collected first: with the is_read filter active the queryset is empty after the update
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
         queryset.update(is_read=False)
+        NotificationService.invalidate_users(user_ids)
     mark_as_unread.short_description = "Mark selected as unread"
 
 @admin.register(AdminNotification)
@@ -109,6 +116,7 @@ class AdminNotificationAdmin(admin.ModelAdmin):
     list_display = (
         'notification_type_display',
         'title_preview',
+        'count',
         'is_read',
         'created_at_display',
         'related_object_link'
@@ -130,6 +138,8 @@ class AdminNotificationAdmin(admin.ModelAdmin):
         'related_object_id',
         'related_content_type',
         'created_at',
+        'count',
+        'last_event_at',
         'metadata_preview',
         'notification_type_display',
         'time_since_created'
@@ -147,6 +157,8 @@ class AdminNotificationAdmin(admin.ModelAdmin):
             'fields': (
                 'title',
                 'message',
+                'count',
+                'last_event_at',
             )
         }),
         ('Related Object', {
@@ -208,10 +220,12 @@ class AdminNotificationAdmin(admin.ModelAdmin):
 
     def mark_as_read(self, request, queryset):
         queryset.update(is_read=True)
+        NotificationService.invalidate_admin()
     mark_as_read.short_description = "Mark selected as read"
 
     def mark_as_unread(self, request, queryset):
         queryset.update(is_read=False)
+        NotificationService.invalidate_admin()
     mark_as_unread.short_description = "Mark selected as unread"
 
     def get_queryset(self, request):
@@ -4,7 +4,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from web_apis.blog.models.subscription_models import Subscription
+from web_apis.blog.models.subscription_models import Subscription, NewsletterRun
+from web_apis.blog.services.newsletter_service import NewsletterService
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
@@ -134,4 +135,54 @@ class SubscriptionAdmin(admin.ModelAdmin):
     deactivate_selected.short_description = "Deactivate (unsubscribe) selected subscriptions"
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(NewsletterRun)
+class NewsletterRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'post',
+        'status',
+        'progress_display',
+        'sent_count',
+        'failed_count',
+        'total_recipients',
+        'created_at',
+        'finished_at'
+    )
+    list_filter = (
+        'status',
+        'created_at'
+    )
+    search_fields = (
+        'post__title',
+    )
+    readonly_fields = (
+        'post',
+        'status',
+        'total_recipients',
+        'sent_count',
+        'failed_count',
+        'last_error',
+        'created_at',
+        'started_at',
+        'finished_at'
+    )
+    actions = [
+        'retry_selected'
+    ]
+
+    def progress_display(self, obj):
+        return f"{obj.progress}%"
+    progress_display.short_description = "Progress"
+
+    def retry_selected(self, request, queryset):
+        for run in queryset.filter(status=NewsletterRun.Status.FAILED):
+            NewsletterService.retry(run)
+    retry_selected.short_description = "Retry failed batches of selected runs"
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('post')
@@ -0,0 +1,405 @@
+# blog/archive.py
+
+import gzip
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Column kinds
+DATETIME = 'datetime'
+INTEGER = 'integer'
+FLOAT = 'float'
+BOOLEAN = 'boolean'
+CATEGORY = 'category'
+TEXT = 'text'
+
+FIXED_DTYPES = {
+    DATETIME: np.int64,
+    INTEGER: np.int64,
+    FLOAT: np.float64,
+    BOOLEAN: np.int8,
+}
+NULL_INTEGER = np.iinfo(np.int64).min
+
+
+def to_microseconds(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_microseconds(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+class ColumnarArchive:
+    """
+    Monthly columnar archive files of one table. Every archive run appends
+    segments to the month directories, one per chunk of rows, and never
+    rewrites what is already there:
+
+        <month>/<segment>/meta.json            row count, time range and column kinds
+        <month>/<segment>/<column>.npy         fixed-width columns: datetimes as int64
+                                               microseconds (UTC), integers, floats and booleans
+        <month>/<segment>/<column>.codes.npy   dictionary-encoded strings (ids, IPs, choices):
+        <month>/<segment>/<column>.dict.json   int32 codes, -1 for NULL, and the distinct values
+        <month>/<segment>/<column>.text.gz     free text and JSON as a gzip-compressed JSON list
+
+    A segment is first written under a pending name and only committed once
+    its rows are deleted from the database; recover() settles the segments an
+    interrupted run left pending. Fixed-width and code files are memory-mapped
+    when read, so an aggregate only pages in the columns it scans; text is
+    decompressed only when rows are asked for.
+    """
+    PENDING = '.pending'
+    STAGING = '.tmp'
+
+    def __init__(self, root, table):
+        self.path = os.path.join(root, table)
+
+    def months(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.path)
+            if not name.startswith('.') and os.path.isdir(os.path.join(self.path, name))
+        )
+
+    def segments(self, month=None):
+        """
+        Committed segments as '<month>/<segment>' ids, oldest first
+        """
+        segments = []
+        for name in [month] if month else self.months():
+            directory = os.path.join(self.path, name)
+            if not os.path.isdir(directory):
+                continue
+            segments.extend(
+                f'{name}/{segment}' for segment in sorted(os.listdir(directory))
+                if not segment.startswith('.') and os.path.isfile(os.path.join(directory, segment, 'meta.json'))
+            )
+        return segments
+
+    def pending(self):
+        """
+        Segments written by a run that has not committed them yet
+        """
+        return [
+            f'{month}/{name}'
+            for month in self.months()
+            for name in sorted(os.listdir(os.path.join(self.path, month)))
+            if name.endswith(self.PENDING)
+        ]
+
+    def meta(self, segment):
+        with open(os.path.join(self.path, segment, 'meta.json')) as handle:
+            return json.load(handle)
+
+    # Writing ---------------------------------------------------------------------------------
+    def append(self, month, kinds, columns, key, timestamp):
+        """
+        Writes `columns` ({name: list of python values}) as a new pending segment
+        of the month, returns its id for commit() or discard()
+        """
+        order = np.argsort(np.array([to_microseconds(value) for value in columns[timestamp]]), kind='stable')
+        columns = {name: [values[index] for index in order] for name, values in columns.items()}
+        times = columns[timestamp]
+        name = f'{to_microseconds(times[0]):016d}-{uuid.uuid4().hex[:8]}'
+
+        directory = os.path.join(self.path, month)
+        staging = os.path.join(directory, f'.{name}{self.STAGING}')
+        os.makedirs(staging)
+        for column, kind in kinds.items():
+            self._write_column(staging, column, kind, columns[column])
+        with open(os.path.join(staging, 'meta.json'), 'w') as handle:
+            json.dump({
+                'rows': len(times),
+                'start': times[0].isoformat(),
+                'end': times[-1].isoformat(),
+                'timestamp': timestamp,
+                'key': key,
+                'columns': kinds,
+            }, handle)
+
+        # Only complete segments ever carry the pending name
+        pending = f'.{name}{self.PENDING}'
+        os.replace(staging, os.path.join(directory, pending))
+        return f'{month}/{pending}'
+
+    def commit(self, pending):
+        month, name = pending.split('/')
+        segment = f'{month}/{name[1:-len(self.PENDING)]}'
+        os.replace(os.path.join(self.path, pending), os.path.join(self.path, segment))
+        return segment
+
+    def discard(self, pending):
+        shutil.rmtree(os.path.join(self.path, pending), ignore_errors=True)
+
+    def recover(self, is_stored):
+        """
+        Settles the segments of an interrupted run. `is_stored(keys)` tells whether
+        any of the rows are still in the database: then their delete never committed
+        and the segment is dropped, otherwise it is committed. Returns the number committed.
+        """
+        for month in self.months():
+            directory = os.path.join(self.path, month)
+            for name in os.listdir(directory):
+                if name.endswith(self.STAGING):
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+        committed = 0
+        for pending in self.pending():
+            key = self.meta(pending)['key']
+            if is_stored(self.read_columns(pending, [key])[key]):
+                self.discard(pending)
+            else:
+                self.commit(pending)
+                committed += 1
+        return committed
+
+    def _write_column(self, directory, name, kind, values):
+        base = os.path.join(directory, name)
+        if kind == DATETIME:
+            data = [NULL_INTEGER if value is None else to_microseconds(value) for value in values]
+            np.save(f'{base}.npy', np.array(data, dtype=np.int64))
+        elif kind in FIXED_DTYPES:
+            null = NULL_INTEGER if kind == INTEGER else (np.nan if kind == FLOAT else -1)
+            data = [null if value is None else value for value in values]
+            np.save(f'{base}.npy', np.array(data, dtype=FIXED_DTYPES[kind]))
+        elif kind == CATEGORY:
+            dictionary, codes = {}, np.empty(len(values), dtype=np.int32)
+            for index, value in enumerate(values):
+                codes[index] = -1 if value is None else dictionary.setdefault(str(value), len(dictionary))
+            np.save(f'{base}.codes.npy', codes)
+            with open(f'{base}.dict.json', 'w') as handle:
+                json.dump(list(dictionary), handle)
+        else:
+            with gzip.open(f'{base}.text.gz', 'wt', encoding='utf-8') as handle:
+                json.dump(values, handle, default=str)
+
+    # Reading ---------------------------------------------------------------------------------
+    def column(self, segment, name, kind):
+        """
+        Memory-mapped raw column: values for fixed-width kinds, codes for categories
+        """
+        base = os.path.join(self.path, segment, name)
+        if kind == CATEGORY:
+            return np.load(f'{base}.codes.npy', mmap_mode='r')
+        if kind in FIXED_DTYPES:
+            return np.load(f'{base}.npy', mmap_mode='r')
+        raise ValueError(f"Column {name} is text and cannot be scanned")
+
+    def dictionary(self, segment, name):
+        with open(os.path.join(self.path, segment, f'{name}.dict.json')) as handle:
+            return json.load(handle)
+
+    def read_columns(self, segment, names, rows=None):
+        """
+        Decoded python values of the given columns, optionally only for some row positions
+        """
+        kinds = self.meta(segment)['columns']
+        result = {}
+        for name in names:
+            kind = kinds[name]
+            if kind == TEXT:
+                with gzip.open(os.path.join(self.path, segment, f'{name}.text.gz'), 'rt', encoding='utf-8') as handle:
+                    values = json.load(handle)
+                result[name] = values if rows is None else [values[row] for row in rows]
+                continue
+
+            data = self.column(segment, name, kind)
+            data = data if rows is None else data[rows]
+            if kind == CATEGORY:
+                dictionary = self.dictionary(segment, name)
+                result[name] = [None if code < 0 else dictionary[code] for code in data.tolist()]
+            elif kind == DATETIME:
+                result[name] = [None if value == NULL_INTEGER else from_microseconds(value) for value in data.tolist()]
+            elif kind == BOOLEAN:
+                result[name] = [None if value < 0 else bool(value) for value in data.tolist()]
+            elif kind == INTEGER:
+                result[name] = [None if value == NULL_INTEGER else value for value in data.tolist()]
+            else:
+                result[name] = [None if np.isnan(value) else value for value in data.tolist()]
+        return result
+
+    def query(self):
+        return ArchiveQuery(self)
+
+
+class ArchiveQuery:
+    """
+    Aggregates over archived months without loading them:
+
+        ColumnarArchive(root, 'blog_postview').query().between(start, end) \\
+            .where(post_id=post_id).count_by_day()
+
+    Filters and group keys must be fixed-width or category columns.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.start = None
+        self.end = None
+        self.filters = {}
+
+    def between(self, start=None, end=None):
+        query = self._clone()
+        query.start, query.end = start, end
+        return query
+
+    def where(self, **filters):
+        query = self._clone()
+        query.filters = {**self.filters, **filters}
+        return query
+
+    def count(self):
+        return sum(int(np.count_nonzero(mask)) for _, _, mask in self._scan())
+
+    def sum(self, column):
+        total = 0
+        for segment, meta, mask in self._scan():
+            values = self.archive.column(segment, column, meta['columns'][column])[mask]
+            total += values[values != NULL_INTEGER].sum() if values.dtype == np.int64 else np.nansum(values)
+        return total
+
+    def count_by(self, column):
+        """
+        {value: matching rows} for a category column
+        """
+        counts = {}
+        for segment, meta, mask in self._scan():
+            codes = self.archive.column(segment, column, meta['columns'][column])[mask]
+            codes = codes[codes >= 0]
+            if not len(codes):
+                continue
+            dictionary = self.archive.dictionary(segment, column)
+            for code, count in enumerate(np.bincount(codes, minlength=len(dictionary))):
+                if count:
+                    counts[dictionary[code]] = counts.get(dictionary[code], 0) + int(count)
+        return counts
+
+    def count_by_day(self):
+        """
+        {date: matching rows}, days in UTC
+        """
+        counts = {}
+        day = 86400 * 1000000
+        for segment, meta, mask in self._scan():
+            times = self.archive.column(segment, meta['timestamp'], DATETIME)[mask]
+            days, totals = np.unique(times // day, return_counts=True)
+            for value, count in zip(days.tolist(), totals.tolist()):
+                date = (EPOCH + timedelta(days=value)).date()
+                counts[date] = counts.get(date, 0) + count
+        return counts
+
+    def totals_by_day(self, column, aggregates, tz=dt_timezone.utc):
+        """
+        {(value, date): {name: total}} per value of a category column and day in `tz`.
+        `aggregates` maps names to ('count', None), ('sum', column) or ('nonzero', column),
+        the number of rows where the column is above zero.
+        """
+        totals = {}
+        for segment, meta, mask in self._scan():
+            if not mask.any():
+                continue
+            times = self.archive.column(segment, meta['timestamp'], DATETIME)
+            codes = self.archive.column(segment, column, meta['columns'][column])
+            dictionary = self.archive.dictionary(segment, column)
+            for date, low, high in self._days(times, tz):
+                selected = mask[low:high] & (codes[low:high] >= 0)
+                if not selected.any():
+                    continue
+                day_codes = codes[low:high][selected]
+                present = np.unique(day_codes)
+                for name, (function, source) in aggregates.items():
+                    weights, integral = None, True
+                    if function != 'count':
+                        data = self.archive.column(segment, source, meta['columns'][source])[low:high][selected]
+                        integral = function == 'nonzero' or data.dtype != np.float64
+                        data = np.where(data == NULL_INTEGER, 0, data) if data.dtype == np.int64 else np.nan_to_num(data)
+                        weights = data > 0 if function == 'nonzero' else data
+                    sums = np.bincount(day_codes, weights=weights, minlength=len(dictionary))
+                    if integral:
+                        sums = np.rint(sums).astype(np.int64)
+                    for code in present.tolist():
+                        entry = totals.setdefault((dictionary[code], date), {key: 0 for key in aggregates})
+                        entry[name] += sums[code].item()
+        return totals
+
+    def rows(self, *columns, limit=None):
+        """
+        Matching rows as dicts, segment by segment and oldest first within one
+        """
+        results = []
+        for segment, meta, mask in self._scan():
+            positions = np.flatnonzero(mask)
+            if limit is not None:
+                positions = positions[:limit - len(results)]
+            if not len(positions):
+                continue
+            names = list(columns or meta['columns'])
+            values = self.archive.read_columns(segment, names, rows=positions)
+            results.extend(dict(zip(names, row)) for row in zip(*(values[name] for name in names)))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def _days(times, tz):
+        """
+        (date, first, end position) of every day in `tz` within a time-sorted column
+        """
+        first = from_microseconds(times[0]).astimezone(tz).date()
+        last = from_microseconds(times[-1]).astimezone(tz).date()
+        low = 0
+        while first <= last:
+            following = first + timedelta(days=1)
+            boundary = datetime.combine(following, time.min, tzinfo=tz)
+            high = int(np.searchsorted(times, to_microseconds(boundary), 'left'))
+            if high > low:
+                yield first, low, high
+            first, low = following, high
+
+    def _scan(self):
+        """
+        Yields (segment, meta, boolean mask of matching rows) for every segment in range
+        """
+        for segment in self.archive.segments():
+            meta = self.archive.meta(segment)
+            if self.start and datetime.fromisoformat(meta['end']) < self.start:
+                continue
+            if self.end and datetime.fromisoformat(meta['start']) >= self.end:
+                continue
+
+            times = self.archive.column(segment, meta['timestamp'], DATETIME)
+            # Segments are sorted by time, so the range is a binary search, not a scan
+            low = 0 if self.start is None else int(np.searchsorted(times, to_microseconds(self.start), 'left'))
+            high = len(times) if self.end is None else int(np.searchsorted(times, to_microseconds(self.end), 'left'))
+            mask = np.zeros(len(times), dtype=bool)
+            mask[low:high] = True
+
+            for name, value in self.filters.items():
+                kind = meta['columns'][name]
+                data = self.archive.column(segment, name, kind)
+                if kind == CATEGORY:
+                    dictionary = self.archive.dictionary(segment, name)
+                    code = dictionary.index(str(value)) if str(value) in dictionary else None
+                    if code is None:
+                        mask[:] = False
+                        break
+                    mask &= (data == code)
+                elif kind == DATETIME:
+                    mask &= (data == to_microseconds(value))
+                else:
+                    mask &= (data == value)
+            yield segment, meta, mask
+
+    def _clone(self):
+        query = ArchiveQuery(self.archive)
+        query.start, query.end, query.filters = self.start, self.end, dict(self.filters)
+        return query
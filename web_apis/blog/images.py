@@ -0,0 +1,60 @@
+# blog/images.py
+
+import hashlib
+import io
+
+from PIL import Image, ImageOps
+
+# Runs in worker processes: keep this module free of Django imports
+
+EXTENSIONS = {
+    'webp': 'webp',
+    'jpeg': 'jpg',
+}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_variants(data, widths, formats, quality, thumbnail_size):
+    """
+    Resized encodings of an image, never wider than the original.
+
+    Returns {'width', 'height', 'files': [(kind, width, extension, bytes), ...]}
+    with one file per width and format, plus a square WebP thumbnail of kind 'thumbnail'.
+    """
+    with Image.open(io.BytesIO(data)) as opened:
+        # Applies the EXIF orientation, phone photos are often stored sideways
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    width, height = image.size
+
+    targets = sorted({target for target in widths if target < width} | {min(width, max(widths))})
+    files = []
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for kind in formats:
+            files.append((kind, target, EXTENSIONS[kind], encode(resized, kind, quality)))
+
+    thumbnail = ImageOps.fit(image, (thumbnail_size, thumbnail_size), Image.LANCZOS)
+    files.append(('thumbnail', thumbnail_size, EXTENSIONS['webp'], encode(thumbnail, 'webp', quality)))
+    return {'width': width, 'height': height, 'files': files}
+
+
+def encode(image, kind, quality):
+    output = io.BytesIO()
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if kind == 'webp':
+        image.convert('RGBA' if has_alpha else 'RGB').save(output, 'WEBP', quality=quality, method=4)
+    else:
+        if has_alpha:
+            # JPEG has no alpha channel, flatten onto white
+            rgba = image.convert('RGBA')
+            flattened = Image.new('RGB', rgba.size, (255, 255, 255))
+            flattened.paste(rgba, mask=rgba.getchannel('A'))
+            image = flattened
+        image.convert('RGB').save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
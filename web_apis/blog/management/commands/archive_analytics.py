@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.retention_service import RetentionService
+
+
+class Command(BaseCommand):
+    help = "Moves expired post views, clicks, searches and admin activity into the columnar archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=list(RetentionService.TABLES),
+            help="Only archive this table (repeatable)"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Count the expired rows without archiving them"
+        )
+
+    def handle(self, *args, **options):
+        archived = RetentionService.archive(names=options['table'], dry_run=options['dry_run'])
+        summary = ', '.join(f"{count} {name}" for name, count in archived.items())
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {summary}."))
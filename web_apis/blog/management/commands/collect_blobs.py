@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.blob_service import BlobService
+
+
+class Command(BaseCommand):
+    help = "Recounts media blob references and deletes blobs no longer referenced"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report what would be deleted without deleting anything"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Collecting unreferenced media blobs...")
+        count, size = BlobService.collect(dry_run=options['dry_run'])
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {count} blobs, {size} bytes."))
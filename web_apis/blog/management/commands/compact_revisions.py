@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.revision_service import RevisionService
+
+
+class Command(BaseCommand):
+    help = "Re-encodes blog post revisions as periodic snapshots with deltas in between"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Compacting blog post revisions...")
+        count = RevisionService.compact()
+        self.stdout.write(self.style.SUCCESS(f"Rewrote {count} revisions."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.trending_service import TrendingService
+
+
+class Command(BaseCommand):
+    help = "Recomputes the time-decayed trending scores of blog posts every BLOG_TRENDING_INTERVAL seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Compute the scores once and exit instead of running as a worker"
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = TrendingService.compute()
+            self.stdout.write(self.style.SUCCESS(f"Scored {count} trending posts."))
+            return
+        self.stdout.write("Recomputing trending scores...")
+        try:
+            TrendingService.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.view_counter_service import ViewCounterService
+
+
+class Command(BaseCommand):
+    help = "Writes buffered blog post views to BlogPost.view_count"
+
+    def handle(self, *args, **options):
+        flushed = ViewCounterService.flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} buffered views."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.image_variant_service import ImageVariantService
+
+
+class Command(BaseCommand):
+    help = "Renders the resized variants and thumbnails of existing blog, profile and service images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Re-render images that already have variants"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rendering image variants...")
+        count = ImageVariantService.backfill(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants of {count} images."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.retention_service import RetentionService
+
+
+class Command(BaseCommand):
+    help = "Creates upcoming monthly partitions of the analytics tables (PostgreSQL only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='append',
+            choices=list(RetentionService.TABLES),
+            help="Rebuild this table as a partitioned one first; locks it during the copy (repeatable)"
+        )
+
+    def handle(self, *args, **options):
+        for name in options['convert'] or []:
+            if RetentionService.partition(name):
+                self.stdout.write(f"Partitioned {name}.")
+            else:
+                self.stdout.write(f"{name} is already partitioned.")
+        created = RetentionService.ensure_partitions()
+        self.stdout.write(self.style.SUCCESS(f"Created {created} monthly partitions."))
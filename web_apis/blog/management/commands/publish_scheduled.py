@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.publishing_service import PublishingService
+
+
+class Command(BaseCommand):
+    help = "Publishes scheduled blog posts when they are due"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Publish the posts that are already due and exit instead of running as a worker"
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = PublishingService.publish_due()
+            self.stdout.write(self.style.SUCCESS(f"Published {count} scheduled posts."))
+            return
+        self.stdout.write("Publishing scheduled blog posts as they come due...")
+        try:
+            PublishingService.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
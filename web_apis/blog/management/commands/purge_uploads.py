@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.upload_service import ChunkedUploadService
+
+
+class Command(BaseCommand):
+    help = "Deletes resumable uploads that were abandoned before being attached"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Purging expired uploads...")
+        count = ChunkedUploadService.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} uploads."))
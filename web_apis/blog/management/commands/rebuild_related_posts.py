@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.related_posts_service import RelatedPostsService
+
+
+class Command(BaseCommand):
+    help = "Recomputes the related-posts neighbour table for all published posts"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding related posts...")
+        count = RelatedPostsService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Computed neighbours for {count} posts."))
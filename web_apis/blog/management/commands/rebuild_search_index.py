@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.search_service import BlogSearchService
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for all blog posts"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding blog search index...")
+        count = BlogSearchService.rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} posts."))
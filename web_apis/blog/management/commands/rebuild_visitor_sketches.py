@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.visitor_sketch_service import VisitorSketchService
+
+
+class Command(BaseCommand):
+    help = "Recreates the unique-visitor HyperLogLog sketches from all post views"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding visitor sketches...")
+        count = VisitorSketchService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Sketched {count} post views."))
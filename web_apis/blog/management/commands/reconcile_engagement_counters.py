@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.engagement_counter_service import EngagementCounterService
+from web_apis.blog.services.reaction_histogram_service import ReactionHistogramService
+
+
+class Command(BaseCommand):
+    help = "Recomputes the engagement counters and reaction histograms on blog posts and comments"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconciling blog engagement counters...")
+        count = EngagementCounterService.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Corrected counters on {count} posts."))
+        count = ReactionHistogramService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Corrected {count} reaction histograms."))
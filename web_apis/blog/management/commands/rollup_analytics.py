@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from web_apis.blog.services.analytics_rollup_service import AnalyticsRollupService
+
+
+class Command(BaseCommand):
+    help = "Folds new post views, reads and shares into the daily analytics rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help="Drop the rollups and watermarks and aggregate all rows again (archived views and reads are read back from the archive)"
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            AnalyticsRollupService.reset()
+        processed = AnalyticsRollupService.run()
+        summary = ', '.join(f"{count} {source}" for source, count in processed.items())
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {summary}."))
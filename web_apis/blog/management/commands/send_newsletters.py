@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.subscription_models import NewsletterRun
+from web_apis.blog.services.newsletter_service import NewsletterService
+
+
+class Command(BaseCommand):
+    help = "Sends the newsletters queued for published blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Send the newsletters that are already queued and exit instead of running as a worker"
+        )
+        parser.add_argument(
+            '--post',
+            metavar='SLUG',
+            help="Queue the newsletter of this published post first (e.g. with BLOG_NEWSLETTER_AUTO_SEND off)"
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Queue the failed batches of failed runs again"
+        )
+
+    def handle(self, *args, **options):
+        if options['post']:
+            try:
+                post = BlogPost.objects.get(slug=options['post'], status=BlogPost.PostStatus.PUBLISHED)
+            except BlogPost.DoesNotExist:
+                raise CommandError(f"No published post with slug '{options['post']}'")
+            NewsletterRun.objects.get_or_create(post=post)
+        if options['retry_failed']:
+            runs = NewsletterRun.objects.filter(status=NewsletterRun.Status.FAILED)
+            for run in runs:
+                NewsletterService.retry(run)
+            self.stdout.write(f"Queued {len(runs)} failed newsletter runs again.")
+
+        if options['once']:
+            count = NewsletterService.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Processed {count} newsletter runs."))
+            return
+        self.stdout.write("Sending queued newsletters...")
+        try:
+            NewsletterService.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -1,11 +1,14 @@
 
-from .blog_models import Category, Tag, BlogPost, BlogPostRevision
+from .blog_models import Category, Tag, BlogPost, BlogPostRevision, PostSimilarity
 from .engagement_models import Comment, CommentReaction, Like, PostReaction, Favorite
 from .notification_models import Notification, AdminNotification
-from .analytics_models import PostView, ReadHistory, SearchQuery, ClickEvent, AdminActivityLog
+from .analytics_models import (
+    PostView, ReadHistory, ReadEvent, SearchQuery, ClickEvent, AdminActivityLog, TrendingScore,
+    PostDailyStats, SiteDailyStats, PostVisitorSketch, SiteVisitorSketch, AnalyticsWatermark
+)
 from .sharing_models import SocialPlatform, ShareTracking, ShareableLink
-from .content_models import MediaAttachment, CodeSnippet
-from .subscription_models import Subscription
+from .content_models import MediaAttachment, CodeSnippet, ChunkedUpload, MediaBlob
+from .subscription_models import Subscription, NewsletterRun, NewsletterBatch
 from .syndication_models import ContentSyndication
 
 # Import signals to ensure they're registered
@@ -5,6 +5,7 @@
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from ..models.blog_models import BlogPost
 
@@ -51,13 +52,17 @@ class ReadHistory(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_read_history')
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='read_by')
-    last_read_at = models.DateTimeField(auto_now=True)
+    last_read_at = models.DateTimeField(default=timezone.now)
     read_count = models.PositiveIntegerField(default=1)
     is_completed = models.BooleanField(default=False)
     scroll_position = models.PositiveIntegerField(
         default=0,
         help_text=_("Last scroll position in pixels")
     )
+    read_percentage = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("Furthest point reached in the current read, in percent of the scrollable document height")
+    )
 
     class Meta:
         verbose_name = _("Read History")
@@ -69,6 +74,34 @@ class ReadHistory(models.Model):
         return f"{self.user.email}'s reading progress on {self.post.title}"
 
 
+class ReadEvent(models.Model):
+    """
+    Append-only record of a read being started or completed, written by
+    ReadingProgressService when it flushes ReadHistory. ReadHistory rows are
+    updated in place, these never are, so the daily rollups count from them.
+    """
+    class EventType(models.TextChoices):
+        STARTED = 'started', _('Started')
+        COMPLETED = 'completed', _('Completed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_read_events')
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='read_events')
+    event_type = models.CharField(max_length=10, choices=EventType.choices)
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("Read Event")
+        verbose_name_plural = _("Read Events")
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['occurred_at']),
+        ]
+
+    def __str__(self):
+        return f"Read of {self.post_id} {self.event_type} at {self.occurred_at}"
+
+
 
 # ------------------------------------------------------------------------------------------------------
 # SEARCH & ANALYTICS MODELS
@@ -91,6 +124,9 @@ class SearchQuery(models.Model):
         verbose_name = _("Search Query")
         verbose_name_plural = _("Search Queries")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Search for '{self.query}' by {self.user.email if self.user else 'anonymous'}"
@@ -117,6 +153,9 @@ class ClickEvent(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Click on {self.element_type} in {self.post.title}"
@@ -174,3 +213,142 @@ class AdminActivityLog(models.Model):
         self.save(update_fields=['is_processed'])
 
 
+
+
+
+# TRENDING SCORE ----------------------------------------------------------------------------------------------------
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a published post, materialized by TrendingService
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, related_name='trending')
+    score = models.FloatField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    reactions = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("Trending Score")
+        verbose_name_plural = _("Trending Scores")
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} trending at {self.score:.2f}"
+
+
+
+# -------------------------------------------------------------------------------------------------------
+# DAILY ROLLUPS
+# --------------------------
+class PostDailyStats(models.Model):
+    """
+    Per post, per day aggregates of PostView, ReadEvent and ShareTracking,
+    maintained incrementally by AnalyticsRollupService
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+    timed_views = models.PositiveIntegerField(default=0, help_text=_("Views that reported a reading time"))
+    total_time_spent = models.PositiveBigIntegerField(default=0, help_text=_("Seconds, summed over timed views"))
+    reads = models.PositiveIntegerField(default=0)
+    completed_reads = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Post Daily Stats")
+        verbose_name_plural = _("Post Daily Stats")
+        ordering = ['-date']
+        unique_together = ('post', 'date')
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} on {self.date}"
+
+
+class SiteDailyStats(models.Model):
+    """
+    Site-wide daily totals, derived from PostDailyStats by AnalyticsRollupService
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField(unique=True)
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+    timed_views = models.PositiveIntegerField(default=0)
+    total_time_spent = models.PositiveBigIntegerField(default=0)
+    reads = models.PositiveIntegerField(default=0)
+    completed_reads = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Site Daily Stats")
+        verbose_name_plural = _("Site Daily Stats")
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Site stats for {self.date}"
+
+
+class PostVisitorSketch(models.Model):
+    """
+    HyperLogLog sketch of the distinct visitors of a post on one day
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='visitor_sketches')
+    date = models.DateField()
+    sketch = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Post Visitor Sketch")
+        verbose_name_plural = _("Post Visitor Sketches")
+        unique_together = ('post', 'date')
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"Visitors of {self.post_id} on {self.date}"
+
+
+class SiteVisitorSketch(models.Model):
+    """
+    HyperLogLog sketch of the distinct visitors of the whole blog on one day
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField(unique=True)
+    sketch = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Site Visitor Sketch")
+        verbose_name_plural = _("Site Visitor Sketches")
+
+    def __str__(self):
+        return f"Site visitors on {self.date}"
+
+
+class AnalyticsWatermark(models.Model):
+    """
+    Last source timestamp folded into the rollups, one row per source
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Analytics Watermark")
+        verbose_name_plural = _("Analytics Watermarks")
+
+    def __str__(self):
+        return f"{self.name} up to {self.position}"
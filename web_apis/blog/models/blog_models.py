@@ -8,7 +8,10 @@ from django.utils.text import slugify
 from django.utils import timezone
 from django.urls import reverse
 from django.core.validators import MinLengthValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
+from web_apis.blog.storage import blob_storage
 
 User = get_user_model()
 
@@ -147,10 +150,18 @@ class BlogPost(models.Model):
     # Media
     featured_image = models.ImageField(
         upload_to='blog/featured_images/%Y/%m/%d/',
+        storage=blob_storage,
+        max_length=255,
         null=True,
         blank=True,
         help_text=_("Featured image for the blog post")
     )
+    featured_image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Resized copies of the featured image, maintained by ImageVariantService")
+    )
     featured_image_alt = models.CharField(
         max_length=255,
         blank=True,
@@ -190,10 +201,18 @@ class BlogPost(models.Model):
     )
     word_count = models.PositiveIntegerField(default=0)
 
-    # Stats (denormalized for performance)
+    # Stats (denormalized for performance, maintained by EngagementCounterService)
     view_count = models.PositiveIntegerField(default=0)
     comment_count = models.PositiveIntegerField(default=0)
     like_count = models.PositiveIntegerField(default=0)
+    reaction_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.PositiveIntegerField(default=0)
+    reaction_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Reactions per type, maintained by ReactionHistogramService")
+    )
 
     # Code snippets (can be stored as JSON or as separate model)
     # code_snippets = models.JSONField(
@@ -208,15 +227,26 @@ class BlogPost(models.Model):
         help_text=_("List of code snippets with language and content")
     )
 
+    # Full-text search (maintained by BlogSearchService on save)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
     class Meta:
         verbose_name = _("Blog Post")
         verbose_name_plural = _("Blog Posts")
         ordering = ['-published_at', '-created_at']
         indexes = [
             models.Index(fields=['status', 'published_at']),
+            # PublishingService looks up due and upcoming scheduled posts
+            models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['slug']),
             models.Index(fields=['author']),
             models.Index(fields=['is_featured']),
+            GinIndex(fields=['search_vector'], name='blog_post_search_gin'),
+            # Matches BlogPostCursorPagination ordering for keyset page fetches
+            models.Index(
+                fields=['-published_at', '-created_at', '-id'],
+                name='blog_post_feed_keyset'
+            ),
         ]
         # paginate_by = 10  # Default items per page
         # paginate_by_param = 'page_size'
@@ -271,7 +301,19 @@ class BlogPostRevision(models.Model):
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='revisions')
     revision_number = models.PositiveIntegerField()
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    # Full text on snapshots only, the revisions in between store a delta (see RevisionService)
+    content = models.TextField(blank=True)
+    is_snapshot = models.BooleanField(default=True)
+    chain_depth = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("Deltas between this revision and its snapshot")
+    )
+    delta = models.BinaryField(null=True, blank=True, editable=False)
+    content_length = models.PositiveIntegerField(default=0)
+    # Change from the previous revision, for history listings that never load content
+    size_delta = models.IntegerField(default=0)
+    lines_added = models.PositiveIntegerField(default=0)
+    lines_removed = models.PositiveIntegerField(default=0)
     excerpt = models.TextField(blank=True)
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -285,4 +327,29 @@ class BlogPostRevision(models.Model):
         unique_together = ('post', 'revision_number')
 
     def __str__(self):
-        return f"Revision {self.revision_number} of {self.post.title}"
\ No newline at end of file
+        return f"Revision {self.revision_number} of {self.post.title}"
+
+
+# POST SIMILARITY -----------------------------------------------------------------------------------------
+class PostSimilarity(models.Model):
+    """
+    Precomputed top-k neighbours of a published post, maintained by RelatedPostsService
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='similarities')
+    similar_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Post Similarity")
+        verbose_name_plural = _("Post Similarities")
+        ordering = ['rank']
+        unique_together = ('post', 'similar_post')
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.similar_post_id} is #{self.rank} similar to {self.post_id}"
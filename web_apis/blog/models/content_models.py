@@ -7,6 +7,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from ..models.blog_models import BlogPost
+from web_apis.blog.storage import blob_storage
 
 User = get_user_model()
 
@@ -30,6 +31,8 @@ class MediaAttachment(models.Model):
     )
     upload = models.FileField(
         upload_to='blog/media/%Y/%m/',
+        storage=blob_storage,
+        max_length=255,
         null=True,
         blank=True
     )
@@ -61,4 +64,79 @@ class CodeSnippet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.language} snippet in {self.post.title}"
\ No newline at end of file
+        return f"{self.language} snippet in {self.post.title}"
+
+
+# CHUNKED UPLOAD ------------------------------------------------------------------------------------------------------
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload in progress, see ChunkedUploadService.
+
+    Chunks are stored as separate part files until the upload is finalized
+    into the target attachment's storage location.
+    """
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        ASSEMBLING = 'assembling', 'Assembling'
+        COMPLETE = 'complete', 'Complete'
+        ATTACHED = 'attached', 'Attached'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    target = models.CharField(max_length=30)
+    owner_id = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("Primary key of the object the attachment is created for")
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.PositiveBigIntegerField(
+        default=0,
+        help_text=_("Running CRC32 of the bytes received so far")
+    )
+    parts = models.JSONField(default=list, blank=True, editable=False)
+    file = models.CharField(max_length=255, blank=True)
+    attachment_id = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.UPLOADING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+            # Unfinished uploads per uploader, see ChunkedUploadService.start
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['ip_address', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.get_status_display()})"
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+
+
+# MEDIA BLOB ------------------------------------------------------------------------------------------------------
+class MediaBlob(models.Model):
+    """
+    A file kept once by BlobStorage and the number of file fields pointing at it
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
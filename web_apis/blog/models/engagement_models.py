@@ -43,6 +43,12 @@ class Comment(models.Model):
     content = models.TextField(max_length=1000, validators=[MinLengthValidator(10)])
     is_approved = models.BooleanField(default=False)
     is_spam = models.BooleanField(default=False)
+    reaction_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Reactions per type, maintained by ReactionHistogramService")
+    )
     
     # Metadata
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -61,6 +67,8 @@ class Comment(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['is_approved']),
             models.Index(fields=['created_at']),
+            # CommentTreeService loads a post's visible thread in key order
+            models.Index(fields=['post', 'is_approved', 'created_at']),
         ]
         permissions = [
             ('can_moderate', 'Can moderate comments'),
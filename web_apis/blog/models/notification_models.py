@@ -5,6 +5,7 @@
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from ..models.blog_models import BlogPost
 
@@ -49,15 +50,18 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['notification_type']),
-            models.Index(fields=['is_read']),
+            # Unread counts, read-state updates and the inbox of one user
+            models.Index(fields=['user', 'is_read', 'created_at']),
         ]
 
     def __str__(self):
         return f"{self.get_notification_type_display()} for {self.user.email if self.user else 'system'}"
 
     def mark_as_read(self):
+        # Imported here, the service imports this module
+        from web_apis.blog.services.notification_service import NotificationService
+        NotificationService.mark_read(self.user_id, self.pk)
         self.is_read = True
-        self.save(update_fields=['is_read'])
 
 
 
@@ -70,6 +74,7 @@ class AdminNotification(models.Model):
         FAVORITE = 'favorite', _('Favorite')
         SEARCH = 'search', _('Search')
         SUBSCRIPTION = 'subscription', _('Subscription')
+        SHARE = 'share', _('Share')
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     notification_type = models.CharField(
@@ -82,8 +87,14 @@ class AdminNotification(models.Model):
     related_object_id = models.UUIDField(null=True, blank=True)
     related_content_type = models.CharField(max_length=100, blank=True)
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the notification is built, i.e. when the event happened, not when it is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     metadata = models.JSONField(default=dict, blank=True)
+    # Coalesced notifications (see NotificationDigestService): one row per group and window
+    group_key = models.CharField(max_length=150, blank=True)
+    window_start = models.DateTimeField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=1, help_text=_("Number of events this notification stands for"))
+    last_event_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = _("Admin Notification")
@@ -91,18 +102,25 @@ class AdminNotification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['notification_type']),
-            models.Index(fields=['is_read']),
+            models.Index(fields=['is_read', 'created_at']),
             models.Index(fields=['created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group_key', 'window_start'],
+                condition=models.Q(window_start__isnull=False),
+                name='unique_admin_notification_window'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_notification_type_display()}: {self.title}"
 
     @classmethod
-    def create_for_post_view(cls, post_view):
+    def build_for_post_view(cls, post_view):
         post = post_view.post
         viewer = post_view.user.email if post_view.user else f"Anonymous ({post_view.ip_address})"
-        return cls.objects.create(
+        return cls(
             notification_type=cls.NotificationType.POST_VIEW,
             title=f"New view on '{post.title}'",
             message=f"{viewer} viewed the post '{post.title}' for {post_view.time_spent} seconds",
@@ -118,10 +136,10 @@ class AdminNotification(models.Model):
         )
 
     @classmethod
-    def create_for_comment(cls, comment):
+    def build_for_comment(cls, comment):
         post = comment.post
         author = comment.display_name
-        return cls.objects.create(
+        return cls(
             notification_type=cls.NotificationType.COMMENT,
             title=f"New comment on '{post.title}'",
             message=f"{author} commented on '{post.title}': {comment.content[:100]}...",
@@ -137,10 +155,10 @@ class AdminNotification(models.Model):
         )
 
     @classmethod
-    def create_for_reaction(cls, reaction):
+    def build_for_reaction(cls, reaction):
         post = reaction.post
         user = reaction.user.email
-        return cls.objects.create(
+        return cls(
             notification_type=cls.NotificationType.REACTION,
             title=f"New reaction on '{post.title}'",
             message=f"{user} reacted with {reaction.get_reaction_display()} to '{post.title}'",
@@ -155,10 +173,10 @@ class AdminNotification(models.Model):
         )
 
     @classmethod
-    def create_for_favorite(cls, favorite):
+    def build_for_favorite(cls, favorite):
         post = favorite.post
         user = favorite.user.email
-        return cls.objects.create(
+        return cls(
             notification_type=cls.NotificationType.FAVORITE,
             title=f"New favorite on '{post.title}'",
             message=f"{user} added '{post.title}' to favorites",
@@ -169,4 +187,44 @@ class AdminNotification(models.Model):
                 'post_title': post.title,
                 'user': user,
             }
-        )
\ No newline at end of file
+        )
+
+    @classmethod
+    def build_for_share(cls, share):
+        post = share.post
+        platform = share.platform.name if share.platform else None
+        return cls(
+            notification_type=cls.NotificationType.SHARE,
+            title=f"New share of '{post.title}'",
+            message=f"Shared via {platform or 'direct link'}",
+            related_object_id=post.id,
+            related_content_type='blogpost',
+            metadata={
+                'post_id': str(post.id),
+                'post_title': post.title,
+                'platform': platform,
+                'method': share.share_method,
+            }
+        )
+
+    @classmethod
+    def create_for_post_view(cls, post_view):
+        return cls._record(cls.build_for_post_view(post_view))
+
+    @classmethod
+    def create_for_comment(cls, comment):
+        return cls._record(cls.build_for_comment(comment))
+
+    @classmethod
+    def create_for_reaction(cls, reaction):
+        return cls._record(cls.build_for_reaction(reaction))
+
+    @classmethod
+    def create_for_favorite(cls, favorite):
+        return cls._record(cls.build_for_favorite(favorite))
+
+    @staticmethod
+    def _record(notification):
+        # Imported here, the service imports this module
+        from web_apis.blog.services.notification_digest_service import NotificationDigestService
+        return NotificationDigestService.record(notification)
@@ -1,24 +1,295 @@
-
-
-
 # blog/models/signals_models.py
 
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
-from django.db import models
 
+from .blog_models import BlogPost, PostSimilarity
 from .engagement_models import Comment, Like, PostReaction, Favorite, CommentReaction
 from .analytics_models import PostView, AdminActivityLog
 from .sharing_models import ShareTracking
 from .notification_models import Notification, AdminNotification
+from web_apis.blog.services.event_queue_service import EventQueueService
+from web_apis.blog.services.view_counter_service import ViewCounterService
+from web_apis.blog.services.search_service import BlogSearchService
+from web_apis.blog.services.related_posts_service import RelatedPostsService, RelatedPostsUpdate
+from web_apis.blog.services.visitor_sketch_service import VisitorSketchService
+from web_apis.blog.services.comment_tree_service import CommentTreeService
+from web_apis.blog.services.engagement_counter_service import EngagementCounterService
+from web_apis.blog.services.reaction_histogram_service import ReactionHistogramService
+from web_apis.blog.services.feed_service import FeedService
+from web_apis.blog.services.image_variant_service import ImageVariantService
+from web_apis.blog.services.blob_service import BlobService
+from web_apis.blog.services.newsletter_service import NewsletterService
+from web_apis.blog.services.notification_service import NotificationService
+from web_apis.blog.services.notification_digest_service import NotificationDigestService
+from web_apis.blog.services.publishing_service import PublishingService
+
+
+SEARCH_FIELDS = {'title', 'excerpt', 'content'}
+RELATED_POSTS_FIELDS = SEARCH_FIELDS | {'status', 'published_at'}
+
+
+@receiver(post_save, sender=BlogPost)
+def update_post_search_index(sender, instance, created, update_fields=None, **kwargs):
+    # Skip counter-only saves such as save(update_fields=['view_count'])
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    BlogSearchService.update_search_index(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+def remove_post_search_index(sender, instance, **kwargs):
+    BlogSearchService.remove_from_search_index(instance.pk)
+
+
+@receiver(post_save, sender=BlogPost)
+def update_related_posts(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not RELATED_POSTS_FIELDS.intersection(update_fields):
+        return
+    RelatedPostsService.schedule_update(instance.pk)
+
+
+# Related posts are re-scored by the event queue worker, off the request path
+EventQueueService.register_writer(RelatedPostsUpdate, RelatedPostsService.process)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remember_related_posts(sender, instance, **kwargs):
+    # The cascade removes these PostSimilarity rows before post_delete runs
+    instance._listed_by = list(
+        PostSimilarity.objects.filter(similar_post_id=instance.pk).values_list('post_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=BlogPost)
+def remove_related_posts(sender, instance, **kwargs):
+    # Drops the post's cached vector and re-scores the posts that listed it
+    RelatedPostsService.schedule_update(instance.pk)
+    for post_id in getattr(instance, '_listed_by', ()):
+        RelatedPostsService.schedule_update(post_id)
+
+
+@receiver(m2m_changed, sender=BlogPost.categories.through)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def update_related_posts_taxonomy(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # The feed stamp follows updated_at, which a relation change leaves alone
+    FeedService.touch(instance)
+    if not reverse:
+        RelatedPostsService.schedule_update(instance.pk)
+    else:
+        # category.blog_posts.add(...) style changes, post_clear carries no pk_set
+        for post_id in pk_set or ():
+            RelatedPostsService.schedule_update(post_id)
+
+
+@receiver(post_init, sender=BlogPost)
+def remember_post_published(sender, instance, **kwargs):
+    if 'status' in instance.get_deferred_fields():
+        instance._published = None
+    else:
+        instance._published = instance.status == BlogPost.PostStatus.PUBLISHED
+
+
+@receiver(post_save, sender=BlogPost)
+def queue_newsletter(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Only the transition to published sends, later edits of a published post do not
+    if raw or (update_fields is not None and 'status' not in update_fields):
+        return
+    published = instance.status == BlogPost.PostStatus.PUBLISHED
+    if published and (created or instance._published is False):
+        NewsletterService.queue(instance.pk)
+    instance._published = published
+
+
+@receiver(post_save, sender=BlogPost)
+def wake_publishing_scheduler(sender, instance, update_fields=None, raw=False, **kwargs):
+    # The publish_scheduled worker sleeps until the next due time it knows of
+    if raw or (update_fields is not None and not {'status', 'scheduled_at'} & set(update_fields)):
+        return
+    if instance.status == BlogPost.PostStatus.SCHEDULED:
+        PublishingService.notify()
+
+
+def render_image_variants(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    for field_name in ImageVariantService.FIELDS[sender._meta.label]:
+        if update_fields is None or field_name in update_fields:
+            ImageVariantService.schedule(instance, field_name)
+
+
+# Profile and Service live in other apps, connected by label to avoid importing them here
+for label in ImageVariantService.FIELDS:
+    post_save.connect(render_image_variants, sender=label, dispatch_uid=f'blog_image_variants_{label}')
+
+
+# Blob reference counts move in the same transaction as the row holding the file
+
+
+def remember_blobs(sender, instance, **kwargs):
+    BlobService.remember(instance)
+
+
+def count_blob_references(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    BlobService.saved(instance, update_fields)
+
+
+def release_blobs(sender, instance, **kwargs):
+    BlobService.deleted(instance)
+
+
+for label in BlobService.FIELDS:
+    post_init.connect(remember_blobs, sender=label, dispatch_uid=f'blog_blobs_init_{label}')
+    post_save.connect(count_blob_references, sender=label, dispatch_uid=f'blog_blobs_save_{label}')
+    post_delete.connect(release_blobs, sender=label, dispatch_uid=f'blog_blobs_delete_{label}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_thread(sender, instance, **kwargs):
+    CommentTreeService.invalidate(instance.post_id)
+
+
+# Engagement counters move in the same transaction as the row that changed them
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_counted(sender, instance, **kwargs):
+    # Reading a deferred flag here would cost a query per loaded comment
+    if {'is_approved', 'is_spam'} & instance.get_deferred_fields():
+        instance._counted = None
+    else:
+        instance._counted = EngagementCounterService.comment_counts(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, created, **kwargs):
+    counted = EngagementCounterService.comment_counts(instance)
+    was_counted = False if created else instance._counted
+    if was_counted is None:
+        EngagementCounterService.reconcile([instance.post_id])
+    else:
+        EngagementCounterService.adjust(instance.post_id, 'comment_count', int(counted) - int(was_counted))
+    instance._counted = counted
+
 
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if instance._counted is None:
+        EngagementCounterService.reconcile([instance.post_id])
+    elif instance._counted:
+        EngagementCounterService.adjust(instance.post_id, 'comment_count', -1)
+
+
+ENGAGEMENT_COUNTERS = {
+    Like: 'like_count',
+    PostReaction: 'reaction_count',
+    Favorite: 'favorite_count',
+}
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=PostReaction)
+@receiver(post_save, sender=Favorite)
+def increment_engagement_count(sender, instance, created, **kwargs):
+    if created:
+        EngagementCounterService.adjust(instance.post_id, ENGAGEMENT_COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=PostReaction)
+@receiver(post_delete, sender=Favorite)
+def decrement_engagement_count(sender, instance, **kwargs):
+    EngagementCounterService.adjust(instance.post_id, ENGAGEMENT_COUNTERS[sender], -1)
+
+
+# Reaction histograms follow create, change of reaction type and delete
+
+
+@receiver(post_init, sender=PostReaction)
+@receiver(post_init, sender=CommentReaction)
+def remember_reaction(sender, instance, **kwargs):
+    instance._reaction = None if 'reaction' in instance.get_deferred_fields() else instance.reaction
+
+
+def reaction_target_id(sender, instance):
+    _, column = ReactionHistogramService.TARGETS[sender]
+    return getattr(instance, column)
+
+
+@receiver(post_save, sender=PostReaction)
+@receiver(post_save, sender=CommentReaction)
+def update_reaction_histogram(sender, instance, created, **kwargs):
+    target_id = reaction_target_id(sender, instance)
+    if created:
+        ReactionHistogramService.adjust(sender, target_id, {instance.reaction: 1})
+    elif instance._reaction is None:
+        ReactionHistogramService.refresh(sender, target_id)
+    elif instance._reaction != instance.reaction:
+        ReactionHistogramService.adjust(sender, target_id, {instance._reaction: -1, instance.reaction: 1})
+    else:
+        return
+    instance._reaction = instance.reaction
+    if sender is CommentReaction:
+        invalidate_reacted_comment_thread(instance)
+
+
+@receiver(post_delete, sender=PostReaction)
+@receiver(post_delete, sender=CommentReaction)
+def remove_from_reaction_histogram(sender, instance, **kwargs):
+    target_id = reaction_target_id(sender, instance)
+    if instance._reaction is None:
+        ReactionHistogramService.refresh(sender, target_id)
+    else:
+        ReactionHistogramService.adjust(sender, target_id, {instance._reaction: -1})
+    if sender is CommentReaction:
+        invalidate_reacted_comment_thread(instance)
+
+
+def invalidate_reacted_comment_thread(reaction):
+    # Cached threads carry each comment's histogram
+    post_id = Comment.objects.filter(pk=reaction.comment_id).values_list('post_id', flat=True).first()
+    if post_id is not None:
+        CommentTreeService.invalidate(post_id)
+
+
+# Unread notification counters, see NotificationService
+
+
+EventQueueService.on_write(Notification, NotificationService.created)
+# Admin notifications are coalesced per post and window, the digest service counts them itself
+EventQueueService.register_writer(AdminNotification, NotificationDigestService.write)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_save, sender=AdminNotification)
+def update_unread_count(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        NotificationService.created([instance])
+    elif update_fields is None or 'is_read' in update_fields:
+        NotificationService.invalidate(instance)
+
+
+@receiver(post_delete, sender=Notification)
+@receiver(post_delete, sender=AdminNotification)
+def drop_unread_count(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationService.invalidate(instance)
+
+
+# Handlers only build rows; EventQueueService writes them in batches off the request path,
+# once the transaction that saved the source row has committed
 
 
 @receiver(post_save, sender=Comment)
 def handle_comment_notification(sender, instance, created, **kwargs):
     if created:
-        AdminActivityLog.objects.create(
+        EventQueueService.enqueue_on_commit(AdminActivityLog(
             activity_type=AdminActivityLog.ActivityType.COMMENT,
             user=instance.user,
             post=instance.post,
@@ -26,66 +297,66 @@ def handle_comment_notification(sender, instance, created, **kwargs):
                 'comment_id': str(instance.id),
                 'content_preview': instance.content[:50]
             }
-        )
-        
-        if instance.user != instance.post.author:
-            Notification.objects.create(
-                user=instance.post.author,
+        ))
+
+        if instance.user_id != instance.post.author_id:
+            EventQueueService.enqueue_on_commit(Notification(
+                user_id=instance.post.author_id,
                 notification_type=Notification.NotificationType.COMMENT,
                 message=f"New comment on your post '{instance.post.title}'",
                 target_url=instance.post.get_absolute_url(),
                 related_post=instance.post
-            )
-        
-        AdminNotification.create_for_comment(instance)
+            ))
+
+        EventQueueService.enqueue_on_commit(AdminNotification.build_for_comment(instance))
 
 @receiver(post_save, sender=Like)
 def handle_like_notification(sender, instance, created, **kwargs):
     if created:
-        AdminActivityLog.objects.create(
+        EventQueueService.enqueue_on_commit(AdminActivityLog(
             activity_type=AdminActivityLog.ActivityType.LIKE,
             user=instance.user,
             post=instance.post
-        )
-        
-        if instance.user != instance.post.author:
-            Notification.objects.create(
-                user=instance.post.author,
+        ))
+
+        if instance.user_id != instance.post.author_id:
+            EventQueueService.enqueue_on_commit(Notification(
+                user_id=instance.post.author_id,
                 notification_type=Notification.NotificationType.LIKE,
                 message=f"{instance.user.username} liked your post '{instance.post.title}'",
                 target_url=instance.post.get_absolute_url(),
                 related_post=instance.post
-            )
+            ))
 
 @receiver(post_save, sender=PostReaction)
 def handle_reaction_notification(sender, instance, created, **kwargs):
     if created:
-        AdminNotification.create_for_reaction(instance)
+        EventQueueService.enqueue_on_commit(AdminNotification.build_for_reaction(instance))
 
 @receiver(post_save, sender=Favorite)
 def handle_favorite_notification(sender, instance, created, **kwargs):
     if created:
-        AdminActivityLog.objects.create(
+        EventQueueService.enqueue_on_commit(AdminActivityLog(
             activity_type=AdminActivityLog.ActivityType.FAVORITE,
             user=instance.user,
             post=instance.post
-        )
-        
-        if instance.user != instance.post.author:
-            Notification.objects.create(
-                user=instance.post.author,
+        ))
+
+        if instance.user_id != instance.post.author_id:
+            EventQueueService.enqueue_on_commit(Notification(
+                user_id=instance.post.author_id,
                 notification_type=Notification.NotificationType.FAVORITE,
                 message=f"{instance.user.username} favorited your post '{instance.post.title}'",
                 target_url=instance.post.get_absolute_url(),
                 related_post=instance.post
-            )
-        
-        AdminNotification.create_for_favorite(instance)
+            ))
+
+        EventQueueService.enqueue_on_commit(AdminNotification.build_for_favorite(instance))
 
 @receiver(post_save, sender=PostView)
 def handle_view_notification(sender, instance, created, **kwargs):
     if created:
-        AdminActivityLog.objects.create(
+        EventQueueService.enqueue_on_commit(AdminActivityLog(
             activity_type=AdminActivityLog.ActivityType.POST_VIEW,
             user=instance.user,
             post=instance.post,
@@ -94,19 +365,21 @@ def handle_view_notification(sender, instance, created, **kwargs):
                 'user_agent': instance.user_agent,
                 'referrer': instance.referrer
             }
+        ))
+
+        ViewCounterService.record_view(instance.post_id)
+        VisitorSketchService.record(
+            instance.post_id,
+            VisitorSketchService.visitor_key(instance.user_id, instance.ip_address),
+            instance.viewed_at
         )
-        
-        instance.post.view_count = models.F('view_count') + 1
-        instance.post.save(update_fields=['view_count'])
-        
-        AdminNotification.create_for_post_view(instance)
+
+        EventQueueService.enqueue_on_commit(AdminNotification.build_for_post_view(instance))
 
 @receiver(post_save, sender=ShareTracking)
 def handle_share_tracking(sender, instance, created, **kwargs):
     if created:
-        instance.post.save()
-        
-        AdminActivityLog.objects.create(
+        EventQueueService.enqueue_on_commit(AdminActivityLog(
             activity_type=AdminActivityLog.ActivityType.SHARE,
             user=instance.user,
             post=instance.post,
@@ -115,18 +388,6 @@ def handle_share_tracking(sender, instance, created, **kwargs):
                 'platform': instance.platform.name if instance.platform else 'direct',
                 'method': instance.share_method
             }
-        )
-        
-        AdminNotification.objects.create(
-            notification_type=AdminNotification.NotificationType.SHARE,
-            title=f"New share of '{instance.post.title}'",
-            message=f"Shared via {instance.platform.name if instance.platform else 'direct link'}",
-            related_object_id=instance.post.id,
-            related_content_type='blogpost',
-            metadata={
-                'post_id': str(instance.post.id),
-                'post_title': instance.post.title,
-                'platform': instance.platform.name if instance.platform else None,
-                'method': instance.share_method
-            }
-        )
\ No newline at end of file
+        ))
+
+        EventQueueService.enqueue_on_commit(AdminNotification.build_for_share(instance))
@@ -32,13 +32,94 @@ class Subscription(models.Model):
     preferences = models.JSONField(
         default=dict,
         blank=True,
-        help_text=_("Subscription preferences for categories or post types")
+        help_text=_(
+            "Subscription preferences, e.g. {\"categories\": [\"<category slug>\"], \"format\": \"text\"}; "
+            "no categories means every post"
+        )
     )
 
     class Meta:
         verbose_name = _("Subscription")
         verbose_name_plural = _("Subscriptions")
         ordering = ['-subscribed_at']
+        indexes = [
+            # Newsletter audience: confirmed, active subscribers in id order
+            models.Index(fields=['is_active', 'is_confirmed', 'id']),
+        ]
 
     def __str__(self):
-        return f"Subscription for {self.email} ({'active' if self.is_active else 'inactive'})"
\ No newline at end of file
+        return f"Subscription for {self.email} ({'active' if self.is_active else 'inactive'})"
+
+
+# NEWSLETTER RUN ------------------------------------------------------------------------------------------------------
+class NewsletterRun(models.Model):
+    """
+    One newsletter send of a published post, processed by NewsletterService
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.OneToOneField(
+        'blog.BlogPost',
+        on_delete=models.CASCADE,
+        related_name='newsletter_run'
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Newsletter run")
+        verbose_name_plural = _("Newsletter runs")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Newsletter for post {self.post_id}: {self.sent_count}/{self.total_recipients} sent"
+
+    @property
+    def progress(self):
+        if not self.total_recipients:
+            return 100.0 if self.status == self.Status.COMPLETED else 0.0
+        return round(100 * (self.sent_count + self.failed_count) / self.total_recipients, 1)
+
+
+# NEWSLETTER BATCH ------------------------------------------------------------------------------------------------------
+class NewsletterBatch(models.Model):
+    """
+    Subscribers of a run that share a template variant and are sent in one API call
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        SENT = 'sent', _('Sent')
+        FAILED = 'failed', _('Failed')
+
+    run = models.ForeignKey(NewsletterRun, on_delete=models.CASCADE, related_name='batches')
+    number = models.PositiveIntegerField()
+    variant = models.CharField(max_length=10, default='html')
+    subscription_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'number'], name='unique_newsletter_batch'),
+        ]
+
+    def __str__(self):
+        return f"Batch {self.number} of {self.run_id} ({self.get_status_display()})"
@@ -0,0 +1,246 @@
+# blog/pagination.py
+
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a composite, unique ordering.
+    Each page is fetched with a WHERE on the last row's key instead of OFFSET,
+    so page N costs the same as page 1 and no COUNT(*) is issued.
+    NULLs sort as the highest value (PostgreSQL's default), so a plain
+    DESC index on the ordering columns serves every page.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = self._resolve_fields(queryset.model)
+
+        position, reverse = self.decode_cursor(request)
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Going forward we only know a previous page exists if we came from a cursor,
+        # going backward the next page is the one we came from
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    # Cursor encoding -------------------------------------------------------------------------
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                None if value is None else field.to_python(value)
+                for (field, _, _), value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _link(self, obj, reverse):
+        position = []
+        for field, _, _ in self.fields:
+            value = field.value_from_object(obj)
+            position.append(None if value is None else field.value_to_string(obj))
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    # Query building ---------------------------------------------------------------------------
+    def _resolve_fields(self, model):
+        fields = []
+        for name in self.ordering:
+            descending = name.startswith('-')
+            field = model._meta.get_field(name.lstrip('-'))
+            fields.append((field, descending, field.null))
+        return fields
+
+    def _order_by(self, reverse):
+        order = []
+        for field, descending, _ in self.fields:
+            expression = F(field.attname)
+            if descending != reverse:
+                order.append(expression.desc(nulls_first=True))
+            else:
+                order.append(expression.asc(nulls_last=True))
+        return order
+
+    def _seek(self, position, reverse):
+        """
+        (k1 beyond v1) OR (k1 = v1 AND k2 beyond v2) OR ... in the traversal direction
+        """
+        branches = []
+        for index, ((field, descending, nullable), value) in enumerate(zip(self.fields, position)):
+            equals = [self._equals(f, v) for (f, _, _), v in zip(self.fields[:index], position[:index])]
+            beyond = self._beyond(field, value, descending != reverse, nullable)
+            if beyond is not None:
+                branches.append(reduce(and_, equals + [beyond]))
+        if not branches:
+            return Q(pk__in=[])
+        return reduce(or_, branches)
+
+    def _equals(self, field, value):
+        if value is None:
+            return Q(**{f'{field.attname}__isnull': True})
+        return Q(**{field.attname: value})
+
+    def _beyond(self, field, value, descending, nullable):
+        # NULL is the highest value: first when walking down, last when walking up
+        if value is None:
+            return Q(**{f'{field.attname}__isnull': False}) if descending else None
+        condition = Q(**{f'{field.attname}__{"lt" if descending else "gt"}': value})
+        if nullable and not descending:
+            condition |= Q(**{f'{field.attname}__isnull': True})
+        return condition
+
+
+class BlogPostCursorPagination(KeysetCursorPagination):
+    ordering = ('-published_at', '-created_at', '-id')
+    page_size = 12
+
+
+class NameCursorPagination(KeysetCursorPagination):
+    ordering = ('name', 'id')
+
+
+class RevisionCursorPagination(KeysetCursorPagination):
+    ordering = ('-revision_number', '-id')
+
+
+class CommentThreadCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination over the root comments of a cached thread
+    (see CommentTreeService). Roots are already ordered by the key in memory,
+    so the seek is a bisect on the decoded cursor instead of a WHERE clause.
+    """
+    ordering = ('created_at', 'id')
+    page_size = 20
+
+    def paginate_thread(self, roots, model, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = self._resolve_fields(model)
+
+        position, reverse = self.decode_cursor(request)
+        keys = [self._key(root) for root in roots]
+        if reverse:
+            end = bisect_left(keys, tuple(position))
+            start = max(end - self.page_size, 0)
+        else:
+            start = bisect_right(keys, tuple(position)) if position is not None else 0
+            end = start + self.page_size
+
+        self.page = roots[start:end]
+        self.has_next, self.has_previous = end < len(roots), start > 0
+        return self.page
+
+    def _key(self, root):
+        return tuple(field.to_python(root[field.name]) for field, _, _ in self.fields)
+
+    def _link(self, root, reverse):
+        position = [str(root[field.name]) for field, _, _ in self.fields]
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+
+class CursorPaginationMixin:
+    """
+    Lets a viewset switch to keyset pagination per request with
+    ?pagination=cursor (or by passing a cursor), keeping its default paginator otherwise
+    """
+    cursor_pagination_class = KeysetCursorPagination
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
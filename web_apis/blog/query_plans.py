@@ -0,0 +1,132 @@
+# blog/query_plans.py
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from web_apis.blog.models.blog_models import BlogPost, PostSimilarity
+from web_apis.blog.services.revision_service import RevisionService
+
+
+class SparseQueryPlan:
+    """
+    Narrows a queryset to the columns and relations a (sparse) serializer renders:
+    only() for concrete fields, select_related for expanded foreign keys, and
+    prefetches that load just primary keys for collapsed relations.
+    Computed fields declare what they read in Meta.field_sources; any field
+    whose source cannot be resolved leaves the queryset unnarrowed.
+    """
+
+    @classmethod
+    def narrow(cls, queryset, serializer, always=()):
+        plan = cls._plan(queryset.model, serializer)
+        if plan is None:
+            return queryset
+        columns, select, prefetch = plan
+        queryset = queryset.only(*columns, *always).prefetch_related(*prefetch)
+        # select_related() without arguments would follow every foreign key
+        return queryset.select_related(*select) if select else queryset
+
+    @classmethod
+    def _plan(cls, model, serializer, prefix=''):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        field_sources = getattr(serializer.Meta, 'field_sources', {})
+        columns, select, prefetch = [prefix + model._meta.pk.name], [], []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            nested = isinstance(field, serializers.BaseSerializer)
+            for source in field_sources.get(name, (field.source,)):
+                try:
+                    model_field = model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    return None
+
+                if not model_field.is_relation:
+                    columns.append(prefix + model_field.name)
+                elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                    columns.append(prefix + model_field.name)
+                    if nested:
+                        select.append(prefix + model_field.name)
+                        related = cls._plan(model_field.related_model, field, f'{prefix}{model_field.name}__')
+                        if related is not None:
+                            columns.extend(related[0])
+                            select.extend(related[1])
+                            prefetch.extend(related[2])
+                else:
+                    prefetch.append(Prefetch(
+                        prefix + model_field.name,
+                        queryset=cls._related_queryset(model_field, field if nested else None)
+                    ))
+        return columns, select, prefetch
+
+    @classmethod
+    def _related_queryset(cls, model_field, serializer):
+        queryset = model_field.related_model._default_manager.all()
+        # Reverse foreign keys need the column the prefetch joins back on
+        always = (model_field.field.attname,) if model_field.one_to_many else ()
+        if serializer is None:
+            return queryset.only('pk', *always)
+        return cls.narrow(queryset, serializer, always=always)
+
+
+class BlogPostQueryPlan:
+    """
+    Loads exactly the relations each BlogPost serializer touches, so a page
+    costs a fixed number of queries no matter how many posts it holds.
+
+    Queries per page (excluding authentication; prefetches under an empty
+    relation are skipped, so these are upper bounds):
+        list     - COUNT, posts + author, categories, tags
+        retrieve - post + author, categories, tags, related posts + authors,
+                   their categories, their tags, similar posts + authors,
+                   their categories, their tags, code snippets
+    """
+    LIST_QUERIES = 4
+    LIST_CURSOR_QUERIES = 3
+    DETAIL_QUERIES = 10
+
+    @classmethod
+    def list(cls, queryset):
+        # BlogPostListSerializer: author, categories, tags
+        return queryset.select_related('author').prefetch_related('categories', 'tags')
+
+    @classmethod
+    def detail(cls, queryset):
+        # BlogPostDetailSerializer adds list-serialized related_posts and code_snippets
+        # and the precomputed similar_posts, each with the list relations of its post
+        similar = PostSimilarity.objects.select_related('similar_post__author').prefetch_related(
+            'similar_post__categories', 'similar_post__tags'
+        ).defer('similar_post__content', 'similar_post__rendered_content')
+        return cls.list(queryset).prefetch_related(
+            Prefetch('related_posts', queryset=cls.list(BlogPost.objects.all())),
+            Prefetch('similarities', queryset=similar),
+            'code_snippets',
+        )
+
+    @classmethod
+    def revisions(cls, queryset):
+        # BlogPostRevisionListSerializer: metadata columns and updated_by, never content or delta
+        return queryset.select_related('updated_by').only(*RevisionService.LIST_FIELDS)
+
+    @classmethod
+    def revision_detail(cls, queryset):
+        # BlogPostRevisionSerializer: updated_by and post title, content rebuilt by RevisionService
+        return queryset.select_related('updated_by', 'post')
+
+    @classmethod
+    def for_action(cls, action, queryset):
+        plans = {
+            'list': cls.list,
+            'retrieve': cls.detail,
+        }
+        plan = plans.get(action)
+        return plan(queryset) if plan else queryset
+
+    @classmethod
+    def narrow(cls, queryset, serializer):
+        # Keyset pagination and the buffered view count read these on every post
+        return SparseQueryPlan.narrow(
+            queryset, serializer, always=('published_at', 'created_at', 'view_count')
+        )
@@ -0,0 +1,67 @@
+# blog/revision_delta.py
+
+import json
+import zlib
+from difflib import SequenceMatcher
+
+
+def diff(base, target):
+    """
+    Line-level operations turning base into target.
+
+    The operations are applied to the lines of base in order: a positive int
+    copies that many lines, a negative int skips that many and a string is
+    inserted as is. Lines keep their terminators, so applying them is exact
+    for any text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    operations = []
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append(i2 - i1)
+            continue
+        if i2 > i1:
+            operations.append(i1 - i2)
+        if j2 > j1:
+            operations.append(''.join(target_lines[j1:j2]))
+    return operations
+
+
+def pack(operations):
+    """
+    Compact storage form of diff() operations, zlib-compressed JSON
+    """
+    return zlib.compress(json.dumps(operations, separators=(',', ':')).encode(), 9)
+
+
+def encode(base, target):
+    return pack(diff(base, target))
+
+
+def line_counts(operations):
+    """
+    (lines added, lines removed) by a list of diff() operations
+    """
+    added = sum(len(operation.splitlines()) for operation in operations if isinstance(operation, str))
+    removed = -sum(operation for operation in operations if not isinstance(operation, str) and operation < 0)
+    return added, removed
+
+
+def apply(base, delta):
+    """
+    Rebuilds the target text from base and a delta made by encode() or pack()
+    """
+    lines = base.splitlines(keepends=True)
+    parts = []
+    position = 0
+    for operation in json.loads(zlib.decompress(bytes(delta)).decode()):
+        if isinstance(operation, str):
+            parts.append(operation)
+        elif operation > 0:
+            parts.extend(lines[position:position + operation])
+            position += operation
+        else:
+            position -= operation
+    return ''.join(parts)
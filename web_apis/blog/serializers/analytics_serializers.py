@@ -2,14 +2,14 @@
 # blog/serializers/analytics_serializers.py
 
 from rest_framework import serializers
-from blog.models.analytics_models import (
+from web_apis.blog.models.analytics_models import (
     PostView,
     ReadHistory,
     SearchQuery,
     ClickEvent,
     AdminActivityLog
 )
-from blog.serializers.blog_serializers import BlogPostMinimalSerializer
+from web_apis.blog.serializers.blog_serializers import BlogPostMinimalSerializer
 from user_account.serializers import UserMinimalSerializer
 
 class PostViewSerializer(serializers.ModelSerializer):
@@ -62,9 +62,7 @@ class ReadHistorySerializer(serializers.ModelSerializer):
         read_only_fields = fields
     
     def get_progress_percentage(self, obj):
-        if obj.post.word_count > 0:
-            return min(100, (obj.scroll_position / obj.post.word_count) * 100)
-        return 0
+        return obj.read_percentage
     
     def get_reading_status(self, obj):
         if obj.is_completed:
@@ -171,6 +169,10 @@ class PostAnalyticsSerializer(serializers.Serializer):
     post = BlogPostMinimalSerializer()
     total_views = serializers.IntegerField()
     unique_visitors = serializers.IntegerField()
+    unique_visitors_error = serializers.FloatField(
+        required=False,
+        help_text="Relative standard error of the unique_visitors estimate"
+    )
     average_time_spent = serializers.FloatField()
     completion_rate = serializers.FloatField()
 
@@ -190,6 +192,18 @@ class TrendAnalysisSerializer(serializers.Serializer):
     shares = serializers.IntegerField()
 
 
+class ReadingProgressSerializer(serializers.Serializer):
+    scroll_position = serializers.IntegerField(min_value=0)
+    document_height = serializers.IntegerField(
+        min_value=1,
+        help_text="Scrollable height of the article in pixels (content height minus viewport height)"
+    )
+
+    def validate(self, data):
+        data['read_percentage'] = min(100.0, data['scroll_position'] / data['document_height'] * 100)
+        return data
+
+
 # Lightweight Nested Serializers
 class PostViewMinimalSerializer(serializers.ModelSerializer):
     class Meta:
@@ -200,7 +214,7 @@ class PostViewMinimalSerializer(serializers.ModelSerializer):
 class ReadHistoryMinimalSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReadHistory
-        fields = ['id', 'last_read_at', 'is_completed', 'scroll_position']
+        fields = ['id', 'last_read_at', 'is_completed', 'scroll_position', 'read_percentage']
 
 
 class SearchQueryMinimalSerializer(serializers.ModelSerializer):
@@ -1,10 +1,75 @@
 # blog/serializers/blog_serializers.py
 
 from rest_framework import serializers
-from web_apis.blog.models import Category, Tag, BlogPost, BlogPostRevision
-from user_account.serializers import UserSerializer  # Assuming you have a UserSerializer
+from web_apis.blog.models import Category, Tag, BlogPost, BlogPostRevision, PostSimilarity
+from user_account.serializers import UserSerializer, UserMinimalSerializer  # Assuming you have a UserSerializer
+from web_apis.blog.services.revision_service import RevisionService
+from web_apis.blog.services.image_variant_service import ImageVariantService
+from web_apis.blog.serializers.image_serializers import ImageVariantsField
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for read endpoints:
+        ?fields=id,title,slug   only the listed top-level fields are rendered
+        ?expand=author,tags     only the listed relations are rendered nested
+    Once either parameter is given, relations in Meta.expandable_fields that
+    are not expanded collapse to their primary key(s). Without them the
+    serializer renders as before. Only the top-level serializer reads the
+    query parameters.
+
+    Meta.field_sources maps computed fields to the model attributes they read,
+    so the queryset can be narrowed to match (see BlogPostQueryPlan.narrow).
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.get_sparse_params()
+        if requested is None and expand is None:
+            return fields
+
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name in fields and name not in (expand or ()):
+                fields[name] = self._collapse(fields[name])
+        return fields
+
+    def get_sparse_params(self):
+        """
+        Returns the (fields, expand) name sets, None for a parameter that was not given
+        """
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        if parent is not None or request is None:
+            return None, None
+        return (
+            self._parse_names(request.query_params.get(self.fields_query_param)),
+            self._parse_names(request.query_params.get(self.expand_query_param))
+        )
+
+    def is_sparse(self):
+        return self.get_sparse_params() != (None, None)
+
+    @staticmethod
+    def _parse_names(value):
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    @staticmethod
+    def _collapse(field):
+        kwargs = {'source': field.source} if field.source else {}
+        if isinstance(field, serializers.ListSerializer):
+            return serializers.PrimaryKeyRelatedField(many=True, read_only=True, **kwargs)
+        return serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     absolute_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -23,12 +88,13 @@ class CategorySerializer(serializers.ModelSerializer):
             'absolute_url'
         ]
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'absolute_url']
+        field_sources = {'absolute_url': ('id',)}
 
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     absolute_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -44,17 +110,20 @@ class TagSerializer(serializers.ModelSerializer):
             'absolute_url'
         ]
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'absolute_url']
+        field_sources = {'absolute_url': ('id',)}
 
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
 
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class BlogPostListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     absolute_url = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    featured_image = serializers.SerializerMethodField()
+    featured_image_variants = ImageVariantsField()
 
     class Meta:
         model = BlogPost
@@ -72,30 +141,68 @@ class BlogPostListSerializer(serializers.ModelSerializer):
             'is_pinned',
             'featured_image',
             'featured_image_alt',
+            'featured_image_variants',
             'reading_time',
             'view_count',
             'comment_count',
             'like_count',
+            'reaction_count',
+            'reaction_counts',
+            'favorite_count',
             'published_at',
             'created_at',
             'absolute_url'
         ]
         read_only_fields = fields
+        expandable_fields = ['author', 'categories', 'tags']
+        field_sources = {
+            'absolute_url': ('slug',),
+            'status_display': ('status',),
+            'featured_image': ('featured_image', 'featured_image_variants'),
+        }
 
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
 
+    def get_featured_image(self, obj):
+        # Listings show a resized variant, the original until it is rendered
+        request = self.context.get('request')
+        src = ImageVariantService.src(obj.featured_image_variants, request)
+        if src or not obj.featured_image:
+            return src
+        return request.build_absolute_uri(obj.featured_image.url) if request else obj.featured_image.url
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Present only on results of the ranked search mode
+        if hasattr(instance, 'search_rank'):
+            data['search_rank'] = instance.search_rank
+            data['search_headline'] = instance.search_headline
+        return data
+
+
+class PostSimilaritySerializer(serializers.ModelSerializer):
+    post = BlogPostListSerializer(source='similar_post', read_only=True)
+
+    class Meta:
+        model = PostSimilarity
+        fields = ['post', 'score']
+        read_only_fields = fields
+
 
 class BlogPostDetailSerializer(BlogPostListSerializer):
     related_posts = BlogPostListSerializer(many=True, read_only=True)
+    similar_posts = PostSimilaritySerializer(source='similarities', many=True, read_only=True)
     is_public = serializers.BooleanField(read_only=True)
     is_scheduled = serializers.BooleanField(read_only=True)
+    featured_image = serializers.ImageField(read_only=True)
 
     class Meta(BlogPostListSerializer.Meta):
         fields = BlogPostListSerializer.Meta.fields + [
             'content',
             'rendered_content',
             'related_posts',
+            'similar_posts',
             'allow_comments',
             'embedded_media',
             'meta_title',
@@ -110,6 +217,12 @@ class BlogPostDetailSerializer(BlogPostListSerializer):
             'updated_at'
         ]
         read_only_fields = fields
+        expandable_fields = BlogPostListSerializer.Meta.expandable_fields + ['related_posts']
+        field_sources = {
+            **BlogPostListSerializer.Meta.field_sources,
+            'is_public': ('status', 'published_at'),
+            'is_scheduled': ('status', 'scheduled_at'),
+        }
 
 
 class BlogPostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -189,28 +302,48 @@ class BlogPostCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class BlogPostRevisionSerializer(serializers.ModelSerializer):
-    updated_by = UserSerializer(read_only=True)
-    post = serializers.PrimaryKeyRelatedField(read_only=True)
-    revision_summary = serializers.SerializerMethodField()
+class BlogPostRevisionListSerializer(serializers.ModelSerializer):
+    """
+    Revision history entry: metadata and the size of the change, never the content
+    """
+    updated_by = UserMinimalSerializer(read_only=True)
 
     class Meta:
         model = BlogPostRevision
         fields = [
             'id',
-            'post',
             'revision_number',
             'title',
-            'content',
-            'excerpt',
             'updated_by',
             'created_at',
-            'revision_notes',
+            'size_delta',
+            'lines_added',
+            'lines_removed',
             'changes',
+            'revision_notes'
+        ]
+        read_only_fields = fields
+
+
+class BlogPostRevisionSerializer(BlogPostRevisionListSerializer):
+    updated_by = UserSerializer(read_only=True)
+    post = serializers.PrimaryKeyRelatedField(read_only=True)
+    content = serializers.SerializerMethodField()
+    revision_summary = serializers.SerializerMethodField()
+
+    class Meta(BlogPostRevisionListSerializer.Meta):
+        fields = BlogPostRevisionListSerializer.Meta.fields + [
+            'post',
+            'excerpt',
+            'content',
+            'content_length',
             'revision_summary'
         ]
         read_only_fields = fields
 
+    def get_content(self, obj):
+        return RevisionService.content(obj)
+
     def get_revision_summary(self, obj):
         return str(obj)
 
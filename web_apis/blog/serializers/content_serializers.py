@@ -3,8 +3,8 @@
 # blog/serializers/content_serializers.py
 
 from rest_framework import serializers
-from blog.models.content_models import MediaAttachment, CodeSnippet
-from blog.serializers.blog_serializers import BlogPostMinimalSerializer
+from web_apis.blog.models.content_models import MediaAttachment, CodeSnippet, ChunkedUpload
+from web_apis.blog.serializers.blog_serializers import BlogPostMinimalSerializer
 from user_account.serializers import UserMinimalSerializer
 
 class MediaAttachmentSerializer(serializers.ModelSerializer):
@@ -156,4 +156,29 @@ class CodeSnippetMinimalSerializer(serializers.ModelSerializer):
             'language',
             'caption'
         ]
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    checksum = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id',
+            'target',
+            'owner_id',
+            'filename',
+            'content_type',
+            'size',
+            'offset',
+            'checksum',
+            'status',
+            'attachment_id',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_checksum(self, obj):
+        # CRC32 of the bytes received so far, as sent in Upload-Checksum
+        return f'{obj.checksum:08x}'
@@ -4,14 +4,14 @@
 # blog/serializers/engagement_serializers.py
 
 from rest_framework import serializers
-from blog.models import (
+from web_apis.blog.models import (
     Comment,
     CommentReaction,
     Like,
     PostReaction,
     Favorite
 )
-from blog_serializers import BlogPostMinimalSerializer
+from web_apis.blog.serializers.blog_serializers import BlogPostMinimalSerializer
 from user_account.serializers import UserMinimalSerializer
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -39,6 +39,7 @@ class CommentSerializer(serializers.ModelSerializer):
             'content',
             'is_approved',
             'is_spam',
+            'reaction_counts',
             'is_reply',
             'display_name',
             'user_initials',  # Add this line
@@ -68,6 +69,42 @@ class CommentSerializer(serializers.ModelSerializer):
             return obj.user.get_initials() if hasattr(obj.user, 'get_initials') else ''
         return ''
 
+class CommentThreadSerializer(serializers.ModelSerializer):
+    """
+    Public node of a comment thread built by CommentTreeService: reads only the
+    preloaded user and the children/replies_count set on each comment
+    """
+    user = UserMinimalSerializer(read_only=True)
+    display_name = serializers.CharField(read_only=True)
+    user_initials = serializers.SerializerMethodField()
+    replies_count = serializers.IntegerField(read_only=True)
+    children = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = [
+            'id',
+            'parent',
+            'user',
+            'display_name',
+            'user_initials',
+            'content',
+            'reaction_counts',
+            'replies_count',
+            'children',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_user_initials(self, obj):
+        if obj.user:
+            return obj.user.get_initials() if hasattr(obj.user, 'get_initials') else ''
+        return ''
+
+    def get_children(self, obj):
+        return CommentThreadSerializer(getattr(obj, 'children', []), many=True).data
+
 class CommentCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
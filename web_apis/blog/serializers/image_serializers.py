@@ -0,0 +1,15 @@
+# blog/serializers/image_serializers.py
+
+from rest_framework import serializers
+
+from web_apis.blog.services.image_variant_service import ImageVariantService
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Renders a <field>_variants manifest as src, per-format srcset strings and
+    thumbnail URLs (see ImageVariantService.urls), null until they are rendered
+    """
+
+    def to_representation(self, value):
+        return ImageVariantService.urls(value, self.context.get('request'))
@@ -1,9 +1,10 @@
 
 # blog/serializers/notification_serializers.py
 
+from django.utils.timesince import timesince
 from rest_framework import serializers
-from blog.models.notification_models import Notification, AdminNotification
-from blog_serializers import BlogPostMinimalSerializer
+from web_apis.blog.models.notification_models import Notification, AdminNotification
+from web_apis.blog.serializers.blog_serializers import BlogPostMinimalSerializer
 from user_account.serializers import UserMinimalSerializer
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -33,7 +34,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Add human-readable time difference
-        data['time_since'] = instance.created_at.timesince()
+        data['time_since'] = timesince(instance.created_at)
         return data
 
 
@@ -67,14 +68,16 @@ class AdminNotificationSerializer(serializers.ModelSerializer):
             'related_content_type',
             'is_read',
             'created_at',
-            'metadata'
+            'metadata',
+            'count',
+            'last_event_at'
         ]
         read_only_fields = fields
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Add human-readable time difference
-        data['time_since'] = instance.created_at.timesince()
+        data['time_since'] = timesince(instance.created_at)
         return data
 
 
@@ -102,6 +105,11 @@ class AdminNotificationSummarySerializer(serializers.Serializer):
     last_instance = serializers.DateTimeField()
 
 
+class MarkReadSerializer(serializers.Serializer):
+    # Everything created up to this moment, everything when omitted
+    until = serializers.DateTimeField(required=False)
+
+
 # Minimal serializers for lists
 class NotificationMinimalSerializer(serializers.ModelSerializer):
     notification_type_display = serializers.CharField(
@@ -0,0 +1,251 @@
+# blog/services/analytics_rollup_service.py
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from web_apis.blog.models.analytics_models import (
+    PostView,
+    ReadEvent,
+    PostDailyStats,
+    SiteDailyStats,
+    AnalyticsWatermark
+)
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.sharing_models import ShareTracking
+from web_apis.blog.services.visitor_sketch_service import VisitorSketchService
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class AnalyticsRollupService:
+    """
+    Folds new PostView, ReadEvent and ShareTracking rows into PostDailyStats
+    and SiteDailyStats.
+
+    Each source keeps a watermark; a run only aggregates rows stamped after it
+    (up to now minus a small lag for in-flight writes) and moves it forward in
+    the same transaction, so re-running never double counts. A run that starts
+    from scratch (after reset()) also reads back the rows RetentionService has
+    moved to the archive, so a rebuild keeps the history. Unique visitors come
+    from the HyperLogLog sketches kept by VisitorSketchService.
+    """
+
+    # source: (model, timestamp field, {rollup column: aggregate})
+    SOURCES = {
+        'views': (PostView, 'viewed_at', {
+            'views': Count('id'),
+            'timed_views': Count('id', filter=Q(time_spent__gt=0)),
+            'total_time_spent': Sum('time_spent'),
+        }),
+        # ReadHistory is updated in place, its append-only events are counted instead
+        'reads': (ReadEvent, 'occurred_at', {
+            'reads': Count('id', filter=Q(event_type=ReadEvent.EventType.STARTED)),
+            'completed_reads': Count('id', filter=Q(event_type=ReadEvent.EventType.COMPLETED)),
+        }),
+        'shares': (ShareTracking, 'shared_at', {
+            'shares': Count('id'),
+        }),
+    }
+    # source: [(archive filters, {rollup column: (ArchiveQuery function, archived column)})]
+    ARCHIVED = {
+        'views': [({}, {
+            'views': ('count', None),
+            'timed_views': ('nonzero', 'time_spent'),
+            'total_time_spent': ('sum', 'time_spent'),
+        })],
+        'reads': [
+            ({'event_type': ReadEvent.EventType.STARTED}, {'reads': ('count', None)}),
+            ({'event_type': ReadEvent.EventType.COMPLETED}, {'completed_reads': ('count', None)}),
+        ],
+    }
+    COUNTERS = (
+        'views', 'timed_views', 'total_time_spent', 'reads', 'completed_reads', 'shares'
+    )
+
+    @classmethod
+    def run(cls, until=None):
+        """
+        Processes every source up to `until`, returns the number of rows folded in per source
+        """
+        until = until or timezone.now() - timedelta(seconds=getattr(settings, 'BLOG_ANALYTICS_ROLLUP_LAG', 300))
+        processed = {}
+
+        with transaction.atomic():
+            # Locking every watermark serializes concurrent runs of the job
+            watermarks = cls._lock_watermarks()
+            touched = set()
+            view_dates = set()
+            for source, (model, timestamp, aggregates) in cls.SOURCES.items():
+                watermark = watermarks[source]
+                if watermark.position >= until:
+                    processed[source] = 0
+                    continue
+
+                rows = model.objects.filter(**{
+                    f'{timestamp}__gt': watermark.position,
+                    f'{timestamp}__lte': until,
+                })
+                grouped = list(
+                    rows.annotate(date=TruncDate(timestamp))
+                    .values('post_id', 'date')
+                    .annotate(**aggregates)
+                    .order_by()
+                )
+                if watermark.position == EPOCH and source in cls.ARCHIVED:
+                    grouped = cls._merge(grouped + cls._archived(source, until), aggregates.keys())
+                cls._increment(grouped, aggregates.keys())
+                processed[source] = sum(row[next(iter(aggregates))] for row in grouped)
+
+                keys = {(row['post_id'], row['date']) for row in grouped}
+                touched |= keys
+                if source == 'views':
+                    view_dates = {date for _, date in keys}
+
+                watermark.position = until
+                watermark.save(update_fields=['position', 'updated_at'])
+
+            unique_visitors = cls._unique_visitors(view_dates) if view_dates else {}
+            cls._refresh_site({date for _, date in touched}, unique_visitors)
+
+        if any(processed.values()):
+            logger.info(f"Analytics rollup processed {processed}")
+        return processed
+
+    @classmethod
+    def reset(cls):
+        """
+        Drops every rollup and watermark so the next run rebuilds from the raw rows
+        """
+        with transaction.atomic():
+            PostDailyStats.objects.all().delete()
+            SiteDailyStats.objects.all().delete()
+            AnalyticsWatermark.objects.filter(name__in=[cls._watermark_name(s) for s in cls.SOURCES]).delete()
+
+    @classmethod
+    def _lock_watermarks(cls):
+        names = sorted(cls._watermark_name(source) for source in cls.SOURCES)
+        for name in names:
+            AnalyticsWatermark.objects.get_or_create(name=name, defaults={'position': EPOCH})
+        locked = {
+            watermark.name: watermark
+            for watermark in AnalyticsWatermark.objects.select_for_update().filter(name__in=names).order_by('name')
+        }
+        return {source: locked[cls._watermark_name(source)] for source in cls.SOURCES}
+
+    @staticmethod
+    def _watermark_name(source):
+        return f'blog_daily_{source}'
+
+    @classmethod
+    def _archived(cls, source, until):
+        """
+        The source's archived rows grouped like the table rows, per post and local day
+        """
+        from web_apis.blog.services.retention_service import RetentionService
+
+        totals = {}
+        for filters, aggregates in cls.ARCHIVED[source]:
+            query = RetentionService.query(source).between(end=until).where(**filters)
+            for (post_id, date), values in query.totals_by_day(
+                'post_id', aggregates, tz=timezone.get_current_timezone()
+            ).items():
+                totals.setdefault((post_id, date), {}).update(values)
+
+        # Archived rows outlive their posts, the rollups do not
+        existing = {
+            str(post_id): post_id
+            for post_id in BlogPost.objects.filter(id__in={post_id for post_id, _ in totals}).values_list('id', flat=True)
+        }
+        return [
+            {'post_id': existing[post_id], 'date': date, **values}
+            for (post_id, date), values in totals.items() if post_id in existing
+        ]
+
+    @staticmethod
+    def _merge(grouped, columns):
+        merged = {}
+        for row in grouped:
+            key = (row['post_id'], row['date'])
+            if key not in merged:
+                merged[key] = {'post_id': row['post_id'], 'date': row['date'], **{column: 0 for column in columns}}
+            for column in columns:
+                merged[key][column] += row.get(column) or 0
+        return list(merged.values())
+
+    @classmethod
+    def _increment(cls, grouped, columns):
+        if not grouped:
+            return
+        existing = {
+            (stats.post_id, stats.date): stats
+            for stats in PostDailyStats.objects.filter(
+                post_id__in={row['post_id'] for row in grouped},
+                date__in={row['date'] for row in grouped}
+            )
+        }
+        created, updated = [], []
+        for row in grouped:
+            stats = existing.get((row['post_id'], row['date']))
+            if stats is None:
+                stats = PostDailyStats(post_id=row['post_id'], date=row['date'])
+                created.append(stats)
+            else:
+                updated.append(stats)
+            for column in columns:
+                setattr(stats, column, getattr(stats, column) + (row[column] or 0))
+
+        PostDailyStats.objects.bulk_create(created, batch_size=1000)
+        if updated:
+            PostDailyStats.objects.bulk_update(updated, list(columns), batch_size=1000)
+
+    @classmethod
+    def _unique_visitors(cls, dates):
+        """
+        Copies the touched days' HyperLogLog estimates onto the rollups, returns the site-wide ones
+        """
+        per_post, per_site = VisitorSketchService.daily_estimates(dates)
+        changed = []
+        for stats in PostDailyStats.objects.filter(date__in=dates):
+            estimate = per_post.get((stats.post_id, stats.date))
+            if estimate is not None and estimate != stats.unique_visitors:
+                stats.unique_visitors = estimate
+                changed.append(stats)
+        PostDailyStats.objects.bulk_update(changed, ['unique_visitors'], batch_size=1000)
+        return per_site
+
+    @classmethod
+    def _refresh_site(cls, dates, unique_visitors):
+        """
+        Re-derives the site totals of the touched days from the per-post rollups
+        """
+        if not dates:
+            return
+        totals = PostDailyStats.objects.filter(date__in=dates).values('date').annotate(
+            **{column: Sum(column) for column in cls.COUNTERS}
+        ).order_by()
+        existing = {stats.date: stats for stats in SiteDailyStats.objects.filter(date__in=dates)}
+
+        created, updated = [], []
+        for row in totals:
+            stats = existing.get(row['date'])
+            if stats is None:
+                stats = SiteDailyStats(date=row['date'])
+                created.append(stats)
+            else:
+                updated.append(stats)
+            for column in cls.COUNTERS:
+                setattr(stats, column, row[column] or 0)
+            if row['date'] in unique_visitors:
+                stats.unique_visitors = unique_visitors[row['date']]
+
+        SiteDailyStats.objects.bulk_create(created)
+        if updated:
+            SiteDailyStats.objects.bulk_update(updated, list(cls.COUNTERS) + ['unique_visitors'])
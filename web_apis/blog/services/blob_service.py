@@ -0,0 +1,232 @@
+# blog/services/blob_service.py
+
+import logging
+import os
+import shutil
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from web_apis.blog.models.content_models import ChunkedUpload, MediaBlob
+from web_apis.blog.storage import BlobStorage, blob_storage
+
+logger = logging.getLogger(__name__)
+
+
+class BlobService:
+    """
+    Reference counts of the files BlobStorage shares between rows.
+
+    Signal handlers move MediaBlob.ref_count in the same transaction as the
+    row whose file field changed. collect() recounts every reference with one
+    pass per table, then deletes the blobs nothing points at anymore, as well
+    as blobs on disk that never got a row (an upload whose transaction rolled
+    back). Blobs younger than GRACE_PERIOD are kept, their row may still be on
+    its way (e.g. a finished upload that is not attached yet).
+    """
+    # Models whose file fields are stored by BlobStorage
+    FIELDS = {
+        'blog.BlogPost': ('featured_image',),
+        'blog.MediaAttachment': ('upload',),
+        'contact.ContactAttachment': ('file',),
+        'evigdia_services.Service': ('service_image', 'sub_service_image'),
+        'evigdia_services.ServiceAttachment': ('file',),
+        'user_account.Profile': ('profile_image', 'cover_image'),
+    }
+    DEFAULTS = {
+        'GRACE_PERIOD': 86400,
+    }
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def remember(cls, instance):
+        """
+        Notes the blobs an instance points at as loaded, skipping deferred fields
+        """
+        deferred = instance.get_deferred_fields()
+        instance._blobs = {
+            field_name: cls._blob(getattr(instance, field_name).name)
+            for field_name in cls.FIELDS[instance._meta.label]
+            if field_name not in deferred
+        }
+
+    @classmethod
+    def saved(cls, instance, update_fields=None):
+        previous = getattr(instance, '_blobs', {})
+        changes = Counter()
+        for field_name in cls.FIELDS[instance._meta.label]:
+            if update_fields is not None and field_name not in update_fields:
+                continue
+            if field_name in instance.get_deferred_fields():
+                continue
+            current = cls._blob(getattr(instance, field_name).name)
+            # Fields deferred at load have an unknown old value, collect() recounts them
+            old = previous.get(field_name, current)
+            if old != current:
+                if old:
+                    changes[old] -= 1
+                if current:
+                    changes[current] += 1
+        cls.adjust(changes)
+        cls.remember(instance)
+
+    @classmethod
+    def deleted(cls, instance):
+        changes = Counter()
+        for blob in getattr(instance, '_blobs', {}).values():
+            if blob:
+                changes[blob] -= 1
+        cls.adjust(changes)
+
+    @classmethod
+    def adjust(cls, changes):
+        """
+        Applies {blob name: reference delta}
+        """
+        for name, delta in changes.items():
+            if delta > 0:
+                blob, created = MediaBlob.objects.get_or_create(
+                    name=name, defaults={'size': cls._size(name), 'ref_count': delta}
+                )
+                if not created:
+                    MediaBlob.objects.filter(pk=blob.pk).update(
+                        ref_count=F('ref_count') + delta, updated_at=timezone.now()
+                    )
+            elif delta < 0:
+                # Clamped at zero, files saved before BlobStorage have no row to count down
+                MediaBlob.objects.filter(name=name).update(
+                    ref_count=Greatest(F('ref_count') + delta, 0), updated_at=timezone.now()
+                )
+
+    @classmethod
+    def collect(cls, dry_run=False):
+        """
+        Recounts references and deletes unreferenced blobs older than GRACE_PERIOD,
+        returns (blobs deleted, bytes freed)
+        """
+        references = cls.count_references()
+        cls._reconcile(references)
+
+        cutoff = timezone.now() - timedelta(seconds=cls._setting('GRACE_PERIOD'))
+        storage = blob_storage()
+        unreferenced = list(
+            MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list('name', 'size')
+        )
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        stored = dict(cls._stored_blobs(storage))
+        # Files written by a save whose row never committed
+        for name, (size, _) in stored.items():
+            if name not in known and name not in references:
+                unreferenced.append((name, size))
+
+        deleted = freed = 0
+        for name, size in unreferenced:
+            # Saving a duplicate touches the blob, it may have been reused since the recount
+            if name in stored and stored[name][1] >= cutoff.timestamp():
+                continue
+            if not dry_run:
+                cls._delete(storage, name)
+                MediaBlob.objects.filter(name=name, ref_count=0).delete()
+            deleted += 1
+            freed += size
+        if deleted:
+            logger.info(f"{'Would delete' if dry_run else 'Deleted'} {deleted} unreferenced blobs ({freed} bytes)")
+        return deleted, freed
+
+    @classmethod
+    def count_references(cls):
+        """
+        {blob name: number of file fields pointing at it} over every registered table
+        """
+        references = Counter()
+        for label, field_names in cls.FIELDS.items():
+            model = apps.get_model(label)
+            rows = model.objects.order_by().values_list(*field_names)
+            for names in rows.iterator(chunk_size=cls.BATCH_SIZE):
+                for name in names:
+                    blob = cls._blob(name)
+                    if blob:
+                        references[blob] += 1
+        # Finished uploads waiting to be attached
+        pending = ChunkedUpload.objects.filter(status=ChunkedUpload.Status.COMPLETE).values_list('file', flat=True)
+        for name in pending.iterator(chunk_size=cls.BATCH_SIZE):
+            blob = cls._blob(name)
+            if blob:
+                references[blob] += 1
+        return references
+
+    @classmethod
+    def _reconcile(cls, references):
+        with transaction.atomic():
+            existing = {blob.name: blob for blob in MediaBlob.objects.select_for_update()}
+            drifted = []
+            for name, blob in existing.items():
+                count = references.get(name, 0)
+                if blob.ref_count != count:
+                    blob.ref_count = count
+                    blob.updated_at = timezone.now()
+                    drifted.append(blob)
+            MediaBlob.objects.bulk_update(drifted, ['ref_count', 'updated_at'], batch_size=cls.BATCH_SIZE)
+            MediaBlob.objects.bulk_create(
+                [
+                    MediaBlob(name=name, size=cls._size(name), ref_count=count)
+                    for name, count in references.items() if name not in existing
+                ],
+                batch_size=cls.BATCH_SIZE,
+                ignore_conflicts=True
+            )
+        if drifted:
+            logger.info(f"Corrected the reference counts of {len(drifted)} blobs")
+
+    @staticmethod
+    def _blob(name):
+        """
+        Stored blob behind a file field value, None for empty values and files outside BlobStorage
+        """
+        blob = BlobStorage.blob_name(name or '')
+        return blob if BlobStorage.is_blob(blob) else None
+
+    @staticmethod
+    def _size(name):
+        try:
+            return blob_storage().size(name)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _stored_blobs(storage):
+        """
+        (blob name, (size, modified timestamp)) of every blob file on disk
+        """
+        root = storage.path(BlobStorage.BLOB_DIR)
+        if not os.path.isdir(root):
+            return
+        for prefix in os.listdir(root):
+            directory = os.path.join(root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                name = f'{BlobStorage.BLOB_DIR}/{prefix}/{entry.name}'
+                if entry.is_file() and BlobStorage.is_blob(name):
+                    stat = entry.stat()
+                    yield name, (stat.st_size, stat.st_mtime)
+
+    @staticmethod
+    def _delete(storage, name):
+        path = storage.path(name)
+        if os.path.exists(path):
+            os.unlink(path)
+        # Derived files (image variants) live in a directory named after the digest
+        derived = os.path.splitext(path)[0]
+        if os.path.isdir(derived):
+            shutil.rmtree(derived, ignore_errors=True)
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_BLOB_{name}', cls.DEFAULTS[name])
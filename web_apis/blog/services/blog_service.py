@@ -1,10 +1,12 @@
 
 # blog/services/blog_service.py
 
-from django.utils import timezone
+from django.db import transaction
 from django.db import transaction, models
 from django.core.exceptions import ValidationError
-from web_apis.blog.models.blog_models import BlogPost, BlogPostRevision
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.services.view_counter_service import ViewCounterService
+from web_apis.blog.services.revision_service import RevisionService
 
 class BlogPostService:
     
@@ -79,7 +81,7 @@ class BlogPostService:
         Restores a post to a specific revision
         """
         post.title = revision.title
-        post.content = revision.content
+        post.content = RevisionService.content(revision)
         post.excerpt = revision.excerpt
         post.save()
         cls._create_revision(post, f"Restored to revision {revision.revision_number}")
@@ -87,44 +89,24 @@ class BlogPostService:
     @classmethod
     def increment_view_count(cls, post):
         """
-        Atomically increments view count
+        Buffers a view for the post and returns the views not yet persisted.
+        Buffered views are written periodically by ViewCounterService.flush
         """
-        BlogPost.objects.filter(id=post.id).update(
-            view_count=models.F('view_count') + 1
-        )
+        return ViewCounterService.record_view(post.id)
 
     @classmethod
     def _create_initial_revision(cls, post):
         """
         Creates the first revision for a new post
         """
-        BlogPostRevision.objects.create(
-            post=post,
-            revision_number=1,
-            title=post.title,
-            content=post.content,
-            excerpt=post.excerpt,
-            updated_by=post.author,
-            changes="Initial version"
-        )
+        RevisionService.create(post, "Initial version")
 
     @classmethod
     def _create_revision(cls, post, changes):
         """
-        Creates a new revision for a post
+        Creates a new revision for a post, stored as a delta when possible
         """
-        last_revision = post.revisions.order_by('-revision_number').first()
-        revision_number = last_revision.revision_number + 1 if last_revision else 1
-        
-        BlogPostRevision.objects.create(
-            post=post,
-            revision_number=revision_number,
-            title=post.title,
-            content=post.content,
-            excerpt=post.excerpt,
-            updated_by=post.author,
-            changes=changes
-        )
+        RevisionService.create(post, changes)
 
     @classmethod
     def _handle_status_change(cls, post, new_status):
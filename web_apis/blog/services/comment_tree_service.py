@@ -0,0 +1,99 @@
+# blog/services/comment_tree_service.py
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from web_apis.blog.models.engagement_models import Comment
+
+logger = logging.getLogger(__name__)
+
+
+class CommentTreeService:
+    """
+    Loads a post's approved comment thread in one query and caches it serialized.
+
+    The adjacency list (parent_id) is fetched flat with the commenters joined
+    in, ordered by (created_at, id), and assembled into a tree in Python;
+    replies_count is set from the assembled children, so rendering a thread
+    never falls back to a per-comment COUNT or user lookup. Replies under a
+    comment that is not visible are hidden with it.
+
+    The cached thread is dropped whenever a comment on the post is saved or
+    deleted (see signals), root-level pages are cut from it by
+    CommentThreadCursorPagination.
+    """
+    CACHE_KEY = 'blog:comments:thread:{post_id}'
+    DEFAULTS = {
+        'CACHE_TIMEOUT': 600,
+    }
+
+    @classmethod
+    def get_thread(cls, post_id):
+        """
+        Serialized root comments, each with its nested children, oldest first
+        """
+        key = cls._key(post_id)
+        thread = cache.get(key)
+        if thread is None:
+            thread = cls._serialize(cls.load(post_id))
+            cache.set(key, thread, timeout=cls._setting('CACHE_TIMEOUT'))
+        return thread
+
+    @classmethod
+    def load(cls, post_id):
+        """
+        Root Comment instances with `children` and `replies_count` set on every node
+        """
+        comments = list(
+            Comment.objects.filter(post_id=post_id, is_approved=True, is_spam=False)
+            .select_related('user')
+            .order_by('created_at', 'id')
+        )
+        return cls.build_tree(comments)
+
+    @classmethod
+    def build_tree(cls, comments):
+        """
+        Links a flat, ordered list of comments into a tree and returns its roots
+        """
+        by_id = {comment.id: comment for comment in comments}
+        roots = []
+        for comment in comments:
+            comment.children = []
+        for comment in comments:
+            if comment.parent_id is None:
+                roots.append(comment)
+            elif comment.parent_id in by_id:
+                by_id[comment.parent_id].children.append(comment)
+        for comment in comments:
+            comment.replies_count = len(comment.children)
+        return roots
+
+    @classmethod
+    def invalidate(cls, post_id):
+        # After commit, so a concurrent reader cannot re-cache the old thread
+        key = cls._key(post_id)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def invalidate_many(cls, post_ids):
+        keys = [cls._key(post_id) for post_id in set(post_ids)]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def _serialize(cls, roots):
+        # Imported here, the models package imports this module from its signals
+        from web_apis.blog.serializers.engagement_serializers import CommentThreadSerializer
+        return CommentThreadSerializer(roots, many=True).data
+
+    @classmethod
+    def _key(cls, post_id):
+        return cls.CACHE_KEY.format(post_id=post_id)
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_COMMENT_THREAD_{name}', cls.DEFAULTS[name])
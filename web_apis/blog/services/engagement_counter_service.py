@@ -0,0 +1,82 @@
+# blog/services/engagement_counter_service.py
+
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.engagement_models import Comment, Like, PostReaction, Favorite
+
+logger = logging.getLogger(__name__)
+
+
+class EngagementCounterService:
+    """
+    Keeps the denormalized engagement counters on BlogPost current.
+
+    Signal handlers apply single-row F() increments and decrements in the same
+    transaction as the change that caused them, so listings read the counts
+    straight off the post. reconcile() recomputes the counters with one grouped
+    query per table, for drift from bulk updates, raw SQL or lost writes.
+    """
+    # counter column: (model, rows that count)
+    COUNTERS = {
+        'comment_count': (Comment, Q(is_approved=True, is_spam=False)),
+        'like_count': (Like, Q()),
+        'reaction_count': (PostReaction, Q()),
+        'favorite_count': (Favorite, Q()),
+    }
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def adjust(cls, post_id, counter, delta):
+        if not delta:
+            return
+        # Clamped at zero, a decrement for a row the counter never saw must not fail
+        BlogPost.objects.filter(pk=post_id).update(**{counter: Greatest(F(counter) + delta, 0)})
+
+    @staticmethod
+    def comment_counts(comment):
+        """
+        Whether a comment is included in comment_count
+        """
+        return comment.is_approved and not comment.is_spam
+
+    @classmethod
+    def reconcile(cls, post_ids=None):
+        """
+        Recomputes every counter (or those of post_ids) and writes the ones that drifted,
+        returns the number of posts corrected
+        """
+        posts = BlogPost.objects.all()
+        if post_ids is not None:
+            posts = posts.filter(pk__in=list(post_ids))
+
+        actual = {}
+        for counter, (model, condition) in cls.COUNTERS.items():
+            rows = model.objects.filter(condition)
+            if post_ids is not None:
+                rows = rows.filter(post_id__in=list(post_ids))
+            for post_id, count in rows.order_by().values('post_id').annotate(n=Count('id')).values_list('post_id', 'n'):
+                actual.setdefault(post_id, {})[counter] = count
+
+        counters = list(cls.COUNTERS)
+        changed = []
+        for post in posts.only('id', *counters).iterator(chunk_size=cls.BATCH_SIZE):
+            counts = actual.get(post.id, {})
+            dirty = False
+            for counter in counters:
+                value = counts.get(counter, 0)
+                if getattr(post, counter) != value:
+                    setattr(post, counter, value)
+                    dirty = True
+            if dirty:
+                changed.append(post)
+
+        with transaction.atomic():
+            BlogPost.objects.bulk_update(changed, counters, batch_size=cls.BATCH_SIZE)
+        if changed:
+            logger.info(f"Reconciled engagement counters on {len(changed)} posts")
+        return len(changed)
@@ -0,0 +1,164 @@
+# blog/services/event_queue_service.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EventQueueService:
+    """
+    In-process queue for analytics side-table rows (activity logs, notifications).
+    Signal handlers enqueue unsaved model instances and a background worker writes
+    them with bulk_create once a batch is full or its oldest event is old enough.
+    """
+    _queue = queue.Queue()
+    _worker = None
+    _lock = threading.Lock()
+    _listeners = defaultdict(list)
+    _writers = {}
+
+    @classmethod
+    def register_writer(cls, model, writer):
+        """
+        Writes queued rows of a model with writer(objs) instead of bulk_create,
+        inside the batch's transaction
+        """
+        cls._writers[model] = writer
+
+    @classmethod
+    def on_write(cls, model, callback):
+        """
+        Calls callback(objs) inside the transaction that inserted queued rows of a model,
+        bulk_create sends no post_save
+        """
+        if callback not in cls._listeners[model]:
+            cls._listeners[model].append(callback)
+
+    @classmethod
+    def enqueue(cls, obj):
+        """
+        Queues an unsaved model instance for a batched insert
+        """
+        if getattr(settings, 'BLOG_EVENT_QUEUE_SYNC', False):
+            cls._write([obj])
+            return
+        cls._ensure_worker()
+        cls._queue.put(obj)
+
+    @classmethod
+    def enqueue_on_commit(cls, obj):
+        """
+        Queues obj once the current transaction commits, nothing is queued on rollback
+        """
+        transaction.on_commit(lambda: cls.enqueue(obj))
+
+    @classmethod
+    def flush(cls):
+        """
+        Writes everything currently queued from the calling thread
+        """
+        batch = []
+        while True:
+            try:
+                item = cls._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        cls._write(batch)
+        return len(batch)
+
+    @classmethod
+    def shutdown(cls, timeout=10):
+        """
+        Stops the worker after it has drained the queue
+        """
+        worker = cls._worker
+        if worker is None or not worker.is_alive():
+            cls.flush()
+            return
+        cls._queue.put(_STOP)
+        worker.join(timeout)
+        if worker.is_alive():
+            logger.warning("Blog event worker did not drain in time, flushing inline")
+            cls.flush()
+
+    @classmethod
+    def _ensure_worker(cls):
+        if cls._worker is not None:
+            return
+        with cls._lock:
+            if cls._worker is None:
+                cls._worker = threading.Thread(
+                    target=cls._run,
+                    daemon=True,
+                    name="blog_event_queue"
+                )
+                cls._worker.start()
+                atexit.register(cls.shutdown)
+                logger.info("Blog event queue worker started")
+
+    @classmethod
+    def _run(cls):
+        batch_size = getattr(settings, 'BLOG_EVENT_BATCH_SIZE', 200)
+        max_age = getattr(settings, 'BLOG_EVENT_BATCH_MAX_AGE', 5.0)
+        stopping = False
+
+        while not stopping:
+            item = cls._queue.get()
+            if item is _STOP:
+                break
+
+            # Collect until the batch is full or the first event has waited max_age
+            batch = [item]
+            deadline = time.monotonic() + max_age
+            while len(batch) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = cls._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            cls._write(batch)
+            close_old_connections()
+
+    @classmethod
+    def _write(cls, batch):
+        if not batch:
+            return
+        batch_size = getattr(settings, 'BLOG_EVENT_BATCH_SIZE', 200)
+        by_model = defaultdict(list)
+        for obj in batch:
+            by_model[type(obj)].append(obj)
+
+        for model, objs in by_model.items():
+            try:
+                with transaction.atomic():
+                    if model in cls._writers:
+                        cls._writers[model](objs)
+                    else:
+                        model.objects.bulk_create(objs, batch_size=batch_size)
+                        for callback in cls._listeners.get(model, ()):
+                            callback(objs)
+            except Exception:
+                # Analytics rows are best effort; never let one bad batch kill the worker
+                logger.error(
+                    f"Failed to write {len(objs)} queued {model.__name__} rows",
+                    exc_info=True
+                )
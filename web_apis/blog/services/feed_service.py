@@ -0,0 +1,206 @@
+# blog/services/feed_service.py
+
+import io
+import math
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+
+from web_apis.blog.models.blog_models import BlogPost, Category, Tag
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class FeedService:
+    """
+    Renders the RSS/Atom feeds and XML sitemaps and caches them under a version stamp.
+
+    The stamp is read from the database, so every process agrees on it: the
+    latest updated_at of the posts, categories and tags with the number of
+    public posts and active terms, which a deletion or a scheduled post going
+    live changes. A new stamp retires every cached document at once, and it
+    doubles as the Last-Modified and ETag the feed views answer 304 with.
+    Documents are rendered by iterating over the needed columns only, so a
+    crawler costs the stamp's aggregates and a cache read unless something
+    changed.
+    """
+    CACHE_KEY = 'blog:feeds:{version}:{host}:{name}'
+    KINDS = {
+        'rss': feedgenerator.Rss201rev2Feed,
+        'atom': feedgenerator.Atom1Feed,
+    }
+    SCOPES = {
+        'category': (Category, 'categories'),
+        'tag': (Tag, 'tags'),
+    }
+    SITEMAP_SECTIONS = ('posts', 'categories', 'tags')
+    DEFAULTS = {
+        'SIZE': 50,
+        'SITEMAP_PAGE_SIZE': 10000,
+        'CACHE_TIMEOUT': 3600,
+        'TITLE': 'EvigDia Blog',
+        'DESCRIPTION': 'Latest posts from the EvigDia blog',
+    }
+    CHUNK_SIZE = 500
+
+    @classmethod
+    def version(cls):
+        """
+        (time of the last change, stamp) of everything a feed shows
+        """
+        changes = [
+            BlogPost.objects.aggregate(
+                changed=Max('updated_at'),
+                rows=Count('id', filter=Q(status=BlogPost.PostStatus.PUBLISHED, published_at__lte=timezone.now()))
+            ),
+            Category.objects.aggregate(changed=Max('updated_at'), rows=Count('id', filter=Q(is_active=True))),
+            Tag.objects.aggregate(changed=Max('updated_at'), rows=Count('id', filter=Q(is_active=True))),
+        ]
+        changed = max((change['changed'] for change in changes if change['changed']), default=EPOCH)
+        rows = '.'.join(str(change['rows']) for change in changes)
+        return changed, f'{changed.timestamp():.6f}-{rows}'
+
+    @staticmethod
+    def last_modified(version):
+        return version[0]
+
+    @staticmethod
+    def etag(version, name):
+        return f'"{version[1]}-{name}"'
+
+    @staticmethod
+    def touch(instance):
+        """
+        Moves the updated_at of a post, category or tag whose relations changed, which saving it does not do
+        """
+        type(instance).objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+
+    @classmethod
+    def feed(cls, version, kind, base_url, scope=None, slug=None):
+        """
+        RSS or Atom document of the latest public posts, site-wide or of one category or tag.
+        Returns None when the category or tag does not exist
+        """
+        name = f'feed:{kind}:{scope or "all"}:{slug or ""}'
+        return cls._cached(version, name, base_url, lambda: cls._render_feed(kind, base_url, scope, slug))
+
+    @classmethod
+    def sitemap_index(cls, version, base_url):
+        return cls._cached(version, 'sitemap:index', base_url, lambda: cls._render_sitemap_index(base_url))
+
+    @classmethod
+    def sitemap(cls, version, section, page, base_url):
+        """
+        One page of a sitemap section, None when the section or page does not exist
+        """
+        name = f'sitemap:{section}:{page}'
+        return cls._cached(version, name, base_url, lambda: cls._render_sitemap(section, page, base_url))
+
+    @classmethod
+    def _cached(cls, version, name, base_url, render):
+        key = cls.CACHE_KEY.format(version=version[1], host=base_url, name=name)
+        document = cache.get(key)
+        if document is None:
+            document = render()
+            if document is None:
+                return None
+            cache.set(key, document, timeout=cls._setting('CACHE_TIMEOUT'))
+        return document
+
+    @classmethod
+    def _public_posts(cls):
+        return BlogPost.objects.filter(
+            status=BlogPost.PostStatus.PUBLISHED,
+            published_at__lte=timezone.now()
+        )
+
+    @classmethod
+    def _render_feed(cls, kind, base_url, scope, slug):
+        posts = cls._public_posts()
+        title, link = cls._setting('TITLE'), base_url + reverse('post-list')
+        if scope is not None:
+            model, relation = cls.SCOPES[scope]
+            term = model.objects.filter(slug=slug, is_active=True).only('id', 'name').first()
+            if term is None:
+                return None
+            posts = posts.filter(**{relation: term})
+            title = f'{title}: {term.name}'
+            link = base_url + term.get_absolute_url()
+
+        generator = cls.KINDS[kind](
+            title=title,
+            link=link,
+            description=cls._setting('DESCRIPTION'),
+            language=settings.LANGUAGE_CODE,
+        )
+        posts = posts.select_related('author').only(
+            'id', 'title', 'slug', 'excerpt', 'published_at', 'updated_at',
+            'author__first_name', 'author__last_name'
+        ).order_by('-published_at', '-id')[:cls._setting('SIZE')]
+        for post in posts.iterator(chunk_size=cls.CHUNK_SIZE):
+            generator.add_item(
+                title=post.title,
+                link=base_url + post.get_absolute_url(),
+                description=post.excerpt,
+                author_name=post.author.get_full_name(),
+                pubdate=post.published_at,
+                updateddate=post.updated_at,
+                unique_id=str(post.id),
+            )
+        output = io.StringIO()
+        generator.write(output, 'utf-8')
+        return output.getvalue()
+
+    @classmethod
+    def _render_sitemap_index(cls, base_url):
+        page_size = cls._setting('SITEMAP_PAGE_SIZE')
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        ]
+        for section in cls.SITEMAP_SECTIONS:
+            pages = max(1, math.ceil(cls._sitemap_rows(section).count() / page_size))
+            for page in range(1, pages + 1):
+                path = reverse('blog-sitemap', kwargs={'section': section, 'page': page})
+                location = escape(base_url + path)
+                lines.append(f'<sitemap><loc>{location}</loc></sitemap>')
+        lines.append('</sitemapindex>')
+        return '\n'.join(lines)
+
+    @classmethod
+    def _render_sitemap(cls, section, page, base_url):
+        if section not in cls.SITEMAP_SECTIONS or page < 1:
+            return None
+        page_size = cls._setting('SITEMAP_PAGE_SIZE')
+        rows = cls._sitemap_rows(section)[(page - 1) * page_size:page * page_size]
+
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        ]
+        found = False
+        for obj in rows.iterator(chunk_size=cls.CHUNK_SIZE):
+            found = True
+            location = escape(base_url + obj.get_absolute_url())
+            lastmod = obj.updated_at.isoformat()
+            lines.append(f'<url><loc>{location}</loc><lastmod>{lastmod}</lastmod></url>')
+        if not found and page > 1:
+            return None
+        lines.append('</urlset>')
+        return '\n'.join(lines)
+
+    @classmethod
+    def _sitemap_rows(cls, section):
+        if section == 'posts':
+            return cls._public_posts().only('id', 'slug', 'updated_at').order_by('published_at', 'id')
+        model = Category if section == 'categories' else Tag
+        return model.objects.filter(is_active=True).only('id', 'updated_at').order_by('name')
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_FEED_{name}', cls.DEFAULTS[name])
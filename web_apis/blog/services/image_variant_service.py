@@ -0,0 +1,296 @@
+# blog/services/image_variant_service.py
+
+import json
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction, close_old_connections
+
+from web_apis.blog import images
+
+logger = logging.getLogger(__name__)
+
+
+class ImageVariantService:
+    """
+    Resized WebP/JPEG copies and a square thumbnail of uploaded images.
+
+    When an image field gets a new file, the original is read back once the
+    transaction commits and rendered in a process pool, Pillow is CPU bound
+    and would stall the request threads. The files are written next to the
+    original under variants/<sha256 of the original>/, with a manifest.json
+    listing them, so the same picture uploaded twice is only rendered once.
+    The manifest is also kept on the row (<field>_variants), which is all the
+    serializers need to build srcset URLs.
+    """
+    FIELDS = {
+        'blog.BlogPost': ('featured_image',),
+        'user_account.Profile': ('profile_image', 'cover_image'),
+        'evigdia_services.Service': ('service_image', 'sub_service_image'),
+    }
+    DEFAULTS = {
+        'WIDTHS': (320, 640, 960, 1280, 1920),
+        'FORMATS': ('webp', 'jpeg'),
+        'QUALITY': 80,
+        'THUMBNAIL_SIZE': 160,
+        # Width of the plain src URL listings use
+        'DEFAULT_WIDTH': 640,
+        'WORKERS': 2,
+        'SYNC': False,
+    }
+    VARIANTS_DIR = 'variants'
+    MANIFEST_NAME = 'manifest.json'
+    # Format of the src fallback, understood by every browser
+    FALLBACK_FORMAT = 'jpeg'
+
+    _pool = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def variants_field(field_name):
+        return f'{field_name}_variants'
+
+    @classmethod
+    def schedule(cls, instance, field_name):
+        """
+        Renders the variants of instance.<field_name> after commit if its file changed
+        """
+        source = getattr(instance, field_name).name or ''
+        variants_field = cls.variants_field(field_name)
+        manifest = getattr(instance, variants_field) or {}
+        if manifest.get('source', '') == source:
+            return
+
+        model, pk = type(instance), instance.pk
+        if not source:
+            # Image removed, the variants of the old file no longer apply
+            transaction.on_commit(lambda: model.objects.filter(pk=pk).update(**{variants_field: {}}))
+            return
+        transaction.on_commit(lambda: cls.submit(model, pk, field_name, source))
+
+    @classmethod
+    def submit(cls, model, pk, field_name, source):
+        """
+        Renders the variants of one stored image, in the pool unless BLOG_IMAGE_SYNC is set
+        """
+        try:
+            data, digest, manifest = cls._prepare(cls._storage(model, field_name), source)
+            if manifest is not None:
+                cls._save(model, pk, field_name, source, manifest)
+            elif cls._setting('SYNC'):
+                result = images.render_variants(data, *cls._options())
+                cls._save(model, pk, field_name, source, cls._store(source, digest, result))
+            else:
+                future = cls._executor().submit(images.render_variants, data, *cls._options())
+                future.add_done_callback(
+                    lambda future: cls._finish(future, model, pk, field_name, source, digest)
+                )
+        except Exception as e:
+            logger.error(f"Failed to render variants of {source}: {e}", exc_info=True)
+
+    @classmethod
+    def backfill(cls, force=False, batch_size=None):
+        """
+        Renders the variants of every stored image that has none (or all with force),
+        returns the number of images processed
+        """
+        batch_size = batch_size or cls._setting('WORKERS') * 4
+        processed = 0
+        for label, field_names in cls.FIELDS.items():
+            model = apps.get_model(label)
+            for field_name in field_names:
+                variants_field = cls.variants_field(field_name)
+                rows = (
+                    model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+                    .order_by('pk').values_list('pk', field_name, variants_field)
+                )
+                batch = []
+                for pk, source, manifest in rows.iterator(chunk_size=500):
+                    if not force and (manifest or {}).get('source') == source:
+                        continue
+                    batch.append((pk, source))
+                    if len(batch) >= batch_size:
+                        processed += cls._render_batch(model, field_name, batch, force)
+                        batch = []
+                processed += cls._render_batch(model, field_name, batch, force)
+        if processed:
+            logger.info(f"Rendered variants of {processed} images")
+        return processed
+
+    @classmethod
+    def urls(cls, manifest, request=None):
+        """
+        {'src', 'srcset': {format: 'url 320w, ...'}, 'thumbnail', 'width', 'height'}
+        for a manifest, None while the variants are not rendered yet
+        """
+        if not manifest:
+            return None
+
+        def url(name):
+            location = default_storage.url(name)
+            return request.build_absolute_uri(location) if request is not None else location
+
+        files = manifest['files']
+        fallback = files.get(cls.FALLBACK_FORMAT) or next(iter(files.values()))
+        default_width = cls._setting('DEFAULT_WIDTH')
+        src = next((name for width, name in reversed(fallback) if width <= default_width), fallback[0][1])
+        return {
+            'src': url(src),
+            'srcset': {
+                kind: ', '.join(f'{url(name)} {width}w' for width, name in variants)
+                for kind, variants in files.items()
+            },
+            'thumbnail': url(manifest['thumbnail']),
+            'width': manifest['width'],
+            'height': manifest['height'],
+        }
+
+    @classmethod
+    def src(cls, manifest, request=None):
+        """
+        URL of the variant listings should show, None while the variants are not rendered yet
+        """
+        urls = cls.urls(manifest, request)
+        return urls['src'] if urls else None
+
+    @classmethod
+    def _render_batch(cls, model, field_name, batch, force):
+        pending = []
+        processed = 0
+        for pk, source in batch:
+            try:
+                data, digest, manifest = cls._prepare(
+                    cls._storage(model, field_name), source, reuse=not force
+                )
+                if manifest is not None:
+                    cls._save(model, pk, field_name, source, manifest)
+                    processed += 1
+                else:
+                    pending.append((pk, source, digest, cls._render(data)))
+            except Exception as e:
+                logger.error(f"Failed to render variants of {source}: {e}", exc_info=True)
+
+        for pk, source, digest, future in pending:
+            try:
+                cls._save(model, pk, field_name, source, cls._store(source, digest, future.result()))
+                processed += 1
+            except Exception as e:
+                logger.error(f"Failed to render variants of {source}: {e}", exc_info=True)
+        return processed
+
+    @classmethod
+    def _render(cls, data):
+        if not cls._setting('SYNC'):
+            return cls._executor().submit(images.render_variants, data, *cls._options())
+        future = Future()
+        try:
+            future.set_result(images.render_variants(data, *cls._options()))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    @classmethod
+    def _finish(cls, future, model, pk, field_name, source, digest):
+        # Runs on the pool's result thread
+        try:
+            cls._save(model, pk, field_name, source, cls._store(source, digest, future.result()))
+        except Exception as e:
+            logger.error(f"Failed to render variants of {source}: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def _prepare(cls, storage, source, reuse=True):
+        """
+        (original bytes, content hash, manifest of an earlier render of the same bytes or None)
+        """
+        with storage.open(source, 'rb') as original:
+            data = original.read()
+        digest = images.content_hash(data)
+        if not reuse:
+            return data, digest, None
+
+        manifest_name = posixpath.join(cls._directory(source, digest), cls.MANIFEST_NAME)
+        if not default_storage.exists(manifest_name):
+            return data, digest, None
+        with default_storage.open(manifest_name, 'rb') as stored:
+            return data, digest, json.loads(stored.read())
+
+    @classmethod
+    def _store(cls, source, digest, result):
+        directory = cls._directory(source, digest)
+        files = {}
+        for kind, width, extension, data in result['files']:
+            name = cls._replace(f'{directory}/{kind}-{width}.{extension}', data)
+            if kind == 'thumbnail':
+                thumbnail = name
+            else:
+                files.setdefault(kind, []).append([width, name])
+
+        manifest = {
+            'hash': digest,
+            'width': result['width'],
+            'height': result['height'],
+            'files': files,
+            'thumbnail': thumbnail,
+        }
+        # Written last, its presence means the directory is complete
+        cls._replace(posixpath.join(directory, cls.MANIFEST_NAME), json.dumps(manifest).encode())
+        return manifest
+
+    @staticmethod
+    def _replace(name, data):
+        # Storage would pick a new name rather than overwrite a forced re-render
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        return default_storage.save(name, ContentFile(data))
+
+    @classmethod
+    def _save(cls, model, pk, field_name, source, manifest):
+        # Matching on the file name drops the result if the image was replaced meanwhile
+        model.objects.filter(pk=pk, **{field_name: source}).update(
+            **{cls.variants_field(field_name): {**manifest, 'source': source}}
+        )
+
+    @staticmethod
+    def _storage(model, field_name):
+        # Originals live in their field's storage (BlobStorage), variants in default_storage
+        return model._meta.get_field(field_name).storage
+
+    @classmethod
+    def _directory(cls, source, digest):
+        return posixpath.join(posixpath.dirname(source), cls.VARIANTS_DIR, digest)
+
+    @classmethod
+    def _options(cls):
+        return (
+            tuple(cls._setting('WIDTHS')),
+            tuple(cls._setting('FORMATS')),
+            cls._setting('QUALITY'),
+            cls._setting('THUMBNAIL_SIZE'),
+        )
+
+    @classmethod
+    def _executor(cls):
+        if cls._pool is not None:
+            return cls._pool
+        with cls._lock:
+            if cls._pool is None:
+                # Spawned, forking a process that runs request threads is not safe
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=cls._setting('WORKERS'),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info("Image variant pool started")
+        return cls._pool
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_IMAGE_{name}', cls.DEFAULTS[name])
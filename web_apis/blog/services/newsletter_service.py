@@ -0,0 +1,333 @@
+# blog/services/newsletter_service.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction, close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.html import escape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.subscription_models import Subscription, NewsletterRun, NewsletterBatch
+
+logger = logging.getLogger(__name__)
+
+
+class NewsletterService:
+    """
+    Sends a published post to the confirmed, active subscribers whose category
+    preferences match it.
+
+    Publishing a post only queues a NewsletterRun; the send_newsletters worker
+    claims it, splits the audience into batches of BATCH_SIZE subscribers that
+    share a template variant, renders each variant once and posts the batches
+    through a pool of WORKERS threads on one pooled HTTP session. A batch is
+    one API call, the recipient specific parts (the unsubscribe link) travel
+    as message parameters. A batch is only sent again when the API cannot have
+    accepted it (a refused connection or a 429): the session retries those, and
+    the next pass retries the batch, up to MAX_ATTEMPTS. A 5xx or a timeout
+    after the request went out may still have mailed everyone in it, so such a
+    batch fails without an automatic resend (send_newsletters --retry-failed
+    resends on purpose). Progress is counted on the run as batches finish, and
+    a run whose worker died is resumed from its unsent batches.
+    """
+    VARIANTS = ('html', 'text')
+    DEFAULTS = {
+        'AUTO_SEND': True,
+        'API_URL': 'https://api.brevo.com/v3/smtp/email',
+        'WORKERS': 8,
+        'BATCH_SIZE': 500,
+        'MAX_ATTEMPTS': 3,
+        'TIMEOUT': 30,
+        'POLL_INTERVAL': 30,
+        # A running run not updated for this long is considered abandoned
+        'STALE_AFTER': 600,
+    }
+    # Sending is not idempotent, only responses that reject the whole request are retried
+    RETRY_STATUSES = (429,)
+
+    @classmethod
+    def queue(cls, post_id):
+        """
+        Queues the newsletter of a post once the surrounding transaction commits, at most once per post
+        """
+        if not cls._setting('AUTO_SEND'):
+            return
+
+        def create():
+            try:
+                NewsletterRun.objects.get_or_create(post_id=post_id)
+            except IntegrityError:
+                # Queued concurrently by another process
+                pass
+        transaction.on_commit(create)
+
+    @classmethod
+    def audience(cls, post):
+        """
+        (id, preferences) of the confirmed, active subscribers without a category preference
+        or with one of the post's categories, in id order
+        """
+        slugs = set(post.categories.values_list('slug', flat=True))
+        # Preferences are matched here rather than with JSON lookups, which not every backend supports
+        rows = Subscription.objects.filter(is_active=True, is_confirmed=True).order_by('id')
+        for subscription_id, preferences in rows.values_list('id', 'preferences').iterator(chunk_size=2000):
+            categories = (preferences or {}).get('categories')
+            if not categories or slugs.intersection(categories):
+                yield subscription_id, preferences
+
+    @staticmethod
+    def variant(preferences):
+        return 'text' if (preferences or {}).get('format') == 'text' else 'html'
+
+    @classmethod
+    def run_pending(cls):
+        """
+        Processes queued (and abandoned) runs until none is left, returns the number processed
+        """
+        processed = 0
+        while True:
+            run = cls._claim()
+            if run is None:
+                return processed
+            try:
+                cls.process(run)
+            except Exception as e:
+                logger.error(f"Newsletter run {run.pk} failed: {e}", exc_info=True)
+                NewsletterRun.objects.filter(pk=run.pk).update(
+                    status=NewsletterRun.Status.FAILED, last_error=str(e)[:1000], finished_at=timezone.now()
+                )
+            processed += 1
+
+    @classmethod
+    def run_forever(cls, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                cls.run_pending()
+            except Exception:
+                logger.error("Failed to process newsletter runs", exc_info=True)
+            finally:
+                close_old_connections()
+            stop.wait(cls._setting('POLL_INTERVAL'))
+
+    @classmethod
+    def process(cls, run):
+        """
+        Sends every unsent batch of a claimed run
+        """
+        post = BlogPost.objects.get(pk=run.post_id)
+        if not run.batches.exists():
+            cls._plan(run, post)
+        contents = {variant: cls._render(post, variant) for variant in cls.VARIANTS}
+
+        with cls._session() as session, ThreadPoolExecutor(
+            max_workers=cls._setting('WORKERS'), thread_name_prefix='blog_newsletter'
+        ) as pool:
+            for attempt in range(cls._setting('MAX_ATTEMPTS')):
+                pending = list(
+                    run.batches.filter(status=NewsletterBatch.Status.PENDING).values_list('pk', flat=True)
+                )
+                if not pending:
+                    break
+                if attempt:
+                    time.sleep(2 ** attempt)
+                list(pool.map(lambda batch_id: cls._send_batch(session, batch_id, contents), pending))
+
+        failed = run.batches.exclude(status=NewsletterBatch.Status.SENT).exists()
+        NewsletterRun.objects.filter(pk=run.pk).update(
+            status=NewsletterRun.Status.FAILED if failed else NewsletterRun.Status.COMPLETED,
+            finished_at=timezone.now()
+        )
+        run.refresh_from_db()
+        logger.info(
+            f"Newsletter for post {run.post_id}: {run.sent_count} sent, {run.failed_count} failed "
+            f"of {run.total_recipients}"
+        )
+        return run
+
+    @classmethod
+    def retry(cls, run):
+        """
+        Queues the failed batches of a run again, the worker only resends those
+        """
+        with transaction.atomic():
+            failed = run.batches.select_for_update().filter(status=NewsletterBatch.Status.FAILED)
+            planned = sum(len(ids) for ids in failed.values_list('subscription_ids', flat=True))
+            failed.update(status=NewsletterBatch.Status.PENDING, attempts=0)
+            NewsletterRun.objects.filter(pk=run.pk).update(
+                status=NewsletterRun.Status.PENDING,
+                failed_count=F('failed_count') - planned,
+                finished_at=None,
+                updated_at=timezone.now()
+            )
+
+    @classmethod
+    def _claim(cls):
+        now = timezone.now()
+        stale = now - timedelta(seconds=cls._setting('STALE_AFTER'))
+        with transaction.atomic():
+            run = NewsletterRun.objects.select_for_update(skip_locked=True).filter(
+                Q(status=NewsletterRun.Status.PENDING) |
+                Q(status=NewsletterRun.Status.RUNNING, updated_at__lt=stale),
+                post__status=BlogPost.PostStatus.PUBLISHED,
+                post__published_at__lte=now
+            ).order_by('created_at').first()
+            if run is None:
+                return None
+            run.status = NewsletterRun.Status.RUNNING
+            run.started_at = run.started_at or now
+            run.save(update_fields=['status', 'started_at', 'updated_at'])
+        return run
+
+    @classmethod
+    def _plan(cls, run, post):
+        """
+        Splits the audience into batches of one variant each, in subscription order
+        """
+        batch_size = cls._setting('BATCH_SIZE')
+        groups = {variant: [] for variant in cls.VARIANTS}
+        batches = []
+        for subscription_id, preferences in cls.audience(post):
+            group = groups[cls.variant(preferences)]
+            group.append(str(subscription_id))
+            if len(group) >= batch_size:
+                batches.append((cls.variant(preferences), list(group)))
+                group.clear()
+        batches.extend((variant, group) for variant, group in groups.items() if group)
+
+        with transaction.atomic():
+            NewsletterBatch.objects.bulk_create([
+                NewsletterBatch(run=run, number=number, variant=variant, subscription_ids=ids)
+                for number, (variant, ids) in enumerate(batches, start=1)
+            ], batch_size=1000)
+            total = sum(len(ids) for _, ids in batches)
+            NewsletterRun.objects.filter(pk=run.pk).update(total_recipients=total)
+        run.total_recipients = total
+
+    @classmethod
+    def _send_batch(cls, session, batch_id, contents):
+        try:
+            batch = NewsletterBatch.objects.get(pk=batch_id)
+            # Anyone who unsubscribed since planning is skipped
+            recipients = list(Subscription.objects.filter(
+                pk__in=batch.subscription_ids, is_active=True, is_confirmed=True
+            ).values_list('email', 'token'))
+            skipped = len(batch.subscription_ids) - len(recipients)
+
+            error, retryable = '', False
+            if recipients:
+                payload = {
+                    **contents[batch.variant],
+                    'messageVersions': [
+                        {'to': [{'email': email}], 'params': {'unsubscribe_url': cls._unsubscribe_url(token)}}
+                        for email, token in recipients
+                    ],
+                }
+                try:
+                    response = session.post(cls._setting('API_URL'), json=payload, timeout=cls._setting('TIMEOUT'))
+                    if response.status_code >= 300:
+                        error = f"HTTP {response.status_code}: {response.text[:500]}"
+                        retryable = response.status_code in cls.RETRY_STATUSES
+                except requests.ConnectTimeout as e:
+                    # Never connected, nothing was sent
+                    error, retryable = str(e), True
+                except requests.RequestException as e:
+                    error = str(e)
+
+            now = timezone.now()
+            if not error:
+                NewsletterBatch.objects.filter(pk=batch.pk).update(
+                    status=NewsletterBatch.Status.SENT, attempts=F('attempts') + 1, sent_at=now, last_error=''
+                )
+                NewsletterRun.objects.filter(pk=batch.run_id).update(
+                    sent_count=F('sent_count') + len(recipients),
+                    total_recipients=F('total_recipients') - skipped,
+                    updated_at=now
+                )
+                return
+
+            logger.warning(f"Newsletter batch {batch.number} of run {batch.run_id} failed: {error}")
+            exhausted = not retryable or batch.attempts + 1 >= cls._setting('MAX_ATTEMPTS')
+            NewsletterBatch.objects.filter(pk=batch.pk).update(
+                status=NewsletterBatch.Status.FAILED if exhausted else NewsletterBatch.Status.PENDING,
+                attempts=F('attempts') + 1,
+                last_error=error
+            )
+            # A failed batch counts as planned, retry() takes it back out
+            NewsletterRun.objects.filter(pk=batch.run_id).update(
+                failed_count=F('failed_count') + (len(batch.subscription_ids) if exhausted else 0),
+                last_error=error,
+                updated_at=now
+            )
+        finally:
+            # Pool threads would otherwise keep a connection each
+            connection.close()
+
+    @classmethod
+    def _render(cls, post, variant):
+        """
+        Sender, subject and body of a variant, {{params.unsubscribe_url}} is filled in per recipient
+        """
+        url = f"{settings.FRONTEND_URL}{post.get_absolute_url()}"
+        message = {
+            'sender': {
+                'name': settings.EMAIL_SENDER_NAME,
+                'email': settings.EMAIL_SENDER_EMAIL
+            },
+            'subject': post.title,
+        }
+        if variant == 'text':
+            message['textContent'] = (
+                f"{post.title}\n\n{post.excerpt}\n\nRead the full post: {url}\n\n"
+                "Unsubscribe: {{params.unsubscribe_url}}\n"
+            )
+        else:
+            message['htmlContent'] = f"""
+                <h2>{escape(post.title)}</h2>
+                <p>{escape(post.excerpt)}</p>
+                <p><a href="{escape(url)}">Read the full post</a></p>
+                <p style="font-size: 12px;"><a href="{{{{params.unsubscribe_url}}}}">Unsubscribe</a></p>
+            """
+        return message
+
+    @staticmethod
+    def _unsubscribe_url(token):
+        return f"{settings.FRONTEND_URL}/newsletter/unsubscribe?token={token}"
+
+    @classmethod
+    def _session(cls):
+        # Connection attempts never reached the API; a read error or a 5xx may come after it accepted the batch
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=0,
+            other=0,
+            backoff_factor=0.5,
+            status_forcelist=cls.RETRY_STATUSES,
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls._setting('WORKERS'), max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'accept': 'application/json',
+            'api-key': settings.BREVO_API_KEY or '',
+            'content-type': 'application/json'
+        })
+        return session
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_NEWSLETTER_{name}', cls.DEFAULTS[name])
@@ -0,0 +1,135 @@
+# blog/services/notification_digest_service.py
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from web_apis.blog.models.notification_models import AdminNotification
+from web_apis.blog.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDigestService:
+    """
+    Coalesces high-volume admin notifications into one row per group and window.
+
+    Views, comments, reactions, favorites and shares of a post are grouped by
+    (notification type, post) in tumbling windows of WINDOW seconds. Windows
+    and last_event_at come from each notification's created_at, which is set
+    when the signal handler builds it, so queueing delay never moves an event
+    into a later window. The first event of a window inserts the row, later
+    ones bump its count and replace title, message, related object and
+    metadata with the latest event's, so the row always shows a recent sample.
+    A window closes by time alone: the next event after it starts a new row,
+    nothing has to be flushed.
+
+    EventQueueService hands every queued batch to write(), which merges the
+    batch in memory first, so a batch costs one UPDATE per distinct group and
+    inserts grow with distinct groups per window instead of with traffic. A
+    read row that gets new events is marked unread again. A unique constraint
+    on (group_key, window_start) keeps concurrent workers on the same row.
+    WINDOW = 0 writes one row per event, as before.
+    """
+    TYPES = {
+        AdminNotification.NotificationType.POST_VIEW,
+        AdminNotification.NotificationType.COMMENT,
+        AdminNotification.NotificationType.REACTION,
+        AdminNotification.NotificationType.FAVORITE,
+        AdminNotification.NotificationType.SHARE,
+    }
+    SAMPLE_FIELDS = ('title', 'message', 'related_object_id', 'related_content_type', 'metadata')
+    DEFAULTS = {
+        'WINDOW': 900,
+    }
+
+    @classmethod
+    def record(cls, notification):
+        """
+        Writes one notification right away, returns the row it ended up in
+        """
+        cls.write([notification])
+        if notification.pk and not notification._state.adding:
+            return notification
+        return AdminNotification.objects.get(group_key=notification.group_key, window_start=notification.window_start)
+
+    @classmethod
+    def write(cls, notifications):
+        """
+        Inserts or merges a batch of unsaved admin notifications, oldest first
+        """
+        window = cls._setting('WINDOW')
+        singles = []
+        groups = {}
+        for notification in notifications:
+            if window <= 0 or notification.notification_type not in cls.TYPES:
+                singles.append(notification)
+                continue
+            key = (cls.group_key(notification), cls.window_start(notification.created_at, window))
+            first_event_at, latest, count = groups.get(key, (notification.created_at, notification, 0))
+            if notification.created_at >= latest.created_at:
+                latest = notification
+            groups[key] = (min(first_event_at, notification.created_at), latest, count + 1)
+
+        with transaction.atomic():
+            if singles:
+                AdminNotification.objects.bulk_create(singles)
+                NotificationService.created(singles)
+            if groups:
+                reopened = []
+                for (key, window_start), (first_event_at, latest, count) in groups.items():
+                    if cls._merge(key, window_start, first_event_at, latest, count):
+                        reopened.append(latest)
+                # Inserted rows are counted by post_save, reopened ones here
+                NotificationService.created(reopened)
+
+    @staticmethod
+    def group_key(notification):
+        post_id = (notification.metadata or {}).get('post_id') or notification.related_object_id
+        return f"{notification.notification_type}:{post_id}"
+
+    @staticmethod
+    def window_start(moment, window):
+        seconds = int(moment.timestamp()) // window * window
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    @classmethod
+    def _merge(cls, key, window_start, first_event_at, latest, count):
+        """
+        Adds `count` events, the first at first_event_at and the last being `latest`, to the
+        group's row of the window, creating it if needed; returns True when a read row became unread
+        """
+        last_event_at = latest.created_at
+        latest.group_key = key
+        latest.window_start = window_start
+        sample = {field: getattr(latest, field) for field in cls.SAMPLE_FIELDS}
+        rows = AdminNotification.objects.filter(group_key=key, window_start=window_start)
+        changes = dict(
+            sample,
+            count=F('count') + count,
+            last_event_at=Greatest('last_event_at', Value(last_event_at))
+        )
+
+        if rows.filter(is_read=False).update(**changes):
+            return False
+        if rows.filter(is_read=True).update(is_read=False, **changes):
+            return True
+
+        latest.count = count
+        latest.created_at = first_event_at
+        latest.last_event_at = last_event_at
+        try:
+            with transaction.atomic():
+                latest.save(force_insert=True)
+        except IntegrityError:
+            # Another worker opened the window first
+            rows.update(**changes)
+        return False
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_ADMIN_NOTIFICATION_{name}', cls.DEFAULTS[name])
@@ -0,0 +1,175 @@
+# blog/services/notification_service.py
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from web_apis.blog.models.notification_models import Notification, AdminNotification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationService:
+    """
+    Unread counters and read state of user and admin notifications.
+
+    The unread badge is a cached counter per user (one shared counter for the
+    admin inbox). A miss is filled with one COUNT served by the
+    (user, is_read, created_at) index; afterwards inserts increment it and
+    marking as read decrements it by the number of rows the UPDATE changed,
+    after commit. Counters are never created by incr/decr, so a missing one
+    just means the next read recounts; the timeout bounds the drift a
+    recount racing an insert can leave. Saves and deletes that bypass these
+    methods drop the counter (see signals). The counters need a cache every
+    process shares; with a per-process one (LocMem, the default without
+    REDIS_URL) each read is the COUNT instead, unless
+    BLOG_NOTIFICATION_CACHE_COUNTERS says otherwise.
+
+    Marking as read is always one UPDATE, whether it is a single
+    notification, everything, or everything created up to a timestamp.
+    """
+    USER_KEY = 'blog:notifications:unread:{user_id}'
+    ADMIN_KEY = 'blog:notifications:admin:unread'
+    DEFAULTS = {
+        'CACHE_TIMEOUT': 3600,
+        # None: cache them when the default cache is shared between processes
+        'CACHE_COUNTERS': None,
+    }
+    PROCESS_LOCAL_CACHES = (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    )
+
+    @classmethod
+    def unread_count(cls, user_id):
+        if not cls._counters_cached():
+            return Notification.objects.filter(user_id=user_id, is_read=False).count()
+        key = cls.USER_KEY.format(user_id=user_id)
+        count = cache.get(key)
+        if count is None:
+            count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+            cache.add(key, count, timeout=cls._setting('CACHE_TIMEOUT'))
+        return max(count, 0)
+
+    @classmethod
+    def admin_unread_count(cls):
+        if not cls._counters_cached():
+            return AdminNotification.objects.filter(is_read=False).count()
+        count = cache.get(cls.ADMIN_KEY)
+        if count is None:
+            count = AdminNotification.objects.filter(is_read=False).count()
+            cache.add(cls.ADMIN_KEY, count, timeout=cls._setting('CACHE_TIMEOUT'))
+        return max(count, 0)
+
+    @classmethod
+    def mark_read(cls, user_id, notification_id):
+        """
+        Marks one of the user's notifications as read, returns whether it was unread
+        """
+        updated = Notification.objects.filter(
+            pk=notification_id, user_id=user_id, is_read=False
+        ).update(is_read=True)
+        cls._adjust(cls.USER_KEY.format(user_id=user_id), -updated)
+        return bool(updated)
+
+    @classmethod
+    def mark_all_read(cls, user_id, until=None):
+        """
+        Marks the user's notifications created up to `until` (default: all) as read,
+        returns the number changed
+        """
+        queryset = Notification.objects.filter(user_id=user_id, is_read=False)
+        if until is not None:
+            queryset = queryset.filter(created_at__lte=until)
+        updated = queryset.update(is_read=True)
+        key = cls.USER_KEY.format(user_id=user_id)
+        if until is None and cls._counters_cached():
+            transaction.on_commit(lambda: cache.set(key, 0, timeout=cls._setting('CACHE_TIMEOUT')))
+        else:
+            cls._adjust(key, -updated)
+        return updated
+
+    @classmethod
+    def admin_mark_read(cls, notification_id):
+        updated = AdminNotification.objects.filter(pk=notification_id, is_read=False).update(is_read=True)
+        cls._adjust(cls.ADMIN_KEY, -updated)
+        return bool(updated)
+
+    @classmethod
+    def admin_mark_all_read(cls, until=None):
+        queryset = AdminNotification.objects.filter(is_read=False)
+        if until is not None:
+            queryset = queryset.filter(created_at__lte=until)
+        updated = queryset.update(is_read=True)
+        if until is None and cls._counters_cached():
+            transaction.on_commit(lambda: cache.set(cls.ADMIN_KEY, 0, timeout=cls._setting('CACHE_TIMEOUT')))
+        else:
+            cls._adjust(cls.ADMIN_KEY, -updated)
+        return updated
+
+    @classmethod
+    def created(cls, notifications):
+        """
+        Counts newly inserted unread notifications, e.g. after a bulk_create
+        """
+        per_key = {}
+        for notification in notifications:
+            if notification.is_read:
+                continue
+            if isinstance(notification, AdminNotification):
+                key = cls.ADMIN_KEY
+            elif notification.user_id is not None:
+                key = cls.USER_KEY.format(user_id=notification.user_id)
+            else:
+                continue
+            per_key[key] = per_key.get(key, 0) + 1
+        for key, count in per_key.items():
+            cls._adjust(key, count)
+
+    @classmethod
+    def invalidate(cls, notification):
+        """
+        Drops the counter a notification belongs to, for changes made outside this service
+        """
+        if isinstance(notification, AdminNotification):
+            cls.invalidate_admin()
+        else:
+            cls.invalidate_users([notification.user_id])
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        keys = [cls.USER_KEY.format(user_id=user_id) for user_id in set(user_ids) if user_id is not None]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def invalidate_admin(cls):
+        transaction.on_commit(lambda: cache.delete(cls.ADMIN_KEY))
+
+    @classmethod
+    def _adjust(cls, key, delta):
+        def apply():
+            try:
+                if delta > 0:
+                    cache.incr(key, delta)
+                else:
+                    cache.decr(key, -delta)
+            except ValueError:
+                # Not cached, the next read counts
+                pass
+        if delta and cls._counters_cached():
+            transaction.on_commit(apply)
+
+    @classmethod
+    def _counters_cached(cls):
+        cached = cls._setting('CACHE_COUNTERS')
+        if cached is None:
+            # A per-process cache never sees the other processes' inserts and reads
+            cached = settings.CACHES['default']['BACKEND'] not in cls.PROCESS_LOCAL_CACHES
+        return cached
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_NOTIFICATION_{name}', cls.DEFAULTS[name])
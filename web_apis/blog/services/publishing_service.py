@@ -0,0 +1,196 @@
+# blog/services/publishing_service.py
+
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.notification_models import Notification
+from web_apis.blog.services.event_queue_service import EventQueueService
+from web_apis.blog.services.newsletter_service import NewsletterService
+from web_apis.blog.services.related_posts_service import RelatedPostsService
+from web_apis.blog.services.revision_service import RevisionService
+
+logger = logging.getLogger(__name__)
+
+
+class PublishingService:
+    """
+    Publishes SCHEDULED posts once their scheduled_at has passed.
+
+    publish_due() claims every due post with SELECT ... FOR UPDATE SKIP LOCKED
+    (so any number of workers can run) and flips them in one UPDATE, keeping
+    scheduled_at as published_at. The side effects a single publish has
+    (revision, related posts, author notification) are then applied in bulk.
+
+    The scheduler runs only in the publish_scheduled worker, never in web
+    processes. It keeps a heap of upcoming due times and sleeps until the
+    earliest one instead of polling. Scheduling a post calls notify(), which on
+    PostgreSQL sends a NOTIFY on CHANNEL once the transaction commits; the
+    worker LISTENs on its own connection and rebuilds the heap from the
+    (status, scheduled_at) index when woken. The heap is also rebuilt every
+    RESCAN_INTERVAL seconds as a safety net. Overdue posts are published on
+    start, so nothing is lost across restarts.
+    """
+    DEFAULTS = {
+        'RESCAN_INTERVAL': 300,
+        'BATCH_SIZE': 500,
+    }
+    CHANNEL = 'blog_post_scheduled'
+    MIN_SLEEP = 1
+    LISTEN_TIMEOUT = 5
+
+    _heap = []
+    _wakeup = threading.Event()
+    _running = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def publish_due(cls, now=None):
+        """
+        Publishes every post due by now, returns the number published
+        """
+        now = now or timezone.now()
+        published = 0
+        while True:
+            count = cls._publish_batch(now)
+            published += count
+            if count < cls._setting('BATCH_SIZE'):
+                break
+        if published:
+            logger.info(f"Published {published} scheduled posts")
+        return published
+
+    @classmethod
+    def notify(cls):
+        """
+        Wakes the scheduler to pick up a newly scheduled post once the current
+        transaction commits. Without PostgreSQL only a scheduler running in this
+        process can be woken, others see the post at their next rescan.
+        """
+        transaction.on_commit(cls._wake)
+
+    @classmethod
+    def _wake(cls):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, '')", [cls.CHANNEL])
+        elif cls._running:
+            cls._wakeup.set()
+
+    @classmethod
+    def run_forever(cls, stop=None):
+        """
+        Publishes due posts, then sleeps until the next one is due, a post is
+        scheduled or the heap is rescanned
+        """
+        stop = stop or threading.Event()
+        cls._running = True
+        if connection.vendor == 'postgresql':
+            threading.Thread(target=cls._listen, args=(stop,), daemon=True, name="blog_publishing_listener").start()
+        try:
+            cls._loop(stop)
+        finally:
+            cls._running = False
+
+    @classmethod
+    def _loop(cls, stop):
+        while not stop.is_set():
+            try:
+                cls.publish_due()
+                cls._rescan()
+            except Exception:
+                logger.error("Failed to publish scheduled posts", exc_info=True)
+            finally:
+                close_old_connections()
+
+            rescan_at = timezone.now() + timedelta(seconds=cls._setting('RESCAN_INTERVAL'))
+            with cls._lock:
+                due_at = cls._heap[0] if cls._heap else None
+            wake_at = min(due_at, rescan_at) if due_at else rescan_at
+            # At least MIN_SLEEP, a post that keeps failing must not spin the loop
+            timeout = max((wake_at - timezone.now()).total_seconds(), cls.MIN_SLEEP)
+            # Due, rescan time or woken by a newly scheduled post: publish and rebuild the heap
+            if cls._wakeup.wait(timeout):
+                cls._wakeup.clear()
+
+    @classmethod
+    def _listen(cls, stop):
+        """
+        Turns every NOTIFY on CHANNEL into a wakeup, on a connection of its own
+        """
+        while not stop.is_set():
+            listener = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                listener.ensure_connection()
+                listener.set_autocommit(True)
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {cls.CHANNEL}")
+                # Whatever was scheduled while nobody listened is found by the rescan this triggers
+                cls._wakeup.set()
+                while not stop.is_set():
+                    for _ in listener.connection.notifies(timeout=cls.LISTEN_TIMEOUT):
+                        cls._wakeup.set()
+            except Exception:
+                logger.error("Scheduled post listener failed, reconnecting", exc_info=True)
+                stop.wait(cls.LISTEN_TIMEOUT)
+            finally:
+                listener.close()
+
+    @classmethod
+    def _rescan(cls):
+        due_times = BlogPost.objects.filter(
+            status=BlogPost.PostStatus.SCHEDULED, scheduled_at__isnull=False
+        ).order_by('scheduled_at').values_list('scheduled_at', flat=True)
+        heap = list(due_times)
+        heapq.heapify(heap)
+        with cls._lock:
+            cls._heap = heap
+
+    @classmethod
+    def _publish_batch(cls, now):
+        with transaction.atomic():
+            due = BlogPost.objects.select_for_update(skip_locked=True).filter(
+                status=BlogPost.PostStatus.SCHEDULED, scheduled_at__lte=now
+            ).order_by('scheduled_at')
+            post_ids = list(due.values_list('id', flat=True)[:cls._setting('BATCH_SIZE')])
+            if not post_ids:
+                return 0
+            BlogPost.objects.filter(id__in=post_ids).update(
+                status=BlogPost.PostStatus.PUBLISHED,
+                published_at=F('scheduled_at'),
+                updated_at=now
+            )
+            cls._after_publish(post_ids)
+        return len(post_ids)
+
+    @classmethod
+    def _after_publish(cls, post_ids):
+        """
+        What post_save and BlogPostService.publish_post would have done for each post
+        """
+        posts = list(BlogPost.objects.filter(id__in=post_ids).only(
+            'id', 'author', 'title', 'slug', 'content', 'excerpt'
+        ))
+        RevisionService.create_many(posts, "Scheduled post published")
+
+        for post in posts:
+            RelatedPostsService.schedule_update(post.id)
+            NewsletterService.queue(post.id)
+            transaction.on_commit(lambda post=post: EventQueueService.enqueue(Notification(
+                user_id=post.author_id,
+                notification_type=Notification.NotificationType.POST_UPDATE,
+                message=f"Your scheduled post '{post.title}' has been published",
+                target_url=post.get_absolute_url(),
+                related_post_id=post.id
+            )))
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_PUBLISHING_{name}', cls.DEFAULTS[name])
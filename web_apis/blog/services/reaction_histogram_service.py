@@ -0,0 +1,93 @@
+# blog/services/reaction_histogram_service.py
+
+import logging
+
+from django.db import transaction
+from django.db.models import Count
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.engagement_models import Comment, CommentReaction, PostReaction
+
+logger = logging.getLogger(__name__)
+
+
+class ReactionHistogramService:
+    """
+    Maintains the reaction_counts histograms on BlogPost and Comment.
+
+    A histogram maps each reaction type with at least one reaction to its count,
+    e.g. {"like": 12, "wow": 3}, and lives on the reacted row so a page of posts
+    or a comment thread renders its badges without a GROUP BY per row.
+    Changes are applied under a row lock (read, adjust, write back); rebuild()
+    recomputes every histogram from one grouped query per reaction table.
+    """
+    # reaction model: (target model, foreign key column)
+    TARGETS = {
+        PostReaction: (BlogPost, 'post_id'),
+        CommentReaction: (Comment, 'comment_id'),
+    }
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def adjust(cls, reaction_model, target_id, changes):
+        """
+        Applies {reaction: delta} to one histogram, dropping types that reach zero
+        """
+        changes = {reaction: delta for reaction, delta in changes.items() if delta}
+        if not changes:
+            return
+        model, _ = cls.TARGETS[reaction_model]
+        with transaction.atomic():
+            rows = model.objects.select_for_update().filter(pk=target_id)
+            counts = rows.values_list('reaction_counts', flat=True).first()
+            if counts is None:
+                return
+            for reaction, delta in changes.items():
+                value = max(counts.get(reaction, 0) + delta, 0)
+                if value:
+                    counts[reaction] = value
+                else:
+                    counts.pop(reaction, None)
+            # update() rather than save(), a histogram change is not an edit of the post or comment
+            model.objects.filter(pk=target_id).update(reaction_counts=counts)
+
+    @classmethod
+    def refresh(cls, reaction_model, target_id):
+        """
+        Recomputes one histogram, for changes whose previous reaction is unknown
+        """
+        model, column = cls.TARGETS[reaction_model]
+        rows = reaction_model.objects.filter(**{column: target_id}).order_by()
+        counts = dict(rows.values('reaction').annotate(n=Count('id')).values_list('reaction', 'n'))
+        model.objects.filter(pk=target_id).update(reaction_counts=counts)
+
+    @classmethod
+    def rebuild(cls, reaction_model=None):
+        """
+        Recomputes the histograms of one or both targets, returns the number of rows corrected
+        """
+        corrected = 0
+        for source in ([reaction_model] if reaction_model else cls.TARGETS):
+            corrected += cls._rebuild(source)
+        return corrected
+
+    @classmethod
+    def _rebuild(cls, reaction_model):
+        model, column = cls.TARGETS[reaction_model]
+        actual = {}
+        rows = reaction_model.objects.order_by().values(column, 'reaction').annotate(n=Count('id'))
+        for row in rows:
+            actual.setdefault(row[column], {})[row['reaction']] = row['n']
+
+        changed = []
+        for target in model.objects.only('id', 'reaction_counts').iterator(chunk_size=cls.BATCH_SIZE):
+            counts = actual.get(target.id, {})
+            if target.reaction_counts != counts:
+                target.reaction_counts = counts
+                changed.append(target)
+
+        with transaction.atomic():
+            model.objects.bulk_update(changed, ['reaction_counts'], batch_size=cls.BATCH_SIZE)
+        if changed:
+            logger.info(f"Rebuilt reaction histograms on {len(changed)} {model._meta.verbose_name_plural}")
+        return len(changed)
@@ -0,0 +1,266 @@
+# blog/services/reading_progress_service.py
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.analytics_models import ReadHistory, ReadEvent
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# PROGRESS STORES
+# --------------------------
+
+class LocalReadingProgressStore:
+    """
+    Process-local buffer used when no shared Redis store is configured.
+    Holds {(user_id, post_id): (latest position, furthest percentage, last seen epoch)}
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def put(self, user_id, post_id, position, percentage, seen_at):
+        key = (str(user_id), str(post_id))
+        with self._lock:
+            _, furthest, _ = self._pending.get(key, (0, 0, 0))
+            self._pending[key] = (position, max(furthest, percentage), seen_at)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending):
+        with self._lock:
+            for key, (position, furthest, seen_at) in pending.items():
+                if key in self._pending:
+                    # Newer updates arrived meanwhile, only the furthest percentage carries over
+                    latest, newer_furthest, newer_seen_at = self._pending[key]
+                    self._pending[key] = (latest, max(furthest, newer_furthest), newer_seen_at)
+                else:
+                    self._pending[key] = (position, furthest, seen_at)
+
+
+class RedisReadingProgressStore:
+    """
+    Shared buffer: the latest position per reader in a hash, the furthest percentage in a sorted set
+    """
+    KEY = 'blog:read_progress:pending'
+    FURTHEST_KEY = 'blog:read_progress:furthest'
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=5,
+            socket_connect_timeout=5
+        )
+
+    def put(self, user_id, post_id, position, percentage, seen_at):
+        member = f'{user_id}:{post_id}'
+        pipe = self._client.pipeline(transaction=False)
+        pipe.hset(self.KEY, member, f'{position}:{seen_at}')
+        pipe.zadd(self.FURTHEST_KEY, {member: percentage}, gt=True)
+        pipe.execute()
+
+    def drain(self):
+        pipe = self._client.pipeline()
+        pipe.hgetall(self.KEY)
+        pipe.zrange(self.FURTHEST_KEY, 0, -1, withscores=True)
+        pipe.delete(self.KEY, self.FURTHEST_KEY)
+        latest, furthest, _ = pipe.execute()
+        furthest = {member.decode(): score for member, score in furthest}
+
+        pending = {}
+        for member, value in latest.items():
+            member = member.decode()
+            position, seen_at = value.decode().split(':')
+            user_id, post_id = member.split(':')
+            pending[(user_id, post_id)] = (int(position), furthest.get(member, 0.0), float(seen_at))
+        return pending
+
+    def restore(self, pending):
+        pipe = self._client.pipeline()
+        for (user_id, post_id), (position, furthest, seen_at) in pending.items():
+            member = f'{user_id}:{post_id}'
+            pipe.hsetnx(self.KEY, member, f'{position}:{seen_at}')
+            pipe.zadd(self.FURTHEST_KEY, {member: furthest}, gt=True)
+        pipe.execute()
+
+
+# --------------------------
+# READING PROGRESS SERVICE
+# --------------------------
+
+class ReadingProgressService:
+    """
+    Write-coalescing ingestion of reading progress into ReadHistory.
+
+    Clients report their scroll position and the scrollable document height every
+    few seconds; the buffer keeps only the latest position and the furthest
+    percentage read per reader and post, and every BLOG_READ_PROGRESS_FLUSH_INTERVAL
+    seconds all of them are written with a single INSERT ... ON CONFLICT (user, post)
+    DO UPDATE. Completion and new read sessions are worked out while flushing, never
+    in the request, and last_read_at is the time of the last update, not of the flush.
+    Each new session and the first completion also append a ReadEvent, the immutable
+    record the daily rollups count.
+    """
+    _store = None
+    _flusher = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_store(cls):
+        """
+        Returns the configured store (Redis when REDIS_URL is set, otherwise process-local)
+        """
+        if cls._store is None:
+            with cls._lock:
+                if cls._store is None:
+                    redis_url = getattr(settings, 'REDIS_URL', None)
+                    if redis_url:
+                        cls._store = RedisReadingProgressStore(redis_url)
+                    else:
+                        cls._store = LocalReadingProgressStore()
+        return cls._store
+
+    @classmethod
+    def record(cls, user_id, post_id, scroll_position, read_percentage):
+        """
+        Buffers a progress update; read_percentage is the share of the document scrolled through
+        """
+        cls._ensure_flusher()
+        seen_at = time.time()
+        try:
+            cls.get_store().put(user_id, post_id, scroll_position, read_percentage, seen_at)
+        except Exception as e:
+            # Never lose progress because the buffer is unavailable
+            logger.warning(f"Reading progress buffer unavailable, writing through: {str(e)}")
+            cls._apply({(str(user_id), str(post_id)): (scroll_position, read_percentage, seen_at)})
+
+    @classmethod
+    def flush(cls):
+        """
+        Upserts every buffered update, returns the number of ReadHistory rows written
+        """
+        store = cls.get_store()
+        pending = store.drain()
+        if not pending:
+            return 0
+        try:
+            return cls._apply(pending)
+        except Exception:
+            store.restore(pending)
+            raise
+
+    @classmethod
+    def _apply(cls, pending):
+        threshold = getattr(settings, 'BLOG_READ_PROGRESS_COMPLETE_PERCENT', 90)
+        session_gap = timedelta(seconds=getattr(settings, 'BLOG_READ_PROGRESS_SESSION_GAP', 1800))
+        post_ids = {
+            str(post_id)
+            for post_id in BlogPost.objects.filter(id__in={post_id for _, post_id in pending}).values_list('id', flat=True)
+        }
+
+        with transaction.atomic():
+            existing = {
+                (str(user_id), str(post_id)): (read_count, is_completed, read_percentage, last_read_at)
+                for user_id, post_id, read_count, is_completed, read_percentage, last_read_at
+                in ReadHistory.objects.select_for_update().filter(
+                    user_id__in={user_id for user_id, _ in pending},
+                    post_id__in=post_ids
+                ).values_list('user_id', 'post_id', 'read_count', 'is_completed', 'read_percentage', 'last_read_at')
+                if (str(user_id), str(post_id)) in pending
+            }
+
+            rows, events = [], []
+            for key in sorted(pending):
+                user_id, post_id = key
+                if post_id not in post_ids:
+                    # The post was deleted since the update was buffered
+                    continue
+                position, furthest, seen_at = pending[key]
+                seen = datetime.fromtimestamp(seen_at, tz=dt_timezone.utc)
+                percentage = min(100, int(furthest))
+
+                read_count, is_completed, started = 1, False, True
+                if key in existing:
+                    read_count, is_completed, read_percentage, last_read_at = existing[key]
+                    if last_read_at < seen - session_gap:
+                        read_count += 1
+                    else:
+                        # Same session, the furthest point of it carries over
+                        percentage = max(percentage, read_percentage)
+                        started = False
+                completed = not is_completed and furthest >= threshold
+                if started:
+                    events.append(ReadEvent(
+                        user_id=user_id, post_id=post_id, event_type=ReadEvent.EventType.STARTED, occurred_at=seen
+                    ))
+                if completed:
+                    events.append(ReadEvent(
+                        user_id=user_id, post_id=post_id, event_type=ReadEvent.EventType.COMPLETED, occurred_at=seen
+                    ))
+                rows.append(ReadHistory(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    post_id=post_id,
+                    scroll_position=position,
+                    read_percentage=percentage,
+                    read_count=read_count,
+                    is_completed=is_completed or completed,
+                    last_read_at=seen,
+                ))
+
+            ReadHistory.objects.bulk_create(
+                rows,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['user', 'post'],
+                update_fields=['scroll_position', 'read_percentage', 'read_count', 'is_completed', 'last_read_at']
+            )
+            ReadEvent.objects.bulk_create(events, batch_size=500)
+        return len(rows)
+
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher is not None:
+            return
+        with cls._lock:
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(
+                    target=cls._flush_forever,
+                    daemon=True,
+                    name="blog_read_progress"
+                )
+                cls._flusher.start()
+                atexit.register(cls._flush_quietly)
+                logger.info("Blog reading progress flusher started")
+
+    @classmethod
+    def _flush_forever(cls):
+        interval = getattr(settings, 'BLOG_READ_PROGRESS_FLUSH_INTERVAL', 15)
+        event = threading.Event()
+        while not event.wait(interval):
+            cls._flush_quietly()
+            close_old_connections()
+
+    @classmethod
+    def _flush_quietly(cls):
+        try:
+            flushed = cls.flush()
+            if flushed:
+                logger.debug(f"Flushed reading progress of {flushed} readers")
+        except Exception:
+            logger.error("Failed to flush reading progress", exc_info=True)
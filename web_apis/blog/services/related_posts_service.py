@@ -0,0 +1,435 @@
+# blog/services/related_posts_service.py
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from web_apis.blog.models.blog_models import BlogPost, PostSimilarity
+from web_apis.blog.services.event_queue_service import EventQueueService
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]+")
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below
+    between both but can could did does doing down during each few for from further had has
+    have having her here hers herself him himself his how into its itself just more most
+    not now off once only other our ours out over own same she should some such than that
+    the their theirs them then there these they this those through too under until very
+    was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+class RelatedPostsModel:
+    """
+    Vocabulary and idf weights, frozen between full rebuilds. Turns a post into
+    its sparse vector: (text columns, L2-normalised TF-IDF weights, taxonomy terms).
+    """
+
+    def __init__(self, version, vocabulary, idf):
+        self.version = version
+        self.vocabulary = list(vocabulary)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.columns = {term: column for column, term in enumerate(self.vocabulary)}
+
+    @classmethod
+    def fit(cls, documents, max_features):
+        """
+        documents: {post_id: Counter of tokens}
+        """
+        total = len(documents)
+        frequency = Counter()
+        for tokens in documents.values():
+            frequency.update(tokens.keys())
+
+        # Terms in nearly every post carry no signal once the corpus is large enough
+        ceiling = total * 0.8 if total >= 10 else total
+        candidates = [(count, term) for term, count in frequency.items() if count <= ceiling]
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        vocabulary = [term for _, term in candidates[:max_features]]
+        idf = [math.log((1 + total) / (1 + frequency[term])) + 1 for term in vocabulary]
+        return cls(time.time(), vocabulary, idf)
+
+    def vector(self, tokens, terms):
+        columns, weights = [], []
+        for token, count in tokens.items():
+            column = self.columns.get(token)
+            if column is not None:
+                columns.append(column)
+                weights.append((1 + math.log(count)) * self.idf[column])
+        weights = np.asarray(weights, dtype=np.float32)
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        return np.asarray(columns, dtype=np.int32), weights, tuple(sorted(terms))
+
+    def dumps(self):
+        return {'version': self.version, 'vocabulary': self.vocabulary, 'idf': self.idf.tolist()}
+
+    @classmethod
+    def loads(cls, payload):
+        return cls(payload['version'], payload['vocabulary'], payload['idf'])
+
+
+class RelatedPostsIndex:
+    """
+    Sparse vectors of a set of posts laid out as flat (row, column, weight)
+    arrays, so one post is scored against all of them with a single bincount.
+    Taxonomy terms are one-hot and L2-normalised like the text.
+
+    Changed posts are patched in place: their old row is retired and the new
+    vector appended, and the arrays are compacted once retired rows outnumber
+    live ones.
+    """
+
+    def __init__(self, vectors):
+        self.post_ids = []
+        self.rows = {}
+        self.vectors = {}
+        self.term_columns = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.text = self.taxonomy = self._flatten([], [], [])
+        self._append(vectors)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, vectors):
+        """
+        Replaces the vectors of changed posts and adds new ones, {post_id: vector}
+        """
+        for post_id in vectors:
+            self._retire(post_id)
+        self._append(vectors)
+        self._compact()
+
+    def remove(self, post_ids):
+        for post_id in post_ids:
+            self._retire(post_id)
+        self._compact()
+
+    def scores(self, post_id, text_weight, taxonomy_weight):
+        """
+        Similarity of one post against every row, a post never matches itself or a retired row
+        """
+        columns, weights, terms = self.vectors[post_id]
+        scores = text_weight * self._dot(self.text, columns, weights)
+        if terms:
+            term_ids = np.asarray([self.term_columns[term] for term in terms], dtype=np.int32)
+            term_weights = np.full(len(terms), 1 / math.sqrt(len(terms)), dtype=np.float32)
+            scores += taxonomy_weight * self._dot(self.taxonomy, term_ids, term_weights)
+        scores[~self.alive] = -np.inf
+        scores[self.rows[post_id]] = -np.inf
+        return scores
+
+    def _append(self, vectors):
+        text_rows, text_columns, text_weights = [], [], []
+        term_rows, term_ids, term_weights = [], [], []
+        for post_id, (columns, weights, terms) in vectors.items():
+            row = len(self.post_ids)
+            self.post_ids.append(post_id)
+            self.rows[post_id] = row
+            self.vectors[post_id] = (columns, weights, terms)
+            text_rows.append(np.full(len(columns), row, dtype=np.int32))
+            text_columns.append(columns)
+            text_weights.append(weights)
+            for term in terms:
+                term_rows.append(row)
+                term_ids.append(self.term_columns.setdefault(term, len(self.term_columns)))
+                term_weights.append(1 / math.sqrt(len(terms)))
+        self.alive = np.concatenate([self.alive, np.ones(len(vectors), dtype=bool)])
+        self.text = self._extend(self.text, self._flatten(text_rows, text_columns, text_weights))
+        self.taxonomy = self._extend(self.taxonomy, (
+            np.asarray(term_rows, dtype=np.int32),
+            np.asarray(term_ids, dtype=np.int32),
+            np.asarray(term_weights, dtype=np.float32)
+        ))
+
+    def _retire(self, post_id):
+        row = self.rows.pop(post_id, None)
+        if row is not None:
+            self.alive[row] = False
+            del self.vectors[post_id]
+
+    def _compact(self):
+        if len(self.post_ids) - len(self.rows) > len(self.rows):
+            self.__init__({post_id: self.vectors[post_id] for post_id in self.rows})
+
+    def _dot(self, matrix, columns, weights):
+        rows, matrix_columns, matrix_weights = matrix
+        if not len(columns) or not len(rows):
+            return np.zeros(len(self.post_ids), dtype=np.float32)
+        query = np.zeros(max(int(columns.max()), int(matrix_columns.max())) + 1, dtype=np.float32)
+        query[columns] = weights
+        return np.bincount(
+            rows, weights=matrix_weights * query[matrix_columns], minlength=len(self.post_ids)
+        ).astype(np.float32)
+
+    @staticmethod
+    def _flatten(rows, columns, weights):
+        if not rows:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(columns), np.concatenate(weights)
+
+    @staticmethod
+    def _extend(matrix, added):
+        return tuple(np.concatenate([current, new]) for current, new in zip(matrix, added))
+
+
+class RelatedPostsUpdate:
+    """
+    Queued re-scoring of one post, handed to RelatedPostsService.process by EventQueueService
+    """
+
+    def __init__(self, post_id):
+        self.post_id = str(post_id)
+
+
+class RelatedPostsService:
+    """
+    Maintains the PostSimilarity top-k neighbour table of published posts.
+
+    A full rebuild (manage.py rebuild_related_posts) fits the vocabulary and
+    scores every post. Saving or deleting a post only queues its id; the event
+    queue worker re-scores the queued posts in batches, off the request path,
+    together with the posts whose neighbour lists they enter or leave.
+
+    The cache holds the frozen model (vocabulary, idf). Each worker process
+    keeps the index of every public post in memory, built from the database
+    once per model version; a batch only loads the queued posts and patches
+    their rows. With no model cached yet, the first worker to take the
+    rebuild lock rebuilds.
+    """
+    MODEL_KEY = 'blog:related_posts:model'
+    LOCK_KEY = 'blog:related_posts:rebuild'
+    CHUNK_SIZE = 1000
+    DEFAULTS = {
+        'TOP_K': 5,
+        'TEXT_WEIGHT': 0.7,
+        'MAX_FEATURES': 5000,
+        'REBUILD_TIMEOUT': 900,
+    }
+
+    # (model version, RelatedPostsIndex) of this process
+    _index = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recomputes every neighbour list, returns the number of posts indexed
+        """
+        documents, taxonomies = cls._load_posts(cls._public_posts())
+        model = RelatedPostsModel.fit(documents, cls._setting('MAX_FEATURES'))
+        vectors = {
+            post_id: model.vector(tokens, taxonomies.get(post_id, ()))
+            for post_id, tokens in documents.items()
+        }
+        index = RelatedPostsIndex(vectors)
+        similarities = []
+        for post_id in index.post_ids:
+            similarities.extend(cls._neighbours(index, post_id))
+
+        with transaction.atomic():
+            PostSimilarity.objects.all().delete()
+            PostSimilarity.objects.bulk_create(similarities, batch_size=cls.CHUNK_SIZE)
+
+        with cls._lock:
+            cls._index = (model.version, index)
+        cache.set(cls.MODEL_KEY, model.dumps(), timeout=None)
+        logger.info(f"Related posts rebuilt for {len(index)} posts")
+        return len(index)
+
+    @classmethod
+    def schedule_update(cls, post_id):
+        """
+        Queues a post for re-scoring once the surrounding transaction commits
+        """
+        transaction.on_commit(lambda: EventQueueService.enqueue(RelatedPostsUpdate(post_id)))
+
+    @classmethod
+    def process(cls, updates):
+        """
+        EventQueueService writer: re-scores a batch of queued posts, each post once
+        """
+        post_ids = list(dict.fromkeys(update.post_id for update in updates))
+        cls.update_posts(post_ids)
+
+    @classmethod
+    def update_posts(cls, post_ids):
+        """
+        Re-scores posts after they were saved, published, unpublished, re-tagged or deleted
+        """
+        model = cls._model()
+        if model is None:
+            # Nothing built yet, the rebuild covers these posts too
+            if cache.add(cls.LOCK_KEY, True, timeout=cls._setting('REBUILD_TIMEOUT')):
+                try:
+                    cls.rebuild()
+                finally:
+                    cache.delete(cls.LOCK_KEY)
+            return
+
+        post_ids = {str(post_id) for post_id in post_ids}
+        with cls._lock:
+            index = cls._current_index(model)
+            documents, taxonomies = cls._load_posts(cls._public_posts().filter(id__in=post_ids))
+            index.update({
+                post_id: model.vector(tokens, taxonomies.get(post_id, ()))
+                for post_id, tokens in documents.items()
+            })
+            # Unpublished or deleted posts leave the index
+            index.remove(post_ids - set(documents))
+
+            affected = set()
+            for post_id in post_ids:
+                if post_id in index.rows:
+                    affected |= cls._affected(index, post_id) | {post_id}
+                else:
+                    # Re-score the posts that listed it
+                    affected |= cls._listing(post_id)
+
+            similarities = []
+            for post_id in affected:
+                if post_id in index.rows:
+                    similarities.extend(cls._neighbours(index, post_id))
+        with transaction.atomic():
+            PostSimilarity.objects.filter(post_id__in=affected | post_ids).delete()
+            PostSimilarity.objects.bulk_create(similarities, batch_size=cls.CHUNK_SIZE)
+
+    @classmethod
+    def _current_index(cls, model):
+        """
+        This process's index, loaded from the database when it is missing or of an older model
+        """
+        if cls._index is None or cls._index[0] != model.version:
+            cls._index = (model.version, RelatedPostsIndex(cls._vectors(model)))
+        return cls._index[1]
+
+    @classmethod
+    def _affected(cls, index, post_id):
+        """
+        Posts whose neighbour list the scored post now enters, or already is in
+        """
+        top_k = cls._setting('TOP_K')
+        scores = index.scores(post_id, *cls._weights())
+        candidates = {
+            other_id: float(score) for other_id, score in zip(index.post_ids, scores) if score > 0
+        }
+        affected = cls._listing(post_id)
+        ids = list(candidates)
+        for start in range(0, len(ids), cls.CHUNK_SIZE):
+            chunk = ids[start:start + cls.CHUNK_SIZE]
+            lists = {
+                str(row['post_id']): row
+                for row in PostSimilarity.objects.filter(post_id__in=chunk).values('post_id').annotate(
+                    size=Count('id'), lowest=Min('score')
+                )
+            }
+            for other_id in chunk:
+                current = lists.get(other_id)
+                if current is None or current['size'] < top_k or candidates[other_id] > current['lowest']:
+                    affected.add(other_id)
+        return affected
+
+    @staticmethod
+    def _listing(post_id):
+        """
+        Posts that currently list the given post as a neighbour
+        """
+        return {
+            str(value) for value in
+            PostSimilarity.objects.filter(similar_post_id=post_id).values_list('post_id', flat=True)
+        }
+
+    @classmethod
+    def _neighbours(cls, index, post_id):
+        if len(index) < 2:
+            return []
+        top_k = min(cls._setting('TOP_K'), len(index) - 1)
+        scores = index.scores(post_id, *cls._weights())
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+
+        similarities = []
+        rank = 0
+        for column in sorted(best, key=lambda column: -scores[column]):
+            score = float(scores[column])
+            if score <= 0:
+                break
+            rank += 1
+            similarities.append(PostSimilarity(
+                post_id=post_id,
+                similar_post_id=index.post_ids[column],
+                rank=rank,
+                score=round(score, 6)
+            ))
+        return similarities
+
+    @classmethod
+    def _vectors(cls, model):
+        """
+        {post_id: vector} of every public post, in database order so rows and neighbour ties stay stable
+        """
+        post_ids = [str(post_id) for post_id in cls._public_posts().values_list('id', flat=True)]
+        vectors = {}
+        for start in range(0, len(post_ids), cls.CHUNK_SIZE):
+            posts = cls._public_posts().filter(id__in=post_ids[start:start + cls.CHUNK_SIZE])
+            documents, taxonomies = cls._load_posts(posts)
+            for post_id, tokens in documents.items():
+                vectors[post_id] = model.vector(tokens, taxonomies.get(post_id, ()))
+        return vectors
+
+    @classmethod
+    def _model(cls):
+        payload = cache.get(cls.MODEL_KEY)
+        return RelatedPostsModel.loads(payload) if payload else None
+
+    @classmethod
+    def _public_posts(cls):
+        return BlogPost.objects.filter(
+            status=BlogPost.PostStatus.PUBLISHED,
+            published_at__lte=timezone.now()
+        ).order_by('id')
+
+    @classmethod
+    def _load_posts(cls, posts):
+        documents = {}
+        for post_id, title, excerpt, content in posts.values_list('id', 'title', 'excerpt', 'content').iterator():
+            documents[str(post_id)] = cls._tokens(title, excerpt, content)
+
+        taxonomies = {post_id: set() for post_id in documents}
+        for relation, prefix in ((BlogPost.categories.through, 'category'), (BlogPost.tags.through, 'tag')):
+            target = f'{prefix}_id'
+            links = relation.objects.filter(blogpost_id__in=posts.values('id')).values_list('blogpost_id', target)
+            for post_id, term_id in links.iterator():
+                taxonomies[str(post_id)].add(f'{prefix}:{term_id}')
+        return documents, taxonomies
+
+    @staticmethod
+    def _tokens(title, excerpt, content):
+        # Title terms count three times, excerpt terms twice
+        tokens = Counter()
+        for text, weight in ((title, 3), (excerpt, 2), (content, 1)):
+            for token in TOKEN_PATTERN.findall(strip_tags(text or '').lower()):
+                if token not in STOP_WORDS:
+                    tokens[token] += weight
+        return tokens
+
+    @classmethod
+    def _weights(cls):
+        return cls._setting('TEXT_WEIGHT'), 1 - cls._setting('TEXT_WEIGHT')
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_RELATED_POSTS_{name}', cls.DEFAULTS[name])
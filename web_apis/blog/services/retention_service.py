@@ -0,0 +1,344 @@
+# blog/services/retention_service.py
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from web_apis.blog import archive
+from web_apis.blog.models.analytics_models import (
+    PostView,
+    ReadEvent,
+    ClickEvent,
+    SearchQuery,
+    AdminActivityLog,
+    AnalyticsWatermark
+)
+from web_apis.blog.services.analytics_rollup_service import AnalyticsRollupService
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionService:
+    """
+    Keeps the high-volume analytics tables down to their recent rows.
+
+    Rows older than BLOG_ARCHIVE_RETENTION_DAYS are streamed in chunks of
+    BLOG_ARCHIVE_CHUNK_SIZE into ColumnarArchive segments under BLOG_ARCHIVE_ROOT;
+    each chunk is appended, deleted in one short transaction and only then
+    committed, so memory stays bounded by one chunk. Archived history stays
+    queryable through query(), which is how AnalyticsRollupService rebuilds
+    the rollups of archived views and reads. On PostgreSQL the tables can also be range
+    partitioned by month (partition()); months emptied by the archiver are then
+    detached and dropped instead of leaving bloat behind.
+    """
+
+    # name: (model, timestamp field, rows that must stay in the hot table)
+    TABLES = {
+        'views': (PostView, 'viewed_at', None),
+        'reads': (ReadEvent, 'occurred_at', None),
+        'clicks': (ClickEvent, 'created_at', None),
+        'searches': (SearchQuery, 'created_at', None),
+        # Unprocessed activity is still waiting for an admin
+        'activity': (AdminActivityLog, 'created_at', Q(is_processed=False)),
+    }
+    DEFAULTS = {
+        'ROOT': None,
+        'RETENTION_DAYS': 90,
+        'CHUNK_SIZE': 5000,
+        'PARTITION_MONTHS_AHEAD': 3,
+    }
+
+    @classmethod
+    def archive(cls, names=None, now=None, dry_run=False):
+        """
+        Archives and deletes expired rows, returns the number of rows archived per table
+        """
+        now = now or timezone.now()
+        archived = {}
+        for name in names or cls.TABLES:
+            cutoff = cls.cutoff(name, now)
+            if dry_run:
+                archived[name] = cls._expired(name, cutoff).count()
+                continue
+            archived[name] = cls._archive_table(name, cutoff)
+            if cls.is_partitioned(name):
+                cls.drop_empty_partitions(name, cutoff)
+        if any(archived.values()):
+            logger.info(f"Analytics retention archived {archived}")
+        return archived
+
+    @classmethod
+    def cutoff(cls, name, now=None):
+        """
+        Rows stamped before this moment are archived
+        """
+        now = now or timezone.now()
+        cutoff = now - timedelta(days=cls._setting('RETENTION_DAYS'))
+        if name in AnalyticsRollupService.SOURCES:
+            # Rows that have not been rolled up yet must stay where the rollup can read them
+            watermark = AnalyticsWatermark.objects.filter(
+                name=AnalyticsRollupService._watermark_name(name)
+            ).values_list('position', flat=True).first()
+            cutoff = min(cutoff, watermark or archive.EPOCH)
+        return cutoff
+
+    @classmethod
+    def query(cls, name):
+        """
+        ArchiveQuery over the archived months of a table
+        """
+        return cls._archive(name).query()
+
+    # Archiving -------------------------------------------------------------------------------
+    @classmethod
+    def _archive_table(cls, name, cutoff):
+        model, timestamp, _ = cls.TABLES[name]
+        store = cls._archive(name)
+        kinds = cls._kinds(model)
+        key = model._meta.pk.attname
+        positions = {column: index for index, column in enumerate(kinds)}
+
+        recovered = store.recover(lambda keys: model.objects.filter(pk__in=keys).exists())
+        if recovered:
+            logger.info(f"Committed {recovered} {name} archive segments of an interrupted run")
+
+        expired = cls._expired(name, cutoff).order_by(timestamp, key)
+        size = cls._setting('CHUNK_SIZE')
+        total, last = 0, None
+        while True:
+            # Keyset over (timestamp, key): one chunk in memory, no rescans of deleted rows
+            rows = expired
+            if last is not None:
+                rows = rows.filter(
+                    Q(**{f'{timestamp}__gt': last[0]}) | Q(**{timestamp: last[0], f'{key}__gt': last[1]})
+                )
+            chunk = list(rows.values_list(*kinds)[:size])
+            if not chunk:
+                return total
+            last = (chunk[-1][positions[timestamp]], chunk[-1][positions[key]])
+
+            months = {}
+            for values in chunk:
+                month = cls._month_start(values[positions[timestamp]]).strftime('%Y-%m')
+                months.setdefault(month, []).append(values)
+            pending = [
+                store.append(month, kinds, {
+                    column: [values[index] for values in rows] for column, index in positions.items()
+                }, key, timestamp)
+                for month, rows in months.items()
+            ]
+            # The segments only count once the rows are gone, recover() settles a crash in between
+            try:
+                with transaction.atomic():
+                    model.objects.filter(pk__in=[values[positions[key]] for values in chunk]).delete()
+            except Exception:
+                for segment in pending:
+                    store.discard(segment)
+                raise
+            for segment in pending:
+                store.commit(segment)
+
+            total += len(chunk)
+            logger.info(f"Archived {len(chunk)} {name} rows of {', '.join(months)}")
+
+    @classmethod
+    def _expired(cls, name, cutoff):
+        model, timestamp, keep = cls.TABLES[name]
+        rows = model.objects.filter(**{f'{timestamp}__lt': cutoff})
+        return rows.exclude(keep) if keep is not None else rows
+
+    @classmethod
+    def _archive(cls, name):
+        model = cls.TABLES[name][0]
+        root = cls._setting('ROOT') or os.path.join(settings.BASE_DIR, 'archive')
+        return archive.ColumnarArchive(root, model._meta.db_table)
+
+    @staticmethod
+    def _kinds(model):
+        """
+        {column: archive kind} of every concrete field
+        """
+        kinds = {}
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateTimeField):
+                kind = archive.DATETIME
+            elif isinstance(field, models.BooleanField):
+                kind = archive.BOOLEAN
+            elif isinstance(field, models.IntegerField) and not field.is_relation:
+                kind = archive.INTEGER
+            elif isinstance(field, models.FloatField):
+                kind = archive.FLOAT
+            elif isinstance(field, (models.TextField, models.JSONField)):
+                kind = archive.TEXT
+            else:
+                # Ids, IPs, user agents, URLs and choices repeat a lot: dictionary-encode them
+                kind = archive.CATEGORY
+            kinds[field.attname] = kind
+        return kinds
+
+    # Partitioning ----------------------------------------------------------------------------
+    @classmethod
+    def is_partitioned(cls, name):
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = %s AND c.relnamespace = to_regnamespace(current_schema())",
+                [cls.TABLES[name][0]._meta.db_table]
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def partition(cls, name):
+        """
+        Rebuilds a table as a monthly range-partitioned one. Runs in a single
+        transaction and holds an exclusive lock on the table for the whole copy,
+        so run it in a maintenance window. PostgreSQL only.
+        """
+        if connection.vendor != 'postgresql':
+            raise RuntimeError("Table partitioning requires PostgreSQL")
+        if cls.is_partitioned(name):
+            return False
+
+        model, timestamp, _ = cls.TABLES[name]
+        table = model._meta.db_table
+        column = model._meta.get_field(timestamp).column
+        quote = connection.ops.quote_name
+        old = f'{table}_unpartitioned'
+
+        with transaction.atomic(), connection.schema_editor(atomic=False) as editor:
+            editor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT MIN({quote(column)}) FROM {quote(table)}")
+                oldest = cursor.fetchone()[0] or timezone.now()
+
+            editor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+            editor.execute(
+                f"CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                f"PARTITION BY RANGE ({quote(column)})"
+            )
+            # Catches rows outside the created months instead of failing the insert
+            editor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT")
+            cls._create_partitions(editor, table, cls._month_start(oldest), cls._horizon())
+
+            editor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)}")
+            editor.execute(f"DROP TABLE {quote(old)}")
+
+            # Unique constraints of a partitioned table must include the partition key
+            editor.execute(
+                f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} "
+                f"PRIMARY KEY ({quote(model._meta.pk.column)}, {quote(column)})"
+            )
+            for statement in editor._model_indexes_sql(model):
+                editor.execute(statement)
+            for field in model._meta.local_fields:
+                if field.remote_field and field.db_constraint:
+                    editor.execute(editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+
+        logger.info(f"Partitioned {table} by month on {column}")
+        return True
+
+    @classmethod
+    def ensure_partitions(cls, names=None):
+        """
+        Creates the monthly partitions up to BLOG_ARCHIVE_PARTITION_MONTHS_AHEAD,
+        returns the number created
+        """
+        created = 0
+        for name in names or cls.TABLES:
+            if not cls.is_partitioned(name):
+                continue
+            table = cls.TABLES[name][0]._meta.db_table
+            with connection.schema_editor() as editor:
+                created += cls._create_partitions(editor, table, cls._month_start(timezone.now()), cls._horizon())
+        return created
+
+    @classmethod
+    def drop_empty_partitions(cls, name, cutoff):
+        """
+        Detaches and drops the emptied monthly partitions that end before the cutoff
+        """
+        table = cls.TABLES[name][0]._meta.db_table
+        quote = connection.ops.quote_name
+        dropped = 0
+        for partition, start in cls._partitions(table):
+            if cls._next_month(start) > cutoff:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {quote(partition)})")
+                if cursor.fetchone()[0]:
+                    continue
+                cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(partition)}")
+                cursor.execute(f"DROP TABLE {quote(partition)}")
+            dropped += 1
+            logger.info(f"Dropped empty partition {partition}")
+        return dropped
+
+    @classmethod
+    def _create_partitions(cls, editor, table, start, end):
+        existing = {partition for partition, _ in cls._partitions(table)}
+        quote = connection.ops.quote_name
+        created = 0
+        month = start
+        while month < end:
+            following = cls._next_month(month)
+            partition = cls._partition_name(table, month)
+            if partition not in existing:
+                editor.execute(
+                    f"CREATE TABLE {quote(partition)} PARTITION OF {quote(table)} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+                )
+                created += 1
+            month = following
+        return created
+
+    @classmethod
+    def _partitions(cls, table):
+        """
+        (name, month start) of the monthly partitions of a table
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s AND p.relnamespace = to_regnamespace(current_schema())",
+                [table]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        prefix = f'{table}_p'
+        partitions = []
+        for partition in names:
+            if partition.startswith(prefix):
+                start = datetime.strptime(partition[len(prefix):], '%Y%m').replace(tzinfo=dt_timezone.utc)
+                partitions.append((partition, start))
+        return sorted(partitions, key=lambda item: item[1])
+
+    @staticmethod
+    def _partition_name(table, month):
+        return f'{table}_p{month:%Y%m}'
+
+    @classmethod
+    def _horizon(cls):
+        month = cls._month_start(timezone.now())
+        for _ in range(cls._setting('PARTITION_MONTHS_AHEAD') + 1):
+            month = cls._next_month(month)
+        return month
+
+    @staticmethod
+    def _month_start(value):
+        value = value.astimezone(dt_timezone.utc)
+        return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+    @staticmethod
+    def _next_month(value):
+        return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_ARCHIVE_{name}', cls.DEFAULTS[name])
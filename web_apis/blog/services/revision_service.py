@@ -0,0 +1,289 @@
+# blog/services/revision_service.py
+
+import difflib
+import logging
+import re
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+
+from web_apis.blog import revision_delta
+from web_apis.blog.models.blog_models import BlogPostRevision
+
+logger = logging.getLogger(__name__)
+
+
+class RevisionService:
+    """
+    Stores BlogPostRevision content as periodic snapshots with line deltas in between.
+
+    A revision is a full snapshot when it is a post's first, when the chain
+    since the last snapshot has reached SNAPSHOT_INTERVAL, or when its delta
+    would not be much smaller than the text. Otherwise only the delta from the
+    previous revision is kept. Any revision is rebuilt from one query over its
+    chain with at most SNAPSHOT_INTERVAL - 1 patches; rebuilt texts are cached,
+    revisions never change once written.
+    """
+    CONTENT_CACHE_KEY = 'blog:revisions:content:{post_id}:{number}'
+    DIFF_CACHE_KEY = 'blog:revisions:diff:{post_id}:{old}:{new}:{mode}'
+    DIFF_MODES = ('unified', 'words')
+    # Fields a listing needs; content and delta stay in the database
+    LIST_FIELDS = (
+        'id', 'post', 'revision_number', 'title', 'updated_by', 'created_at', 'revision_notes',
+        'changes', 'content_length', 'size_delta', 'lines_added', 'lines_removed'
+    )
+    DEFAULTS = {
+        'SNAPSHOT_INTERVAL': 10,
+        'CONTENT_CACHE_TIMEOUT': 3600,
+        'DIFF_CACHE_TIMEOUT': 86400,
+    }
+    # A delta this large relative to the text is not worth a chain link
+    MAX_DELTA_RATIO = 0.5
+    BATCH_SIZE = 500
+
+    @classmethod
+    def create(cls, post, changes, updated_by=None, revision_notes=''):
+        """
+        Records the post's current title, excerpt and content as its next revision
+        """
+        return cls.create_many([post], changes, updated_by=updated_by, revision_notes=revision_notes)[0]
+
+    @classmethod
+    def create_many(cls, posts, changes, updated_by=None, revision_notes=''):
+        """
+        Records the next revision of several posts with one read of their chains and one insert
+        """
+        if not posts:
+            return []
+        with transaction.atomic():
+            latest = cls._latest([post.id for post in posts])
+            previous_contents = cls._contents(list(latest.values()))
+            revisions = []
+            for post in posts:
+                previous = latest.get(post.id)
+                revision = BlogPostRevision(
+                    post=post,
+                    revision_number=previous.revision_number + 1 if previous else 1,
+                    title=post.title,
+                    excerpt=post.excerpt,
+                    updated_by_id=updated_by.pk if updated_by else post.author_id,
+                    changes=changes,
+                    revision_notes=revision_notes,
+                )
+                key = (previous.post_id, previous.revision_number) if previous else None
+                cls._store(revision, post.content, previous, previous_contents.get(key))
+                revisions.append(revision)
+            return BlogPostRevision.objects.bulk_create(revisions, batch_size=cls.BATCH_SIZE)
+
+    @classmethod
+    def content(cls, revision):
+        """
+        Full text of a revision
+        """
+        if revision.is_snapshot:
+            return revision.content
+        return cls._contents([revision])[(revision.post_id, revision.revision_number)]
+
+    @classmethod
+    def diff(cls, post_id, old_number, new_number, mode='unified'):
+        """
+        Diff between two revisions of a post, cached per revision pair and mode.
+
+        unified - {'diff': unified diff text}
+        words   - {'diff': [[op, text], ...]} with op one of equal, insert, delete
+        Raises BlogPostRevision.DoesNotExist when either revision is missing.
+        """
+        if mode not in cls.DIFF_MODES:
+            raise ValueError(f"Unknown diff mode '{mode}', expected one of {', '.join(cls.DIFF_MODES)}")
+        key = cls.DIFF_CACHE_KEY.format(post_id=post_id, old=old_number, new=new_number, mode=mode)
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+        revisions = {
+            revision.revision_number: revision
+            for revision in BlogPostRevision.objects.filter(
+                post_id=post_id, revision_number__in=[old_number, new_number]
+            ).only('id', 'post', 'revision_number', 'title', 'is_snapshot', 'chain_depth', 'content_length')
+        }
+        if old_number not in revisions or new_number not in revisions:
+            raise BlogPostRevision.DoesNotExist(f"Revision {old_number} or {new_number} does not exist")
+        old, new = revisions[old_number], revisions[new_number]
+        contents = cls._contents([old, new])
+        old_text = contents[(old.post_id, old.revision_number)]
+        new_text = contents[(new.post_id, new.revision_number)]
+
+        if mode == 'unified':
+            diff = ''.join(difflib.unified_diff(
+                old_text.splitlines(keepends=True),
+                new_text.splitlines(keepends=True),
+                fromfile=f'revision {old_number}',
+                tofile=f'revision {new_number}'
+            ))
+        else:
+            diff = cls._word_diff(old_text, new_text)
+
+        result = {
+            'from_revision': old_number,
+            'to_revision': new_number,
+            'mode': mode,
+            'title_changed': old.title != new.title,
+            'size_delta': new.content_length - old.content_length,
+            'diff': diff,
+        }
+        cache.set(key, result, timeout=cls._setting('DIFF_CACHE_TIMEOUT'))
+        return result
+
+    @classmethod
+    def compact(cls, post_ids=None):
+        """
+        Re-encodes the revisions of every post (or of post_ids) under the current policy,
+        e.g. full copies written before deltas, returns the number of revisions rewritten
+        """
+        posts = BlogPostRevision.objects.order_by().values_list('post_id', flat=True).distinct()
+        if post_ids is not None:
+            posts = posts.filter(post_id__in=list(post_ids))
+
+        rewritten = 0
+        for post_id in list(posts):
+            with transaction.atomic():
+                revisions = list(
+                    BlogPostRevision.objects.select_for_update()
+                    .filter(post_id=post_id).order_by('revision_number')
+                )
+                texts, text = [], ''
+                for revision in revisions:
+                    text = revision.content if revision.is_snapshot else revision_delta.apply(text, revision.delta)
+                    texts.append(text)
+
+                previous = previous_text = None
+                for revision, text in zip(revisions, texts):
+                    cls._store(revision, text, previous, previous_text)
+                    previous, previous_text = revision, text
+
+                BlogPostRevision.objects.bulk_update(
+                    revisions,
+                    [
+                        'content', 'delta', 'is_snapshot', 'chain_depth',
+                        'content_length', 'size_delta', 'lines_added', 'lines_removed'
+                    ],
+                    batch_size=cls.BATCH_SIZE
+                )
+            rewritten += len(revisions)
+        if rewritten:
+            logger.info(f"Compacted {rewritten} blog post revisions")
+        return rewritten
+
+    @classmethod
+    def _store(cls, revision, text, previous, previous_text):
+        revision.content_length = len(text)
+        if previous is None:
+            revision.size_delta = len(text)
+            revision.lines_added, revision.lines_removed = len(text.splitlines()), 0
+        else:
+            operations = revision_delta.diff(previous_text, text)
+            revision.size_delta = len(text) - len(previous_text)
+            revision.lines_added, revision.lines_removed = revision_delta.line_counts(operations)
+            if cls._extends(previous):
+                delta = revision_delta.pack(operations)
+                if len(delta) < len(text.encode()) * cls.MAX_DELTA_RATIO:
+                    revision.is_snapshot = False
+                    revision.chain_depth = previous.chain_depth + 1
+                    revision.delta = delta
+                    revision.content = ''
+                    return
+        revision.is_snapshot = True
+        revision.chain_depth = 0
+        revision.delta = None
+        revision.content = text
+
+    @staticmethod
+    def _word_diff(old_text, new_text):
+        # Words and whitespace runs as separate tokens, so joining them restores the text
+        old_tokens = re.findall(r'\S+|\s+', old_text)
+        new_tokens = re.findall(r'\S+|\s+', new_text)
+        operations = []
+        matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                operations.append(['equal', ''.join(old_tokens[i1:i2])])
+                continue
+            if i2 > i1:
+                operations.append(['delete', ''.join(old_tokens[i1:i2])])
+            if j2 > j1:
+                operations.append(['insert', ''.join(new_tokens[j1:j2])])
+        return operations
+
+    @classmethod
+    def _extends(cls, previous):
+        """
+        Whether the revision after `previous` may be stored as a delta from it
+        """
+        return previous.chain_depth + 1 < cls._setting('SNAPSHOT_INTERVAL')
+
+    @classmethod
+    def _latest(cls, post_ids):
+        numbers = (
+            BlogPostRevision.objects.filter(post_id__in=post_ids).order_by().values('post_id')
+            .annotate(last=Max('revision_number')).values_list('post_id', 'last')
+        )
+        conditions = [Q(post_id=post_id, revision_number=number) for post_id, number in numbers]
+        if not conditions:
+            return {}
+        latest = BlogPostRevision.objects.filter(reduce(or_, conditions)).only(
+            'id', 'post', 'revision_number', 'chain_depth', 'is_snapshot'
+        )
+        return {revision.post_id: revision for revision in latest}
+
+    @classmethod
+    def _contents(cls, revisions):
+        """
+        Full texts keyed by (post_id, revision_number), from the cache or one query over the chains
+        """
+        keys = {
+            (revision.post_id, revision.revision_number): cls.CONTENT_CACHE_KEY.format(
+                post_id=revision.post_id, number=revision.revision_number
+            )
+            for revision in revisions
+        }
+        if not keys:
+            return {}
+        cached = cache.get_many(list(keys.values()))
+        contents = {wanted: cached[key] for wanted, key in keys.items() if key in cached}
+        missing = [revision for revision in revisions if (revision.post_id, revision.revision_number) not in contents]
+        if not missing:
+            return contents
+
+        chains = reduce(or_, [
+            Q(
+                post_id=revision.post_id,
+                revision_number__gte=revision.revision_number - revision.chain_depth,
+                revision_number__lte=revision.revision_number
+            )
+            for revision in missing
+        ])
+        rows = (
+            BlogPostRevision.objects.filter(chains).order_by('post_id', 'revision_number')
+            .values_list('post_id', 'revision_number', 'is_snapshot', 'content', 'delta')
+        )
+        texts = {}
+        text = ''
+        for post_id, number, is_snapshot, content, delta in rows:
+            text = content if is_snapshot else revision_delta.apply(text, delta)
+            texts[(post_id, number)] = text
+
+        fresh = {}
+        for revision in missing:
+            wanted = (revision.post_id, revision.revision_number)
+            contents[wanted] = texts[wanted]
+            fresh[keys[wanted]] = texts[wanted]
+        cache.set_many(fresh, timeout=cls._setting('CONTENT_CACHE_TIMEOUT'))
+        return contents
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_REVISION_{name}', cls.DEFAULTS[name])
@@ -0,0 +1,174 @@
+# blog/services/search_service.py
+
+import logging
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Q, Case, When, Value
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchQuery,
+    SearchRank,
+    SearchHeadline
+)
+from web_apis.blog.models.blog_models import BlogPost
+
+logger = logging.getLogger(__name__)
+
+
+class BlogSearchService:
+    """
+    Ranked full-text search over blog posts.
+    PostgreSQL uses the weighted BlogPost.search_vector column (GIN indexed);
+    SQLite uses an FTS5 shadow table so local development behaves the same way.
+    """
+    FTS_TABLE = 'blog_blogpost_fts'
+    HEADLINE_START = '<mark>'
+    HEADLINE_STOP = '</mark>'
+
+    @classmethod
+    def search_vector(cls):
+        config = cls._config()
+        return (
+            SearchVector('title', weight='A', config=config) +
+            SearchVector('excerpt', weight='B', config=config) +
+            SearchVector('content', weight='C', config=config)
+        )
+
+    @classmethod
+    def update_search_index(cls, post):
+        """
+        Refreshes the search document for one post
+        """
+        if connection.vendor == 'postgresql':
+            BlogPost.objects.filter(pk=post.pk).update(search_vector=cls.search_vector())
+        elif connection.vendor == 'sqlite':
+            cls._ensure_fts_table()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {cls.FTS_TABLE} WHERE post_id = %s", [post.pk.hex])
+                cursor.execute(
+                    f"INSERT INTO {cls.FTS_TABLE} (post_id, title, excerpt, content) VALUES (%s, %s, %s, %s)",
+                    [post.pk.hex, post.title, post.excerpt, post.content]
+                )
+
+    @classmethod
+    def remove_from_search_index(cls, post_id):
+        """
+        Drops the search document of a deleted post; on PostgreSQL it goes with the row
+        """
+        if connection.vendor == 'sqlite':
+            cls._ensure_fts_table()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {cls.FTS_TABLE} WHERE post_id = %s", [post_id.hex])
+
+    @classmethod
+    def rebuild_search_index(cls, batch_size=500):
+        """
+        Rebuilds the search document of every post, returns the number of posts indexed
+        """
+        if connection.vendor == 'postgresql':
+            return BlogPost.objects.update(search_vector=cls.search_vector())
+
+        if connection.vendor == 'sqlite':
+            # Also drops documents left behind by posts deleted without signals
+            cls._ensure_fts_table()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {cls.FTS_TABLE}")
+        count = 0
+        posts = BlogPost.objects.only('id', 'title', 'excerpt', 'content')
+        for post in posts.iterator(chunk_size=batch_size):
+            cls.update_search_index(post)
+            count += 1
+        return count
+
+    @classmethod
+    def search(cls, queryset, query):
+        """
+        Filters the queryset to posts matching the query, ordered by relevance.
+        Every result is annotated with search_rank and search_headline.
+        """
+        query = (query or '').strip()
+        if not query:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            return cls._search_postgres(queryset, query)
+        if connection.vendor == 'sqlite':
+            return cls._search_sqlite(queryset, query)
+
+        # Other backends: unranked substring match
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(excerpt__icontains=query) |
+            Q(content__icontains=query)
+        ).annotate(
+            search_rank=Value(0.0, output_field=models.FloatField()),
+            search_headline=models.F('excerpt')
+        )
+
+    @classmethod
+    def _search_postgres(cls, queryset, query):
+        config = cls._config()
+        search_query = SearchQuery(query, search_type='websearch', config=config)
+        return queryset.filter(
+            search_vector=search_query
+        ).annotate(
+            search_rank=SearchRank(models.F('search_vector'), search_query),
+            search_headline=SearchHeadline(
+                'content',
+                search_query,
+                config=config,
+                start_sel=cls.HEADLINE_START,
+                stop_sel=cls.HEADLINE_STOP,
+                max_words=35,
+                min_words=15
+            )
+        ).order_by('-search_rank', '-published_at')
+
+    @classmethod
+    def _search_sqlite(cls, queryset, query):
+        cls._ensure_fts_table()
+        # Quote every term so user input can never be parsed as FTS5 syntax
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+        limit = getattr(settings, 'BLOG_SEARCH_MAX_RESULTS', 500)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT post_id,
+                       bm25({cls.FTS_TABLE}, 0.0, 10.0, 4.0, 1.0),
+                       snippet({cls.FTS_TABLE}, 3, %s, %s, '...', 24)
+                FROM {cls.FTS_TABLE}
+                WHERE {cls.FTS_TABLE} MATCH %s
+                ORDER BY 2
+                LIMIT %s
+                """,
+                [cls.HEADLINE_START, cls.HEADLINE_STOP, match, limit]
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            return queryset.none()
+
+        # bm25() is lower-is-better; flip it so search_rank sorts like SearchRank
+        ranks = [When(id=post_id, then=Value(-score)) for post_id, score, _ in rows]
+        headlines = [When(id=post_id, then=Value(snippet)) for post_id, _, snippet in rows]
+        return queryset.filter(
+            id__in=[post_id for post_id, _, _ in rows]
+        ).annotate(
+            search_rank=Case(*ranks, output_field=models.FloatField()),
+            search_headline=Case(*headlines, output_field=models.TextField())
+        ).order_by('-search_rank', '-published_at')
+
+    @classmethod
+    def _ensure_fts_table(cls):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {cls.FTS_TABLE}
+                USING fts5(post_id UNINDEXED, title, excerpt, content, tokenize='porter unicode61')
+                """
+            )
+
+    @classmethod
+    def _config(cls):
+        return getattr(settings, 'BLOG_SEARCH_CONFIG', 'english')
@@ -0,0 +1,186 @@
+# blog/services/trending_service.py
+
+import logging
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, close_old_connections
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.analytics_models import PostView, TrendingScore
+from web_apis.blog.models.engagement_models import Like, PostReaction, Favorite
+from web_apis.blog.models.sharing_models import ShareTracking
+from web_apis.blog.query_plans import BlogPostQueryPlan
+from web_apis.blog.serializers.blog_serializers import BlogPostListSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class TrendingService:
+    """
+    Materializes time-decayed trending scores into TrendingScore.
+
+    Engagement inside the window is summed per post and hour in the database,
+    then every hourly bucket is weighted by its event type and decayed by
+    0.5 ** (age / half-life) with NumPy. The aggregation runs once per
+    interval in the compute_trending worker (one worker wins a cache lock);
+    requests only read the score table through the cached feed, which expires
+    after two intervals so every web process catches up without a shared cache.
+    """
+    FEED_CACHE_KEY = 'blog:trending:feed'
+    LOCK_CACHE_KEY = 'blog:trending:lock'
+
+    # (model, timestamp field, counter column, weight)
+    SOURCES = (
+        (PostView, 'viewed_at', 'views', 1.0),
+        (Like, 'created_at', 'likes', 3.0),
+        (PostReaction, 'created_at', 'reactions', 2.0),
+        (Favorite, 'created_at', 'favorites', 4.0),
+        (ShareTracking, 'shared_at', 'shares', 5.0),
+    )
+    DEFAULTS = {
+        'INTERVAL': 300,
+        'WINDOW_HOURS': 72,
+        'HALF_LIFE_HOURS': 24,
+        'SIZE': 20,
+    }
+
+    @classmethod
+    def compute(cls, now=None):
+        """
+        Recomputes every score and replaces the TrendingScore table, returns the number of posts scored
+        """
+        now = now or timezone.now()
+        events = cls._load_events(now - timedelta(hours=cls._setting('WINDOW_HOURS')))
+        scores = cls._score(events, now)
+
+        public_ids = set()
+        if not scores.empty:
+            public_ids = {
+                str(post_id) for post_id in BlogPost.objects.filter(
+                    id__in=list(scores.index),
+                    status=BlogPost.PostStatus.PUBLISHED,
+                    published_at__lte=now
+                ).values_list('id', flat=True)
+            }
+
+        rows = [
+            TrendingScore(
+                post_id=post_id,
+                score=round(float(row['score']), 6),
+                computed_at=now,
+                **{column: int(row[column]) for _, _, column, _ in cls.SOURCES}
+            )
+            for post_id, row in scores.iterrows()
+            if post_id in public_ids
+        ]
+        with transaction.atomic():
+            TrendingScore.objects.all().delete()
+            TrendingScore.objects.bulk_create(rows, batch_size=1000)
+
+        cache.delete(cls.FEED_CACHE_KEY)
+        logger.info(f"Trending scores computed for {len(rows)} posts")
+        return len(rows)
+
+    @classmethod
+    def refresh(cls):
+        """
+        Computes unless another worker already did within the current interval
+        """
+        interval = cls._setting('INTERVAL')
+        if not cache.add(cls.LOCK_CACHE_KEY, timezone.now().isoformat(), timeout=interval):
+            return False
+        cls.compute()
+        return True
+
+    @classmethod
+    def run_forever(cls, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                cls.refresh()
+            except Exception:
+                logger.error("Failed to compute trending scores", exc_info=True)
+            finally:
+                close_old_connections()
+            stop.wait(cls._setting('INTERVAL'))
+
+    @classmethod
+    def get_feed(cls, limit=None):
+        """
+        Serialized trending posts, rebuilt from the score table only when the cache is cold;
+        limit is clamped to 1..SIZE
+        """
+        size = cls._setting('SIZE')
+        limit = size if limit is None else max(1, min(limit, size))
+
+        feed = cache.get(cls.FEED_CACHE_KEY)
+        if feed is None:
+            feed = cls._build_feed(size)
+            cache.set(cls.FEED_CACHE_KEY, feed, timeout=cls._setting('INTERVAL') * 2)
+        return {'computed_at': feed['computed_at'], 'results': feed['results'][:limit]}
+
+    @classmethod
+    def _build_feed(cls, size):
+        scores = list(TrendingScore.objects.order_by('-score')[:size])
+        posts = BlogPostQueryPlan.list(BlogPost.objects.filter(id__in=[score.post_id for score in scores]))
+        posts = {post.id: post for post in posts}
+
+        results = []
+        for score in scores:
+            post = posts.get(score.post_id)
+            if post is None:
+                continue
+            data = BlogPostListSerializer(post).data
+            data['trending_score'] = score.score
+            results.append(data)
+        return {
+            'computed_at': scores[0].computed_at if scores else None,
+            'results': results,
+        }
+
+    @classmethod
+    def _load_events(cls, since):
+        """
+        Event counts per post, hour and source inside the window
+        """
+        frames = []
+        for model, timestamp, column, weight in cls.SOURCES:
+            rows = model.objects.filter(**{f'{timestamp}__gte': since}).annotate(
+                hour=TruncHour(timestamp)
+            ).order_by().values('post_id', 'hour').annotate(count=Count('id'))
+            frame = pd.DataFrame.from_records(list(rows), columns=['post_id', 'hour', 'count'])
+            frame['source'] = column
+            frame['weight'] = weight
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def _score(cls, events, now):
+        columns = ['score'] + [column for _, _, column, _ in cls.SOURCES]
+        if events.empty:
+            return pd.DataFrame(columns=columns)
+
+        events['post_id'] = events['post_id'].astype(str)
+        hour = pd.to_datetime(events['hour'], utc=True)
+        # Bucket midpoint age, in hours
+        age = (pd.Timestamp(now).tz_convert('UTC') - hour).dt.total_seconds().to_numpy() / 3600 - 0.5
+        decay = np.power(0.5, np.clip(age, 0, None) / cls._setting('HALF_LIFE_HOURS'))
+        events['score'] = events['count'].to_numpy() * events['weight'].to_numpy() * decay
+
+        totals = events.pivot_table(
+            index='post_id', columns='source', values='count', aggfunc='sum', fill_value=0
+        )
+        totals['score'] = events.groupby('post_id')['score'].sum()
+        return totals.reindex(columns=columns, fill_value=0).sort_values('score', ascending=False)
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_TRENDING_{name}', cls.DEFAULTS[name])
@@ -0,0 +1,419 @@
+# blog/services/upload_service.py
+
+import io
+import logging
+import mimetypes
+import zlib
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.core.validators import FileExtensionValidator
+from django.db import transaction
+from django.utils import timezone
+
+from web_apis.blog.models.content_models import ChunkedUpload
+from web_apis.blog.storage import BlobStorage
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetMismatch(ValueError):
+    """
+    A chunk was sent for an offset other than the upload's current one
+    """
+
+    def __init__(self, offset):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadLimitExceeded(ValueError):
+    """
+    The uploader already has as many unfinished uploads as allowed
+    """
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    At most `size` bytes of a request body, checksummed as they are read
+    """
+
+    def __init__(self, stream, size, checksum):
+        super().__init__()
+        self.stream = stream
+        self.size = size
+        self.received = 0
+        self.checksum = checksum
+        self.chunk_checksum = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        wanted = min(len(buffer), self.size - self.received)
+        if wanted <= 0:
+            return 0
+        data = self.stream.read(wanted)
+        read = len(data)
+        buffer[:read] = data
+        self.received += read
+        self.checksum = zlib.crc32(data, self.checksum)
+        self.chunk_checksum = zlib.crc32(data, self.chunk_checksum)
+        return read
+
+
+class _PartsReader(io.RawIOBase):
+    """
+    The stored parts of an upload read back-to-back as one file
+    """
+
+    def __init__(self, names, size):
+        super().__init__()
+        self.names = list(names)
+        self.size = size
+        self.current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return 0
+                self.current = default_storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        super().close()
+
+
+class ChunkedUploadService:
+    """
+    Resumable uploads of blog media, contact and service attachments.
+
+    start() registers an upload, write_chunk() stores the body of one PUT at
+    the upload's current offset as its own part file, and finalize() joins the
+    parts into the target FileField's storage and creates the attachment row.
+    Each request only carries one chunk, so no worker is held for a whole
+    transfer, and after a dropped connection the client asks for the offset
+    and resends from there. A running CRC32 of everything received is kept on
+    the upload and can be checked against the client's at finalize.
+
+    A client that sends the SHA-256 of the file with start() skips the
+    transfer when BlobStorage already holds that content: the upload is
+    complete (and attached, if it has an owner) right away.
+
+    Contact attachments have no owner yet while the form is being filled in,
+    they are attached by the contact submission (attach_many()). Anonymous
+    uploads are only allowed for them, and every uploader (user, or IP address
+    when anonymous) may have at most MAX_PENDING uploads that are not attached.
+    """
+    PARTS_DIR = 'uploads/parts'
+    TARGETS = {
+        'blog-media': {
+            'model': 'blog.MediaAttachment',
+            'field': 'upload',
+            'owner': 'post',
+            'max_size': None,
+        },
+        'contact-attachment': {
+            'model': 'contact.ContactAttachment',
+            'field': 'file',
+            'owner': 'contact',
+            'max_size': 10 * 1024 * 1024,
+        },
+        'service-attachment': {
+            'model': 'evigdia_services.ServiceAttachment',
+            'field': 'file',
+            'owner': 'service',
+            'max_size': 25 * 1024 * 1024,
+        },
+    }
+    MEDIA_TYPES = ('image', 'video', 'audio')
+    DEFAULTS = {
+        'CHUNK_SIZE': 8 * 1024 * 1024,
+        'MAX_SIZE': 512 * 1024 * 1024,
+        'EXPIRY': 86400,
+        'MAX_PENDING': 10,
+    }
+    PENDING_STATUSES = (
+        ChunkedUpload.Status.UPLOADING,
+        ChunkedUpload.Status.ASSEMBLING,
+        ChunkedUpload.Status.COMPLETE,
+    )
+
+    @classmethod
+    def start(cls, user, target, filename, size, owner_id='', content_type='', ip_address=None, sha256=None):
+        """
+        Registers a new upload after checking the target, size, file extension, owner
+        and the uploader's number of unfinished uploads; completes it at once when the
+        content with the given SHA-256 hex digest is already stored
+        """
+        if target not in cls.TARGETS:
+            raise ValueError(f"Unknown upload target '{target}', expected one of {', '.join(cls.TARGETS)}")
+        spec = cls.TARGETS[target]
+        if not filename:
+            raise ValueError("A filename is required")
+        max_size = min(spec['max_size'] or cls._setting('MAX_SIZE'), cls._setting('MAX_SIZE'))
+        if size <= 0 or size > max_size:
+            raise ValueError(f"File size must be between 1 and {max_size} bytes")
+
+        field = cls._field(target)
+        for validator in field.validators:
+            if isinstance(validator, FileExtensionValidator):
+                try:
+                    validator(File(None, name=filename))
+                except Exception as e:
+                    raise ValueError(' '.join(getattr(e, 'messages', [str(e)])))
+
+        cls._authorize(target, user, owner_id)
+        user = user if user is not None and user.is_authenticated else None
+        if user is not None:
+            pending = ChunkedUpload.objects.filter(user=user)
+        else:
+            pending = ChunkedUpload.objects.filter(user__isnull=True, ip_address=ip_address)
+        max_pending = cls._setting('MAX_PENDING')
+        if pending.filter(status__in=cls.PENDING_STATUSES).count() >= max_pending:
+            raise UploadLimitExceeded(
+                f"At most {max_pending} unfinished uploads are allowed, finish or cancel one first"
+            )
+
+        upload = ChunkedUpload(
+            user=user,
+            ip_address=ip_address,
+            target=target,
+            owner_id=str(owner_id or ''),
+            filename=filename,
+            content_type=content_type or mimetypes.guess_type(filename)[0] or '',
+            size=size,
+        )
+        stored = None
+        if sha256 and isinstance(field.storage, BlobStorage):
+            stored = field.storage.reference(sha256, field.generate_filename(field.model(), filename), size)
+        if stored:
+            upload.file, upload.offset, upload.status = stored, size, ChunkedUpload.Status.COMPLETE
+        upload.save()
+        if stored and upload.owner_id:
+            cls.attach(upload, upload.owner_id)
+        return upload
+
+    @classmethod
+    def get(cls, upload_id, user):
+        """
+        An upload its user may touch; uploads started anonymously are reached by id alone
+        """
+        upload = ChunkedUpload.objects.get(pk=upload_id)
+        if upload.user_id is not None and not (
+            user is not None and user.is_authenticated and (user.pk == upload.user_id or user.is_staff)
+        ):
+            raise PermissionDenied("You cannot access this upload")
+        return upload
+
+    @classmethod
+    def write_chunk(cls, upload, offset, stream, length, chunk_checksum=None):
+        """
+        Streams `length` bytes of the request body to a part file at the upload's offset.
+        Raises OffsetMismatch when offset is not where the upload stands.
+        """
+        if upload.status != ChunkedUpload.Status.UPLOADING:
+            raise ValueError("Upload is no longer accepting chunks")
+        if offset != upload.offset:
+            raise OffsetMismatch(upload.offset)
+        if length <= 0 or length > cls._setting('CHUNK_SIZE'):
+            raise ValueError(f"Chunk size must be between 1 and {cls._setting('CHUNK_SIZE')} bytes")
+        if offset + length > upload.size:
+            raise ValueError(f"Chunk would exceed the declared size of {upload.size} bytes")
+
+        reader = _ChunkReader(stream, length, upload.checksum)
+        name = default_storage.save(f'{cls.PARTS_DIR}/{upload.id}/{offset:012d}', File(reader))
+        if reader.received != length:
+            default_storage.delete(name)
+            raise ValueError(f"Chunk ended after {reader.received} of {length} bytes")
+        if chunk_checksum is not None and chunk_checksum != reader.chunk_checksum:
+            default_storage.delete(name)
+            raise ValueError("Chunk checksum does not match")
+
+        parts = upload.parts + [name]
+        # The offset condition makes concurrent writers of the same chunk lose cleanly
+        updated = ChunkedUpload.objects.filter(
+            pk=upload.pk, offset=offset, status=ChunkedUpload.Status.UPLOADING
+        ).update(offset=offset + length, checksum=reader.checksum, parts=parts, updated_at=timezone.now())
+        if not updated:
+            default_storage.delete(name)
+            upload.refresh_from_db(fields=['offset'])
+            raise OffsetMismatch(upload.offset)
+
+        upload.offset, upload.checksum, upload.parts = offset + length, reader.checksum, parts
+        return upload
+
+    @classmethod
+    def finalize(cls, upload, checksum=None):
+        """
+        Joins the parts into the target's storage and attaches the file when the upload has
+        an owner. A checksum (CRC32 of the whole file) mismatch discards the received data.
+        """
+        if upload.status in (ChunkedUpload.Status.COMPLETE, ChunkedUpload.Status.ATTACHED):
+            return upload
+        if not upload.is_complete:
+            raise OffsetMismatch(upload.offset)
+        if checksum is not None and checksum != upload.checksum:
+            cls._reset(upload)
+            raise ValueError("Upload checksum does not match, upload restarted from offset 0")
+
+        claimed = ChunkedUpload.objects.filter(
+            pk=upload.pk, status=ChunkedUpload.Status.UPLOADING
+        ).update(status=ChunkedUpload.Status.ASSEMBLING, updated_at=timezone.now())
+        if not claimed:
+            raise ValueError("Upload is already being finalized")
+
+        field = cls._field(upload.target)
+        try:
+            name = field.generate_filename(field.model(), upload.filename)
+            with _PartsReader(upload.parts, upload.size) as reader:
+                upload.file = field.storage.save(name, File(reader, name=upload.filename))
+        except Exception:
+            ChunkedUpload.objects.filter(pk=upload.pk).update(status=ChunkedUpload.Status.UPLOADING)
+            raise
+
+        cls._delete_parts(upload.parts)
+        upload.parts = []
+        upload.status = ChunkedUpload.Status.COMPLETE
+        upload.save(update_fields=['file', 'parts', 'status', 'updated_at'])
+        if upload.owner_id:
+            cls.attach(upload, upload.owner_id)
+        return upload
+
+    @classmethod
+    def attach(cls, upload, owner_id):
+        """
+        Creates the attachment row for a finalized upload, returns it (None if already attached)
+        """
+        spec = cls.TARGETS[upload.target]
+        model = apps.get_model(spec['model'])
+        with transaction.atomic():
+            claimed = ChunkedUpload.objects.filter(
+                pk=upload.pk, status=ChunkedUpload.Status.COMPLETE
+            ).update(status=ChunkedUpload.Status.ATTACHED, updated_at=timezone.now())
+            if not claimed:
+                return None
+            values = {f"{spec['owner']}_id": owner_id, spec['field']: upload.file}
+            if upload.target == 'blog-media':
+                values['created_by_id'] = upload.user_id
+                values['media_type'] = cls._media_type(upload.content_type)
+            attachment = model.objects.create(**values)
+            ChunkedUpload.objects.filter(pk=upload.pk).update(attachment_id=str(attachment.pk))
+        upload.status, upload.attachment_id = ChunkedUpload.Status.ATTACHED, str(attachment.pk)
+        return attachment
+
+    @classmethod
+    def ready(cls, upload_ids, target):
+        """
+        The finalized, unattached uploads for target among upload_ids
+        """
+        return ChunkedUpload.objects.filter(
+            pk__in=list(upload_ids), target=target, status=ChunkedUpload.Status.COMPLETE, owner_id=''
+        )
+
+    @classmethod
+    def attach_many(cls, upload_ids, target, owner_id):
+        """
+        Attaches the finalized, unattached uploads among upload_ids, returns the attachments
+        """
+        attachments = [cls.attach(upload, owner_id) for upload in cls.ready(upload_ids, target)]
+        return [attachment for attachment in attachments if attachment is not None]
+
+    @classmethod
+    def abort(cls, upload):
+        cls._delete_parts(upload.parts)
+        if upload.file and upload.status == ChunkedUpload.Status.COMPLETE:
+            cls._field(upload.target).storage.delete(upload.file)
+        upload.delete()
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Deletes the data of uploads untouched for EXPIRY seconds that were never attached,
+        returns the number of uploads removed
+        """
+        cutoff = timezone.now() - timedelta(seconds=cls._setting('EXPIRY'))
+        expired = ChunkedUpload.objects.filter(updated_at__lt=cutoff).exclude(
+            status=ChunkedUpload.Status.ATTACHED
+        )
+        count = 0
+        for upload in expired.iterator(chunk_size=500):
+            try:
+                cls.abort(upload)
+                count += 1
+            except Exception as e:
+                logger.error(f"Failed to purge upload {upload.pk}: {e}", exc_info=True)
+        # Attached uploads only linger as a record of where the file went
+        count += ChunkedUpload.objects.filter(
+            updated_at__lt=cutoff, status=ChunkedUpload.Status.ATTACHED
+        ).delete()[0]
+        if count:
+            logger.info(f"Purged {count} expired uploads")
+        return count
+
+    @classmethod
+    def _authorize(cls, target, user, owner_id):
+        authenticated = user is not None and user.is_authenticated
+        if target == 'contact-attachment':
+            if owner_id:
+                raise ValueError("Contact attachments are attached when the contact form is submitted")
+            return
+        if not authenticated:
+            raise PermissionDenied("Authentication is required for this upload")
+
+        if target == 'service-attachment' and not owner_id:
+            raise ValueError("A service is required for service attachments")
+        if not owner_id:
+            return
+        spec = cls.TARGETS[target]
+        owner_model = cls._field(target).model._meta.get_field(spec['owner']).related_model
+        owner = owner_model.objects.filter(pk=owner_id).first()
+        if owner is None:
+            raise ValueError(f"{owner_model._meta.verbose_name.capitalize()} {owner_id} does not exist")
+        owner_user_id = owner.author_id if target == 'blog-media' else owner.created_by_id
+        if owner_user_id != user.pk and not user.is_staff:
+            raise PermissionDenied("You cannot add attachments to this item")
+
+    @classmethod
+    def _reset(cls, upload):
+        cls._delete_parts(upload.parts)
+        upload.offset, upload.checksum, upload.parts = 0, 0, []
+        upload.save(update_fields=['offset', 'checksum', 'parts', 'updated_at'])
+
+    @staticmethod
+    def _delete_parts(names):
+        for name in names:
+            try:
+                default_storage.delete(name)
+            except Exception as e:
+                logger.warning(f"Failed to delete upload part {name}: {e}")
+
+    @classmethod
+    def _field(cls, target):
+        spec = cls.TARGETS[target]
+        return apps.get_model(spec['model'])._meta.get_field(spec['field'])
+
+    @classmethod
+    def _media_type(cls, content_type):
+        kind = content_type.split('/', 1)[0]
+        return kind if kind in cls.MEDIA_TYPES else 'document'
+
+    @classmethod
+    def _setting(cls, name):
+        return getattr(settings, f'BLOG_UPLOAD_{name}', cls.DEFAULTS[name])
@@ -0,0 +1,201 @@
+# blog/services/view_counter_service.py
+
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction, models, close_old_connections
+from web_apis.blog.models.blog_models import BlogPost
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# VIEW COUNT STORES
+# --------------------------
+
+class LocalViewCounterStore:
+    """
+    Process-local accumulator used when no shared Redis store is configured
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, post_id, amount=1):
+        with self._lock:
+            self._counts[str(post_id)] += amount
+            return self._counts[str(post_id)]
+
+    def get_many(self, post_ids):
+        with self._lock:
+            return {str(post_id): self._counts.get(str(post_id), 0) for post_id in post_ids}
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+    def restore(self, counts):
+        with self._lock:
+            self._counts.update(counts)
+
+
+class RedisViewCounterStore:
+    """
+    Shared accumulator kept in a Redis hash so every worker buffers into one place
+    """
+    KEY = 'blog:view_counts:pending'
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=5,
+            socket_connect_timeout=5
+        )
+
+    def incr(self, post_id, amount=1):
+        return int(self._client.hincrby(self.KEY, str(post_id), amount))
+
+    def get_many(self, post_ids):
+        keys = [str(post_id) for post_id in post_ids]
+        if not keys:
+            return {}
+        values = self._client.hmget(self.KEY, keys)
+        return {key: int(value or 0) for key, value in zip(keys, values)}
+
+    def drain(self):
+        # HGETALL + DEL in one MULTI so concurrent flushers never see the same increments
+        pipe = self._client.pipeline()
+        pipe.hgetall(self.KEY)
+        pipe.delete(self.KEY)
+        counts, _ = pipe.execute()
+        return {key.decode(): int(value) for key, value in counts.items()}
+
+    def restore(self, counts):
+        pipe = self._client.pipeline()
+        for post_id, amount in counts.items():
+            pipe.hincrby(self.KEY, post_id, amount)
+        pipe.execute()
+
+
+# --------------------------
+# VIEW COUNTER SERVICE
+# --------------------------
+
+class ViewCounterService:
+    _store = None
+    _flusher = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_store(cls):
+        """
+        Returns the configured store (Redis when REDIS_URL is set, otherwise process-local)
+        """
+        if cls._store is None:
+            with cls._lock:
+                if cls._store is None:
+                    redis_url = getattr(settings, 'REDIS_URL', None)
+                    if redis_url:
+                        cls._store = RedisViewCounterStore(redis_url)
+                    else:
+                        cls._store = LocalViewCounterStore()
+        return cls._store
+
+    @classmethod
+    def record_view(cls, post_id, amount=1):
+        """
+        Buffers a view and returns the number of views not yet persisted for the post
+        """
+        cls._ensure_flusher()
+        try:
+            return cls.get_store().incr(post_id, amount)
+        except Exception as e:
+            # Never fail a page view because the buffer is unavailable
+            logger.warning(f"View buffer unavailable, writing through: {str(e)}")
+            cls._apply({str(post_id): amount})
+            return 0
+
+    @classmethod
+    def get_buffered_counts(cls, post_ids):
+        """
+        Returns {post_id: pending views} for the given posts in one store round trip
+        """
+        try:
+            return cls.get_store().get_many(post_ids)
+        except Exception as e:
+            logger.warning(f"Could not read buffered view counts: {str(e)}")
+            return {}
+
+    @classmethod
+    def apply_buffered_counts(cls, posts):
+        """
+        Adds pending views on top of the persisted view_count of each post (display only)
+        """
+        posts = list(posts)
+        pending = cls.get_buffered_counts([post.id for post in posts])
+        for post in posts:
+            post.view_count += pending.get(str(post.id), 0)
+        return posts
+
+    @classmethod
+    def flush(cls):
+        """
+        Persists all buffered views as one F('view_count') + n UPDATE per post
+        """
+        store = cls.get_store()
+        counts = store.drain()
+        if not counts:
+            return 0
+        try:
+            cls._apply(counts)
+        except Exception:
+            store.restore(counts)
+            raise
+        return sum(counts.values())
+
+    @classmethod
+    def _apply(cls, counts):
+        with transaction.atomic():
+            # Sorted ids keep row-lock order stable across concurrent flushers
+            for post_id in sorted(counts):
+                BlogPost.objects.filter(id=post_id).update(
+                    view_count=models.F('view_count') + counts[post_id]
+                )
+
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher is not None:
+            return
+        with cls._lock:
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(
+                    target=cls._flush_forever,
+                    daemon=True,
+                    name="blog_view_counter"
+                )
+                cls._flusher.start()
+                atexit.register(cls._flush_quietly)
+                logger.info("Blog view counter flusher started")
+
+    @classmethod
+    def _flush_forever(cls):
+        interval = getattr(settings, 'BLOG_VIEW_COUNT_FLUSH_INTERVAL', 30)
+        event = threading.Event()
+        while not event.wait(interval):
+            cls._flush_quietly()
+            close_old_connections()
+
+    @classmethod
+    def _flush_quietly(cls):
+        try:
+            flushed = cls.flush()
+            if flushed:
+                logger.debug(f"Flushed {flushed} buffered post views")
+        except Exception:
+            logger.error("Failed to flush buffered post views", exc_info=True)
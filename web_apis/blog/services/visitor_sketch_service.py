@@ -0,0 +1,231 @@
+# blog/services/visitor_sketch_service.py
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+from web_apis.blog.hyperloglog import HyperLogLog
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.analytics_models import (
+    PostView,
+    PostDailyStats,
+    SiteDailyStats,
+    PostVisitorSketch,
+    SiteVisitorSketch
+)
+
+logger = logging.getLogger(__name__)
+
+
+class VisitorSketchService:
+    """
+    Unique-visitor counting with HyperLogLog sketches, one per post per day
+    plus one per day for the whole site.
+
+    Views are added to in-memory sketches and merged into the stored ones every
+    BLOG_VISITOR_SKETCH_FLUSH_INTERVAL seconds. Merging is a register-wise max,
+    so every worker can flush on its own without double counting.
+    """
+    _pending = {}
+    _lock = threading.Lock()
+    _flusher = None
+
+    @staticmethod
+    def visitor_key(user_id, ip_address):
+        # Signed-in readers are one visitor across devices, anonymous ones are told apart by IP
+        return f'user:{user_id}' if user_id else f'ip:{ip_address}'
+
+    @classmethod
+    def precision(cls):
+        return getattr(settings, 'BLOG_VISITOR_SKETCH_PRECISION', 12)
+
+    @classmethod
+    def error(cls):
+        return HyperLogLog(cls.precision()).error
+
+    @classmethod
+    def record(cls, post_id, visitor, viewed_at=None):
+        date = timezone.localdate(viewed_at) if viewed_at else timezone.localdate()
+        with cls._lock:
+            for key in ((str(post_id), date), (None, date)):
+                sketch = cls._pending.get(key)
+                if sketch is None:
+                    sketch = cls._pending[key] = HyperLogLog(cls.precision())
+                sketch.add(visitor)
+        cls._ensure_flusher()
+
+    @classmethod
+    def flush(cls):
+        """
+        Merges the buffered sketches into the stored ones, returns the number of sketches written
+        """
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+        if not pending:
+            return 0
+        try:
+            cls._merge(pending)
+        except Exception:
+            cls._restore(pending)
+            raise
+        return len(pending)
+
+    # Queries ---------------------------------------------------------------------------------
+    @classmethod
+    def unique_visitors(cls, start, end=None, post_id=None):
+        """
+        Distinct visitors over a date range, of one post or of the whole site
+        """
+        if post_id is None:
+            rows = SiteVisitorSketch.objects.filter(**cls._date_range(start, end))
+        else:
+            rows = PostVisitorSketch.objects.filter(post_id=post_id, **cls._date_range(start, end))
+        return cls._union(rows.values_list('sketch', flat=True)).count()
+
+    @classmethod
+    def unique_visitors_by_post(cls, post_ids, start, end=None):
+        """
+        {post_id: distinct visitors over the date range} for several posts at once
+        """
+        sketches = {}
+        rows = PostVisitorSketch.objects.filter(post_id__in=post_ids, **cls._date_range(start, end))
+        for post_id, data in rows.values_list('post_id', 'sketch').iterator():
+            sketch = HyperLogLog.from_bytes(data, cls.precision())
+            if post_id in sketches:
+                sketches[post_id].update(sketch)
+            else:
+                sketches[post_id] = sketch
+        return {post_id: sketch.count() for post_id, sketch in sketches.items()}
+
+    @classmethod
+    def daily_estimates(cls, dates):
+        """
+        Per post and site-wide unique visitors of each day, for the daily rollups
+        """
+        precision = cls.precision()
+        per_post = {
+            (post_id, date): HyperLogLog.from_bytes(data, precision).count()
+            for post_id, date, data in PostVisitorSketch.objects.filter(date__in=dates).values_list(
+                'post_id', 'date', 'sketch'
+            )
+        }
+        per_site = {
+            date: HyperLogLog.from_bytes(data, precision).count()
+            for date, data in SiteVisitorSketch.objects.filter(date__in=dates).values_list('date', 'sketch')
+        }
+        return per_post, per_site
+
+    @classmethod
+    def rebuild(cls, batch_size=5000):
+        """
+        Recreates every sketch from PostView, one day at a time, returns the number of views read
+        """
+        with transaction.atomic():
+            PostVisitorSketch.objects.all().delete()
+            SiteVisitorSketch.objects.all().delete()
+
+        count = 0
+        day, sketches = None, {}
+        views = PostView.objects.order_by('viewed_at').values_list('post_id', 'user_id', 'ip_address', 'viewed_at')
+        for post_id, user_id, ip_address, viewed_at in views.iterator(chunk_size=batch_size):
+            date = timezone.localdate(viewed_at)
+            if date != day and sketches:
+                cls._merge(sketches)
+                sketches = {}
+            day = date
+            visitor = cls.visitor_key(user_id, ip_address)
+            for key in ((str(post_id), date), (None, date)):
+                if key not in sketches:
+                    sketches[key] = HyperLogLog(cls.precision())
+                sketches[key].add(visitor)
+            count += 1
+        if sketches:
+            cls._merge(sketches)
+        return count
+
+    # Storage ---------------------------------------------------------------------------------
+    @classmethod
+    def _merge(cls, pending):
+        precision = cls.precision()
+        post_ids = {post_id for post_id, _ in pending if post_id is not None}
+        existing = {str(post_id) for post_id in BlogPost.objects.filter(id__in=post_ids).values_list('id', flat=True)}
+
+        with transaction.atomic():
+            # Sorted keys keep row-lock order stable across concurrent flushers
+            for post_id, date in sorted(pending, key=lambda key: (key[0] or '', key[1])):
+                if post_id is None:
+                    row, _ = SiteVisitorSketch.objects.select_for_update().get_or_create(
+                        date=date, defaults={'sketch': b''}
+                    )
+                    stats = SiteDailyStats.objects.filter(date=date)
+                elif post_id in existing:
+                    row, _ = PostVisitorSketch.objects.select_for_update().get_or_create(
+                        post_id=post_id, date=date, defaults={'sketch': b''}
+                    )
+                    stats = PostDailyStats.objects.filter(post_id=post_id, date=date)
+                else:
+                    # The post was deleted since the view was recorded
+                    continue
+
+                merged = HyperLogLog.from_bytes(row.sketch, precision).update(pending[(post_id, date)])
+                row.sketch = merged.to_bytes()
+                row.save(update_fields=['sketch', 'updated_at'])
+                stats.update(unique_visitors=merged.count())
+
+    @classmethod
+    def _restore(cls, pending):
+        with cls._lock:
+            for key, sketch in pending.items():
+                if key in cls._pending:
+                    cls._pending[key].update(sketch)
+                else:
+                    cls._pending[key] = sketch
+
+    @classmethod
+    def _union(cls, blobs):
+        precision = cls.precision()
+        return HyperLogLog.union((HyperLogLog.from_bytes(data, precision) for data in blobs), precision)
+
+    @staticmethod
+    def _date_range(start, end):
+        date_range = {'date__gte': start}
+        if end is not None:
+            date_range['date__lte'] = end
+        return date_range
+
+    # Background flushing ---------------------------------------------------------------------
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher is not None:
+            return
+        with cls._lock:
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(
+                    target=cls._flush_forever,
+                    daemon=True,
+                    name="blog_visitor_sketches"
+                )
+                cls._flusher.start()
+                atexit.register(cls._flush_quietly)
+                logger.info("Blog visitor sketch flusher started")
+
+    @classmethod
+    def _flush_forever(cls):
+        interval = getattr(settings, 'BLOG_VISITOR_SKETCH_FLUSH_INTERVAL', 60)
+        event = threading.Event()
+        while not event.wait(interval):
+            cls._flush_quietly()
+            close_old_connections()
+
+    @classmethod
+    def _flush_quietly(cls):
+        try:
+            flushed = cls.flush()
+            if flushed:
+                logger.debug(f"Merged {flushed} visitor sketches")
+        except Exception:
+            logger.error("Failed to merge visitor sketches", exc_info=True)
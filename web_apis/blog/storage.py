@@ -0,0 +1,130 @@
+# blog/storage.py
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils.deconstruct import deconstructible
+
+# Keep this module free of model imports, models of every app use blob_storage
+
+
+@deconstructible
+class BlobStorage(FileSystemStorage):
+    """
+    Content-addressed file storage: every distinct file is kept once.
+
+    Saving hashes the content while it is written to a temporary file, which
+    then becomes blobs/<aa>/<sha256>.blob, or is dropped when that blob
+    already exists. Blobs are keyed on the content alone, the same bytes
+    under another name or extension share the blob. The name handed back to
+    the model is blobs/<aa>/<sha256>/<original filename>, so attachments keep
+    their file names and extensions while sharing the bytes; every other
+    method maps it back to the blob. Names saved before this storage was used
+    are passed through as is. reference() hands out such a name for content
+    that is already stored, without any bytes being sent.
+
+    delete() leaves blobs alone since other rows may share them, unreferenced
+    blobs are removed by manage.py collect_blobs (see BlobService).
+    """
+    BLOB_DIR = 'blobs'
+    TEMP_DIR = 'blobs/tmp'
+    # Image variants live in a directory named after the digest, the suffix keeps the blob beside it
+    BLOB_SUFFIX = '.blob'
+    NAME_PATTERN = re.compile(r'^blobs/([0-9a-f]{2})/([0-9a-f]{64})/([^/]+)$')
+    BLOB_PATTERN = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.blob$')
+    DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+    MAX_FILENAME_LENGTH = 150
+
+    @classmethod
+    def blob_name(cls, name):
+        """
+        Stored blob behind a file name, the name itself for names that are not blob names
+        """
+        match = cls.NAME_PATTERN.match(name or '')
+        if match is None:
+            return name
+        prefix, digest, _ = match.groups()
+        return f'{cls.BLOB_DIR}/{prefix}/{digest}{cls.BLOB_SUFFIX}'
+
+    @classmethod
+    def is_blob(cls, name):
+        return bool(cls.BLOB_PATTERN.match(name or ''))
+
+    def path(self, name):
+        return super().path(self.blob_name(name))
+
+    def url(self, name):
+        return super().url(self.blob_name(name))
+
+    def delete(self, name):
+        if self.NAME_PATTERN.match(name or ''):
+            return
+        super().delete(name)
+
+    def get_available_name(self, name, max_length=None):
+        # _save picks the final name from the content, collisions are the point
+        return name
+
+    def reference(self, digest, name, size=None):
+        """
+        File name for content already stored under its SHA-256 hex digest, saved as `name`;
+        None when no such blob exists (or its size differs), then the bytes have to be sent
+        """
+        digest = (digest or '').lower()
+        if not self.DIGEST_PATTERN.match(digest):
+            return None
+        stored = self._stored_name(digest, name)
+        blob_path = self.path(stored)
+        try:
+            if size is not None and os.path.getsize(blob_path) != size:
+                return None
+            # Reused, collect_blobs must not take it away before the row exists
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return None
+        return stored
+
+    def _stored_name(self, digest, name):
+        # Stays within the 255 characters of the file columns
+        root, extension = os.path.splitext(os.path.basename(name))
+        filename = root[:self.MAX_FILENAME_LENGTH - len(extension)] + extension
+        return f'{self.BLOB_DIR}/{digest[:2]}/{digest}/{filename}'
+
+    def _save(self, name, content):
+        temp_dir = super().path(self.TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(handle, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+            stored = self._stored_name(digest.hexdigest(), name)
+            blob_path = self.path(stored)
+            if os.path.exists(blob_path):
+                # Already stored, the duplicate costs no disk space; the touch
+                # keeps collect_blobs from deleting a blob that was just reused
+                os.unlink(temp_path)
+                os.utime(blob_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, blob_path)
+            return stored
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+def blob_storage():
+    """
+    Storage of the file and image fields shared through BlobStorage, settings.STORAGES['blobs']
+    """
+    return storages['blobs']
@@ -0,0 +1,88 @@
+# blog/testing.py
+
+from contextlib import contextmanager
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@contextmanager
+def assert_num_queries(expected, using='default'):
+    """
+    Fails with the captured SQL unless exactly `expected` queries run in the block.
+
+        with assert_num_queries(BlogPostQueryPlan.LIST_QUERIES):
+            client.get('/api/blog/posts/')
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed != expected:
+        queries = '\n'.join(
+            f"{number}. {query['sql']}"
+            for number, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(f"{executed} queries executed, {expected} expected:\n{queries}")
+
+
+def assert_page_queries(client, url, expected, using='default'):
+    """
+    Requests one page and asserts it cost a fixed number of queries
+    """
+    with assert_num_queries(expected, using=using):
+        response = client.get(url)
+    return response
+
+
+# Queued analytics writes and image variants run inline, API requests are not redirected to HTTPS
+BLOG_TEST_SETTINGS = {
+    'BLOG_EVENT_QUEUE_SYNC': True,
+    'BLOG_IMAGE_SYNC': True,
+    'SECURE_SSL_REDIRECT': False,
+}
+
+
+def create_user(username, **kwargs):
+    """
+    Creates a user named `username` with an example.com address and the password 'secret'
+    """
+    kwargs.setdefault('email', f'{username}@example.com')
+    kwargs.setdefault('password', 'secret')
+    return get_user_model().objects.create_user(username=username, **kwargs)
+
+
+class BlogTestMixin:
+    """
+    Shared helpers of the blog test cases
+    """
+
+    @staticmethod
+    def create_user(username, **kwargs):
+        return create_user(username, **kwargs)
+
+    def api_client(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def patch_attributes(self, target, **attributes):
+        """
+        Replaces class attributes for the test, e.g. a service's buffer store and flusher thread
+        """
+        patcher = mock.patch.multiple(target, **attributes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(**BLOG_TEST_SETTINGS)
+class BlogTestCase(BlogTestMixin, TestCase):
+    pass
+
+
+@override_settings(**BLOG_TEST_SETTINGS)
+class BlogTransactionTestCase(BlogTestMixin, TransactionTestCase):
+    pass
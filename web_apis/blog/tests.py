@@ -1,3 +1,1366 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import numpy as np
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from web_apis.blog import archive, images, revision_delta
+from web_apis.blog.hyperloglog import HyperLogLog
+from web_apis.blog.models import (
+    BlogPost, BlogPostRevision, Category, Tag, PostSimilarity, ChunkedUpload, AdminNotification,
+    Subscription, NewsletterRun, NewsletterBatch, ReadHistory, PostDailyStats, SiteDailyStats, SearchQuery,
+    PostView, ReadEvent, Notification, Like, AdminActivityLog, Comment, Favorite, PostReaction, CommentReaction
+)
+from web_apis.blog.query_plans import BlogPostQueryPlan
+from web_apis.blog.services.analytics_rollup_service import AnalyticsRollupService
+from web_apis.blog.services.comment_tree_service import CommentTreeService
+from web_apis.blog.services.engagement_counter_service import EngagementCounterService
+from web_apis.blog.services.event_queue_service import EventQueueService
+from web_apis.blog.services.image_variant_service import ImageVariantService
+from web_apis.blog.services.newsletter_service import NewsletterService
+from web_apis.blog.services.notification_digest_service import NotificationDigestService
+from web_apis.blog.services.notification_service import NotificationService
+from web_apis.blog.services.upload_service import ChunkedUploadService, UploadLimitExceeded
+from web_apis.blog.services.search_service import BlogSearchService
+from web_apis.blog.services.trending_service import TrendingService
+from web_apis.blog.services.publishing_service import PublishingService
+from web_apis.blog.services.reaction_histogram_service import ReactionHistogramService
+from web_apis.blog.services.related_posts_service import RelatedPostsService, RelatedPostsIndex
+from web_apis.blog.services.retention_service import RetentionService
+from web_apis.blog.services.revision_service import RevisionService
+from web_apis.blog.services.reading_progress_service import ReadingProgressService, LocalReadingProgressStore
+from web_apis.blog.storage import BlobStorage, blob_storage
+from web_apis.blog.services.view_counter_service import ViewCounterService, LocalViewCounterStore
+from web_apis.blog.services.visitor_sketch_service import VisitorSketchService
+from web_apis.blog.testing import BlogTestCase, BlogTransactionTestCase, assert_num_queries, assert_page_queries
+from web_apis.contact.validators.contact_validator import ContactValidator
+
+
+class StubEmailAPI(ThreadingHTTPServer):
+    """
+    Local stand-in for the transactional email API, records every request body.
+    Answers with the queued `statuses` first, then 201.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                with server.lock:
+                    server.requests.append((dict(self.headers), json.loads(body)))
+                    status = server.statuses.pop(0) if server.statuses else 201
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(b'{"messageIds": []}')
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v3/smtp/email'
+
+
+# Batches are sent from worker threads with their own connections, so the data must be committed
+class NewsletterServiceTests(BlogTransactionTestCase):
+
+    def setUp(self):
+        self.api = StubEmailAPI()
+        threading.Thread(target=self.api.serve_forever, daemon=True).start()
+        self.addCleanup(self.api.server_close)
+        self.addCleanup(self.api.shutdown)
+
+        author = self.create_user('author')
+        self.python = Category.objects.create(name='Python')
+        Category.objects.create(name='Cooking')
+        self.post = BlogPost.objects.create(
+            author=author, title='Profiling Django', excerpt='Where the time goes', content='...'
+        )
+        self.post.categories.add(self.python)
+
+    def subscribe(self, email, preferences=None, **kwargs):
+        kwargs.setdefault('is_confirmed', True)
+        return Subscription.objects.create(
+            email=email, token=f'token-{email}', preferences=preferences or {}, **kwargs
+        )
+
+    def test_publishing_sends_batched_newsletter_to_matching_subscribers(self):
+        html = [self.subscribe(f'reader{number}@example.com') for number in range(3)]
+        html.append(self.subscribe('python@example.com', {'categories': ['python']}))
+        text = self.subscribe('plain@example.com', {'categories': ['python', 'cooking'], 'format': 'text'})
+        self.subscribe('cooking@example.com', {'categories': ['cooking']})
+        self.subscribe('pending@example.com', is_confirmed=False)
+        self.subscribe('gone@example.com', is_active=False)
+
+        with override_settings(
+            BLOG_NEWSLETTER_API_URL=self.api.url,
+            BLOG_NEWSLETTER_BATCH_SIZE=2,
+            BLOG_NEWSLETTER_WORKERS=2,
+            BREVO_API_KEY='test-key',
+            FRONTEND_URL='https://blog.example.com',
+            EMAIL_SENDER_NAME='Blog',
+            EMAIL_SENDER_EMAIL='blog@example.com'
+        ):
+            self.post.status = BlogPost.PostStatus.PUBLISHED
+            self.post.save()
+            self.assertTrue(NewsletterRun.objects.filter(post=self.post).exists())
+
+            self.assertEqual(NewsletterService.run_pending(), 1)
+
+        run = NewsletterRun.objects.get(post=self.post)
+        self.assertEqual(run.status, NewsletterRun.Status.COMPLETED)
+        self.assertEqual((run.total_recipients, run.sent_count, run.failed_count), (5, 5, 0))
+        self.assertEqual(run.progress, 100.0)
+
+        # 4 html subscribers in batches of 2, the text subscriber in its own batch
+        batches = list(run.batches.order_by('number'))
+        self.assertEqual([(batch.variant, len(batch.subscription_ids)) for batch in batches],
+                         [('html', 2), ('html', 2), ('text', 1)])
+        self.assertTrue(all(batch.status == NewsletterBatch.Status.SENT for batch in batches))
+
+        # One API call per batch, every recipient exactly once with their own unsubscribe link
+        self.assertEqual(len(self.api.requests), 3)
+        recipients = {}
+        for headers, payload in self.api.requests:
+            self.assertEqual(headers['api-key'], 'test-key')
+            self.assertEqual(payload['subject'], 'Profiling Django')
+            self.assertLessEqual(len(payload['messageVersions']), 2)
+            for version in payload['messageVersions']:
+                email = version['to'][0]['email']
+                recipients[email] = ('textContent' in payload, version['params']['unsubscribe_url'])
+        expected = {subscription.email: False for subscription in html}
+        expected[text.email] = True
+        self.assertEqual({email: is_text for email, (is_text, _) in recipients.items()}, expected)
+        self.assertEqual(
+            recipients[text.email][1], f'https://blog.example.com/newsletter/unsubscribe?token={text.token}'
+        )
+
+        # A second pass finds nothing to send
+        self.assertEqual(NewsletterService.run_pending(), 0)
+        self.assertEqual(len(self.api.requests), 3)
+
+    def send(self):
+        with override_settings(BLOG_NEWSLETTER_API_URL=self.api.url, BREVO_API_KEY='test-key'):
+            self.post.status = BlogPost.PostStatus.PUBLISHED
+            self.post.save()
+            NewsletterService.run_pending()
+        return NewsletterRun.objects.get(post=self.post)
+
+    def test_a_batch_the_api_may_have_accepted_is_not_sent_twice(self):
+        self.subscribe('reader@example.com')
+        self.api.statuses = [503]
+
+        run = self.send()
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(run.status, NewsletterRun.Status.FAILED)
+        self.assertEqual((run.sent_count, run.failed_count), (0, 1))
+        self.assertEqual(run.batches.get().status, NewsletterBatch.Status.FAILED)
+
+    def test_a_rate_limited_batch_is_sent_again(self):
+        self.subscribe('reader@example.com')
+        self.api.statuses = [429]
+
+        run = self.send()
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual(run.status, NewsletterRun.Status.COMPLETED)
+        self.assertEqual((run.sent_count, run.failed_count), (1, 0))
+
+
+@override_settings(BLOG_READ_PROGRESS_COMPLETE_PERCENT=90)
+class ReadingProgressServiceTests(BlogTestCase):
+
+    def setUp(self):
+        self.reader = self.create_user('reader')
+        author = self.create_user('author')
+        self.post = BlogPost.objects.create(author=author, title='Profiling Django', content='word ' * 50)
+        self.patch_attributes(ReadingProgressService, _store=LocalReadingProgressStore(), _flusher=True)
+
+    def record(self, position, percentage, seen_at):
+        with mock.patch('time.time', return_value=seen_at):
+            ReadingProgressService.record(self.reader.id, self.post.id, position, percentage)
+
+    def test_completion_follows_the_furthest_percentage_read(self):
+        # Pixel positions far above the word count must not complete the read on their own
+        self.record(1200, 40.0, 1_000_000)
+        self.record(600, 20.0, 1_000_010)
+        self.assertEqual(ReadingProgressService.flush(), 1)
+
+        history = ReadHistory.objects.get(user=self.reader, post=self.post)
+        self.assertEqual((history.scroll_position, history.read_percentage), (600, 40))
+        self.assertFalse(history.is_completed)
+        self.assertEqual(history.last_read_at, datetime.fromtimestamp(1_000_010, tz=dt_timezone.utc))
+
+        self.record(2900, 95.0, 1_000_020)
+        ReadingProgressService.flush()
+        history.refresh_from_db()
+        self.assertTrue(history.is_completed)
+        self.assertEqual((history.read_percentage, history.read_count), (95, 1))
+        self.assertEqual(history.last_read_at, datetime.fromtimestamp(1_000_020, tz=dt_timezone.utc))
+
+
+class CommentThreadTests(BlogTestCase):
+
+    def setUp(self):
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+        self.readers = [self.create_user(f'reader{number}') for number in range(3)]
+        self.client = self.api_client(self.readers[0])
+        self.addCleanup(cache.delete, CommentTreeService.CACHE_KEY.format(post_id=self.post.pk))
+        start = timezone.now() - timedelta(hours=1)
+        self.moment = iter(start + timedelta(minutes=minute) for minute in range(100))
+
+    def comment(self, parent=None, approved=True, user=0):
+        comment = Comment.objects.create(
+            post=self.post, user=self.readers[user], parent=parent, content='A thoughtful comment', is_approved=approved
+        )
+        Comment.objects.filter(pk=comment.pk).update(created_at=next(self.moment))
+        return comment
+
+    def thread(self, **params):
+        response = self.client.get(f'/api/blog/posts/{self.post.slug}/comments/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_a_thread_loads_in_one_query_with_reply_counts(self):
+        first = self.comment()
+        reply = self.comment(parent=first, user=1)
+        self.comment(parent=reply, user=2)
+        self.comment(parent=first, user=2)
+        hidden = self.comment(approved=False)
+        self.comment(parent=hidden, user=1)
+
+        with assert_num_queries(1):
+            roots = CommentTreeService.load(self.post.pk)
+        with assert_num_queries(0):
+            data = CommentTreeService._serialize(roots)
+        self.assertEqual([root['id'] for root in data], [str(first.pk)])
+        self.assertEqual(data[0]['replies_count'], 2)
+        self.assertEqual(data[0]['children'][0]['replies_count'], 1)
+        self.assertEqual(data[0]['children'][0]['user']['username'], 'reader1')
+
+    def test_roots_are_paged_and_the_cached_thread_follows_new_comments(self):
+        roots = [self.comment() for _ in range(3)]
+        page = self.thread(page_size=2)
+        self.assertEqual([root['id'] for root in page['results']], [str(root.pk) for root in roots[:2]])
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        self.assertEqual([root['id'] for root in self.thread(page_size=2, cursor=cursor)['results']], [str(roots[2].pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reply = self.comment(parent=roots[0], user=1)
+        self.assertEqual(self.thread()['results'][0]['children'][0]['id'], str(reply.pk))
+
+
+class EngagementCounterTests(BlogTestCase):
+
+    def setUp(self):
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+        self.readers = [self.create_user(f'reader{number}') for number in range(2)]
+
+    def counters(self):
+        return BlogPost.objects.filter(pk=self.post.pk).values(*EngagementCounterService.COUNTERS).get()
+
+    def test_counters_follow_creates_and_deletes(self):
+        likes = [Like.objects.create(user=reader, post=self.post) for reader in self.readers]
+        Favorite.objects.create(user=self.readers[0], post=self.post)
+        PostReaction.objects.create(user=self.readers[1], post=self.post, reaction=PostReaction.ReactionType.WOW)
+        likes[0].delete()
+        self.assertEqual(
+            self.counters(), {'comment_count': 0, 'like_count': 1, 'reaction_count': 1, 'favorite_count': 1}
+        )
+
+    def test_only_approved_comments_that_are_not_spam_count(self):
+        comment = Comment.objects.create(post=self.post, user=self.readers[0], content='A thoughtful comment')
+        self.assertEqual(self.counters()['comment_count'], 0)
+        for is_approved, is_spam, expected in ((True, False, 1), (True, True, 0), (True, False, 1)):
+            comment.is_approved, comment.is_spam = is_approved, is_spam
+            comment.save()
+            self.assertEqual(self.counters()['comment_count'], expected)
+        # A comment loaded without its flags is reconciled instead of guessed
+        Comment.objects.only('id', 'post').get(pk=comment.pk).delete()
+        self.assertEqual(self.counters()['comment_count'], 0)
+
+    def test_reconcile_repairs_drift_with_one_grouped_query_per_table(self):
+        Like.objects.create(user=self.readers[0], post=self.post)
+        BlogPost.objects.filter(pk=self.post.pk).update(like_count=7, favorite_count=3)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(EngagementCounterService.reconcile(), 1)
+        grouped = [query for query in context.captured_queries if 'GROUP BY' in query['sql']]
+        self.assertEqual(len(grouped), len(EngagementCounterService.COUNTERS))
+        self.assertEqual((self.counters()['like_count'], self.counters()['favorite_count']), (1, 0))
+
+
+class ReactionHistogramTests(BlogTestCase):
+
+    def setUp(self):
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.post = BlogPost.objects.create(
+            author=self.create_user('author'), title='Profiling Django', content='...',
+            status=BlogPost.PostStatus.PUBLISHED
+        )
+        self.readers = [self.create_user(f'reader{number}') for number in range(3)]
+
+    def histogram(self, model=BlogPost, pk=None):
+        return model.objects.values_list('reaction_counts', flat=True).get(pk=pk or self.post.pk)
+
+    def test_post_histogram_follows_create_change_and_delete(self):
+        reactions = [
+            PostReaction.objects.create(user=reader, post=self.post, reaction=PostReaction.ReactionType.LIKE)
+            for reader in self.readers
+        ]
+        self.assertEqual(self.histogram(), {'like': 3})
+
+        reactions[0].reaction = PostReaction.ReactionType.WOW
+        reactions[0].save()
+        reactions[1].delete()
+        self.assertEqual(self.histogram(), {'like': 1, 'wow': 1})
+
+        response = self.api_client(self.readers[0]).get('/api/blog/posts/')
+        self.assertEqual(response.data['results'][0]['reaction_counts'], {'like': 1, 'wow': 1})
+
+    def test_comment_histogram_and_rebuild(self):
+        comment = Comment.objects.create(post=self.post, user=self.readers[0], content='A thoughtful comment')
+        for reader in self.readers[:2]:
+            CommentReaction.objects.create(user=reader, comment=comment, reaction=CommentReaction.ReactionType.HEART)
+        self.assertEqual(self.histogram(Comment, comment.pk), {'heart': 2})
+
+        BlogPost.objects.filter(pk=self.post.pk).update(reaction_counts={'sad': 4})
+        self.assertEqual(ReactionHistogramService.rebuild(), 1)
+        self.assertEqual(self.histogram(), {})
+        self.assertEqual(self.histogram(Comment, comment.pk), {'heart': 2})
+
+
+class ViewCounterServiceTests(BlogTestCase):
+
+    def setUp(self):
+        self.store = LocalViewCounterStore()
+        self.patch_attributes(ViewCounterService, _store=self.store, _flusher=True)
+        self.patch_attributes(VisitorSketchService, _pending={}, _flusher=True)
+        author = self.create_user('author')
+        self.posts = [
+            BlogPost.objects.create(
+                author=author, title=f'Post {number}', content='...', status=BlogPost.PostStatus.PUBLISHED
+            )
+            for number in range(2)
+        ]
+
+    def view_counts(self):
+        return [BlogPost.objects.get(pk=post.pk).view_count for post in self.posts]
+
+    def test_views_are_flushed_as_one_update_per_post(self):
+        for post, views in zip(self.posts, (3, 2)):
+            for _ in range(views):
+                ViewCounterService.record_view(post.pk)
+        self.assertEqual(self.view_counts(), [0, 0])
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(ViewCounterService.flush(), 5)
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.view_counts(), [3, 2])
+        self.assertEqual(self.store.drain(), {})
+
+    def test_a_failed_flush_keeps_the_views(self):
+        ViewCounterService.record_view(self.posts[0].pk)
+        with mock.patch.object(ViewCounterService, '_apply', side_effect=RuntimeError("database gone")):
+            with self.assertRaises(RuntimeError):
+                ViewCounterService.flush()
+        ViewCounterService.record_view(self.posts[0].pk)
+        self.assertEqual(ViewCounterService.flush(), 2)
+        self.assertEqual(self.view_counts(), [2, 0])
+
+    def test_the_detail_page_shows_buffered_views_without_writing_them(self):
+        client = self.api_client(self.create_user('reader'))
+        for expected in (1, 2):
+            with mock.patch.object(BlogPost, 'save', side_effect=AssertionError("a view saved the post")):
+                response = client.get(f'/api/blog/posts/{self.posts[0].slug}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['view_count'], expected)
+        self.assertEqual(self.view_counts(), [0, 0])
+
+
+class EventQueueTests(BlogTestCase):
+
+    def setUp(self):
+        self.reader = self.create_user('reader')
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+
+    def test_rows_are_queued_after_commit_and_never_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Like.objects.create(user=self.reader, post=self.post)
+                raise RuntimeError("rolled back")
+        self.assertFalse(AdminActivityLog.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.reader, post=self.post)
+        self.assertEqual(
+            list(AdminActivityLog.objects.values_list('activity_type', 'user', 'post')),
+            [(AdminActivityLog.ActivityType.LIKE, self.reader.pk, self.post.pk)]
+        )
+        self.assertEqual(Notification.objects.get().user_id, self.post.author_id)
+
+    @override_settings(BLOG_EVENT_QUEUE_SYNC=False, BLOG_EVENT_BATCH_SIZE=2)
+    def test_queued_rows_are_written_in_batches(self):
+        # No worker thread, the queue is drained from here
+        self.patch_attributes(EventQueueService, _queue=queue.Queue(), _worker=True)
+        for _ in range(5):
+            EventQueueService.enqueue(AdminActivityLog(
+                activity_type=AdminActivityLog.ActivityType.POST_VIEW, post=self.post, ip_address='203.0.113.1'
+            ))
+        self.assertFalse(AdminActivityLog.objects.exists())
+
+        bulk_create = AdminActivityLog.objects.bulk_create
+        with mock.patch.object(AdminActivityLog.objects, 'bulk_create', wraps=bulk_create) as write:
+            self.assertEqual(EventQueueService.flush(), 5)
+        write.assert_called_once()
+        self.assertEqual(write.call_args.kwargs['batch_size'], 2)
+        self.assertEqual(AdminActivityLog.objects.count(), 5)
+
+
+class BlogPostQueryCountTests(BlogTestCase):
+    """
+    A page costs the same number of queries whether it holds one post or many
+    """
+
+    def setUp(self):
+        self.author = self.create_user('author')
+        self.client = self.api_client(self.author)
+        self.categories = [Category.objects.create(name=name) for name in ('Python', 'Django')]
+        self.tags = [Tag.objects.create(name=name) for name in ('orm', 'performance')]
+
+        # Buffered views stay in memory, the flusher would outlive the test database
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+
+    def create_posts(self, number):
+        posts = []
+        for index in range(number):
+            post = BlogPost.objects.create(
+                author=self.author,
+                title=f'Post {index} of {number}',
+                content='...',
+                status=BlogPost.PostStatus.PUBLISHED
+            )
+            post.categories.set(self.categories)
+            post.tags.set(self.tags)
+            posts.append(post)
+        return posts
+
+    def test_list_queries_do_not_grow_with_the_page(self):
+        for number in (1, 6):
+            self.create_posts(number)
+            response = assert_page_queries(self.client, '/api/blog/posts/', BlogPostQueryPlan.LIST_QUERIES)
+            self.assertEqual(response.status_code, 200)
+
+    def test_cursor_list_queries_do_not_grow_with_the_page(self):
+        for number in (1, 6):
+            self.create_posts(number)
+            response = assert_page_queries(
+                self.client, '/api/blog/posts/?pagination=cursor', BlogPostQueryPlan.LIST_CURSOR_QUERIES
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_detail_queries_do_not_grow_with_related_posts(self):
+        post, *others = self.create_posts(4)
+        post.related_posts.set(others)
+        PostSimilarity.objects.bulk_create(
+            PostSimilarity(post=post, similar_post=other, rank=rank, score=1 / rank)
+            for rank, other in enumerate(others, start=1)
+        )
+        for snippet in range(3):
+            post.code_snippets.create(language='python', code=f'print({snippet})')
+        response = assert_page_queries(self.client, f'/api/blog/posts/{post.slug}/', BlogPostQueryPlan.DETAIL_QUERIES)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['related_posts']), 3)
+        self.assertEqual(len(response.data['similar_posts']), 3)
+
+
+@override_settings(BLOG_RELATED_POSTS_TOP_K=2)
+class RelatedPostsServiceTests(BlogTestCase):
+
+    TEXTS = {
+        'profiling': 'Profiling Django queries with the database profiler',
+        'indexes': 'Database indexes that make Django queries fast',
+        'roses': 'Pruning roses in the spring garden',
+        'tulips': 'Planting tulips in the autumn garden',
+    }
+
+    def setUp(self):
+        self.patch_attributes(RelatedPostsService, _index=None)
+        cache.delete(RelatedPostsService.MODEL_KEY)
+        self.addCleanup(cache.delete, RelatedPostsService.MODEL_KEY)
+        author = self.create_user('author')
+        self.posts = {
+            name: BlogPost.objects.create(
+                author=author, title=text, content=text,
+                status=BlogPost.PostStatus.PUBLISHED, published_at=timezone.now() - timedelta(hours=1)
+            )
+            for name, text in self.TEXTS.items()
+        }
+        RelatedPostsService.rebuild()
+
+    def neighbours(self, name):
+        return [
+            similarity.similar_post_id
+            for similarity in PostSimilarity.objects.filter(post=self.posts[name]).order_by('rank')
+        ]
+
+    def test_patched_index_scores_like_a_fresh_one(self):
+        model = RelatedPostsService._model()
+        vectors = RelatedPostsService._vectors(model)
+        patched = RelatedPostsIndex(vectors)
+        changed = str(self.posts['roses'].pk)
+        vectors[changed] = vectors[str(self.posts['profiling'].pk)]
+        patched.update({changed: vectors[changed]})
+        patched.remove([str(self.posts['tulips'].pk)])
+        del vectors[str(self.posts['tulips'].pk)]
+
+        fresh = RelatedPostsIndex(vectors)
+        for post_id in vectors:
+            expected = dict(zip(fresh.post_ids, fresh.scores(post_id, 0.7, 0.3)))
+            actual = dict(zip(patched.post_ids, patched.scores(post_id, 0.7, 0.3)))
+            for other_id in vectors:
+                self.assertAlmostEqual(float(actual[other_id]), float(expected[other_id]), places=5)
+
+    def test_an_update_loads_only_the_changed_posts(self):
+        self.assertEqual(self.neighbours('profiling')[0], self.posts['indexes'].pk)
+        roses = self.posts['roses']
+        BlogPost.objects.filter(pk=roses.pk).update(content='Django database queries profiler indexes')
+
+        with mock.patch.object(RelatedPostsService, '_vectors', side_effect=AssertionError("full reload")), \
+                mock.patch.object(RelatedPostsService, '_load_posts', wraps=RelatedPostsService._load_posts) as load:
+            RelatedPostsService.update_posts([roses.pk])
+            BlogPost.objects.filter(pk=self.posts['tulips'].pk).update(status=BlogPost.PostStatus.ARCHIVED)
+            RelatedPostsService.update_posts([self.posts['tulips'].pk])
+        for (posts,), _ in load.call_args_list:
+            self.assertLessEqual(posts.count(), 1)
+
+        self.assertIn(roses.pk, self.neighbours('profiling'))
+        self.assertFalse(PostSimilarity.objects.filter(similar_post=self.posts['tulips']).exists())
+        self.assertFalse(PostSimilarity.objects.filter(post=self.posts['tulips']).exists())
+
+
+class RevisionDeltaTests(SimpleTestCase):
+
+    def test_apply_rebuilds_the_target_exactly(self):
+        texts = (
+            '', 'one line', 'one line\n', 'first\nsecond\nthird',
+            'first\r\nsecond\r\nthird\r\n', 'first\r\nchanged\nthird', '\n\n\n',
+        )
+        for base in texts:
+            for target in texts:
+                with self.subTest(base=base, target=target):
+                    self.assertEqual(revision_delta.apply(base, revision_delta.encode(base, target)), target)
+
+
+class RevisionHistoryTests(BlogTestCase):
+
+    def setUp(self):
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.author = self.create_user('author')
+        self.client = self.api_client(self.author)
+        self.post = BlogPost.objects.create(author=self.author, title='Profiling Django', content='')
+        for content in ('first line\nsecond line\n', 'first line\nsecond line, edited\nthird line\n'):
+            self.post.content = content
+            RevisionService.create(self.post, 'Edit')
+        self.addCleanup(cache.clear)
+
+    def test_history_never_loads_content(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/blog/posts/{self.post.slug}/revisions/')
+        self.assertEqual(response.status_code, 200)
+        latest = response.data[0]
+        self.assertNotIn('content', latest)
+        self.assertEqual((latest['revision_number'], latest['lines_added'], latest['lines_removed']), (2, 2, 1))
+        revision_queries = [query['sql'] for query in context.captured_queries if 'blogpostrevision' in query['sql']]
+        self.assertTrue(revision_queries)
+        for sql in revision_queries:
+            self.assertNotIn('"content"', sql)
+            self.assertNotIn('"delta"', sql)
+
+    def test_diffs_are_computed_once_per_revision_pair_and_mode(self):
+        path = f'/api/blog/posts/{self.post.slug}/revision-diff/'
+        response = self.client.get(path, {'from': 1, 'to': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('-second line\n+second line, edited\n+third line\n', response.data['diff'])
+
+        words = self.client.get(path, {'from': 1, 'to': 2, 'mode': 'words'}).data['diff']
+        self.assertEqual(''.join(text for op, text in words if op != 'insert'), 'first line\nsecond line\n')
+        self.assertEqual(
+            ''.join(text for op, text in words if op != 'delete'), 'first line\nsecond line, edited\nthird line\n'
+        )
+        with assert_num_queries(0):
+            RevisionService.diff(self.post.pk, 1, 2, 'words')
+
+        self.assertEqual(self.client.get(path, {'from': 1, 'to': 2, 'mode': 'html'}).status_code, 400)
+        self.assertEqual(self.client.get(path, {'from': 1, 'to': 9}).status_code, 404)
+        self.assertEqual(self.client.get(path, {'from': 1}).status_code, 400)
+
+
+@override_settings(BLOG_REVISION_SNAPSHOT_INTERVAL=3)
+class RevisionChainTests(BlogTestCase):
+
+    def setUp(self):
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='')
+        self.texts = []
+        lines = [f'Paragraph {number} about where the time goes in a request.\n' for number in range(40)]
+        for number in range(8):
+            lines[number] = f'Paragraph {number}, revised in edit {number}.\n'
+            # The last edit drops the final newline
+            self.post.content = ''.join(lines).rstrip('\n') if number == 7 else ''.join(lines)
+            self.texts.append(self.post.content)
+            RevisionService.create(self.post, f'Edit {number}')
+
+    def revisions(self):
+        return list(BlogPostRevision.objects.filter(post=self.post).order_by('revision_number'))
+
+    def assertContents(self):
+        cache.clear()
+        self.assertEqual([RevisionService.content(revision) for revision in self.revisions()], self.texts)
+
+    def test_every_chain_depth_rebuilds_its_text(self):
+        revisions = self.revisions()
+        self.assertEqual([revision.chain_depth for revision in revisions], [0, 1, 2, 0, 1, 2, 0, 1])
+        self.assertEqual(
+            [revision.is_snapshot for revision in revisions], [depth == 0 for depth in [0, 1, 2, 0, 1, 2, 0, 1]]
+        )
+        self.assertContents()
+
+    def test_compact_keeps_the_text_of_full_copies(self):
+        # Revisions written before deltas hold the full text each
+        for revision, text in zip(self.revisions(), self.texts):
+            BlogPostRevision.objects.filter(pk=revision.pk).update(
+                is_snapshot=True, chain_depth=0, delta=None, content=text
+            )
+        self.assertEqual(RevisionService.compact([self.post.pk]), len(self.texts))
+        self.assertEqual([revision.chain_depth for revision in self.revisions()], [0, 1, 2, 0, 1, 2, 0, 1])
+        self.assertContents()
+
+
+class SparseFieldsetTests(BlogTestCase):
+
+    def setUp(self):
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.author = self.create_user('author', first_name='Ada')
+        self.client = self.api_client(self.author)
+        self.tag = Tag.objects.create(name='performance')
+        post = BlogPost.objects.create(
+            author=self.author, title='Profiling Django', content='A long body ' * 500,
+            status=BlogPost.PostStatus.PUBLISHED
+        )
+        post.tags.add(self.tag)
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if 'results' in response.data else response.data
+        return results, ' '.join(query['sql'] for query in context.captured_queries)
+
+    def test_only_the_requested_fields_are_rendered_and_loaded(self):
+        results, sql = self.get('/api/blog/posts/', fields='id,title,slug')
+        self.assertEqual(set(results[0]), {'id', 'title', 'slug'})
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"rendered_content"', sql)
+
+    def test_unexpanded_relations_collapse_to_primary_keys(self):
+        results, _ = self.get('/api/blog/posts/', fields='id,author,tags', expand='author')
+        self.assertEqual(results[0]['author']['first_name'], 'Ada')
+        self.assertEqual(results[0]['tags'], [self.tag.pk])
+
+    def test_categories_and_tags_take_the_same_parameters(self):
+        Category.objects.create(name='Python')
+        for path in ('/api/blog/categories/', '/api/blog/tags/'):
+            results, _ = self.get(path, fields='id,name')
+            self.assertEqual(set(results[0]), {'id', 'name'}, path)
+
+
+@override_settings(BLOG_UPLOAD_MAX_PENDING=2)
+class ChunkedUploadLimitTests(BlogTestCase):
+
+    def start(self, ip_address, filename='cv.pdf', size=1024):
+        return ChunkedUploadService.start(None, 'contact-attachment', filename, size, ip_address=ip_address)
+
+    def test_unfinished_uploads_are_capped_per_address(self):
+        first = self.start('203.0.113.1')
+        self.start('203.0.113.1')
+        with self.assertRaises(UploadLimitExceeded):
+            self.start('203.0.113.1')
+        # Other addresses have their own allowance, and an attached upload no longer counts
+        self.start('203.0.113.2')
+        ChunkedUpload.objects.filter(pk=first.pk).update(status=ChunkedUpload.Status.ATTACHED)
+        self.start('203.0.113.1')
+
+    def test_contact_form_accepts_only_finished_uploads_within_the_limits(self):
+        finished = self.start('203.0.113.1')
+        ChunkedUpload.objects.filter(pk=finished.pk).update(status=ChunkedUpload.Status.COMPLETE)
+        unfinished = self.start('203.0.113.1')
+
+        self.assertEqual(ContactValidator.validate_uploads([str(finished.pk)]), ([finished.pk], None))
+        self.assertIsNotNone(ContactValidator.validate_uploads([str(finished.pk), str(unfinished.pk)])[1])
+        self.assertIsNotNone(ContactValidator.validate_uploads(['not-an-id'])[1])
+        self.assertIsNotNone(
+            ContactValidator.validate_uploads([str(finished.pk)], file_count=ContactValidator.MAX_ATTACHMENTS)[1]
+        )
+
+
+    def test_finalize_rejects_a_checksum_that_is_not_hex(self):
+        upload = self.start('203.0.113.1')
+        for checksum in (12345, 'not-hex', [1]):
+            response = self.api_client().post(
+                f'/api/blog/uploads/{upload.pk}/finalize/', {'checksum': checksum}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, checksum)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ChunkedUpload.Status.UPLOADING)
+
+@override_settings(BLOG_ADMIN_NOTIFICATION_WINDOW=900)
+class NotificationDigestServiceTests(BlogTestCase):
+
+    def share(self, post_id, moment):
+        return AdminNotification(
+            notification_type=AdminNotification.NotificationType.SHARE,
+            title='New share',
+            message=f'Shared at {moment:%H:%M}',
+            metadata={'post_id': post_id},
+            created_at=moment,
+        )
+
+    def test_events_are_windowed_by_their_own_time_not_the_write_time(self):
+        start = datetime(2026, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        post_id = '3f1d3a52-55c4-4a8a-bb39-8fd4a3a5fe10'
+        # Written long after they happened, in one batch spanning two windows
+        NotificationDigestService.write([
+            self.share(post_id, start.replace(minute=2)),
+            self.share(post_id, start.replace(minute=9)),
+            self.share(post_id, start.replace(minute=16)),
+        ])
+
+        rows = list(AdminNotification.objects.order_by('window_start'))
+        self.assertEqual(
+            [(row.window_start, row.count, row.created_at, row.last_event_at, row.message) for row in rows],
+            [
+                (start, 2, start.replace(minute=2), start.replace(minute=9), 'Shared at 12:09'),
+                (start.replace(minute=15), 1, start.replace(minute=16), start.replace(minute=16), 'Shared at 12:16'),
+            ]
+        )
+
+        # A late event of the first window merges into it without moving last_event_at back
+        NotificationDigestService.write([self.share(post_id, start.replace(minute=5))])
+        rows[0].refresh_from_db()
+        self.assertEqual((rows[0].count, rows[0].last_event_at), (3, start.replace(minute=9)))
+
+
+@override_settings(BLOG_NOTIFICATION_CACHE_COUNTERS=True)
+class NotificationCounterTests(BlogTestCase):
+
+    def setUp(self):
+        self.user = self.create_user('reader')
+        self.client = self.api_client(self.user)
+        for key in (NotificationService.USER_KEY.format(user_id=self.user.id), NotificationService.ADMIN_KEY):
+            cache.delete(key)
+            self.addCleanup(cache.delete, key)
+
+    def notify(self, model=Notification, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(notification_type='comment', message='New comment', **kwargs)
+
+    def test_counter_follows_creates_and_reads(self):
+        self.assertEqual(NotificationService.unread_count(self.user.id), 0)
+        first, second, third = (self.notify(user=self.user) for _ in range(3))
+        Notification.objects.filter(pk=third.pk).update(created_at=timezone.now() + timedelta(hours=1))
+        with assert_num_queries(0):
+            self.assertEqual(NotificationService.unread_count(self.user.id), 3)
+
+        for _ in range(2):
+            # Reading an already read notification changes nothing
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/api/blog/notifications/{first.pk}/read/')
+            self.assertEqual(NotificationService.unread_count(self.user.id), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/blog/notifications/read-all/', {'until': timezone.now().isoformat()}, format='json'
+            )
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(NotificationService.unread_count(self.user.id), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/blog/notifications/read-all/', {}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+        with assert_num_queries(0):
+            self.assertEqual(NotificationService.unread_count(self.user.id), 0)
+
+    def test_marking_everything_read_is_one_update(self):
+        for _ in range(3):
+            self.notify(user=self.user)
+            self.notify(model=AdminNotification, title='New comment')
+        with assert_num_queries(1):
+            self.assertEqual(NotificationService.mark_all_read(self.user.id, until=timezone.now()), 3)
+        with assert_num_queries(1):
+            self.assertEqual(NotificationService.admin_mark_all_read(), 3)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+        self.assertFalse(AdminNotification.objects.filter(is_read=False).exists())
+
+    @override_settings(BLOG_NOTIFICATION_CACHE_COUNTERS=None)
+    def test_a_per_process_cache_keeps_no_counter(self):
+        self.notify(user=self.user)
+        for _ in range(2):
+            with assert_num_queries(1):
+                self.assertEqual(NotificationService.unread_count(self.user.id), 1)
+        self.assertIsNone(cache.get(NotificationService.USER_KEY.format(user_id=self.user.id)))
+
+
+class BlobStorageTests(BlogTestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = blob_storage()
+
+    def test_identical_content_is_one_blob_whatever_the_extension(self):
+        notes = self.storage.save('notes.txt', ContentFile(b'same bytes'))
+        readme = self.storage.save('readme.md', ContentFile(b'same bytes'))
+
+        self.assertNotEqual(notes, readme)
+        self.assertTrue(readme.endswith('/readme.md'))
+        self.assertEqual(BlobStorage.blob_name(notes), BlobStorage.blob_name(readme))
+        self.assertTrue(BlobStorage.is_blob(BlobStorage.blob_name(readme)))
+        with self.storage.open(readme) as stored:
+            self.assertEqual(stored.read(), b'same bytes')
+
+    def test_upload_of_stored_content_skips_the_transfer(self):
+        content = b'%PDF-1.4 curriculum vitae'
+        self.storage.save('earlier.pdf', ContentFile(content))
+        digest = hashlib.sha256(content).hexdigest()
+
+        upload = ChunkedUploadService.start(
+            None, 'contact-attachment', 'cv.pdf', len(content), ip_address='203.0.113.1', sha256=digest
+        )
+        self.assertEqual((upload.status, upload.offset), (ChunkedUpload.Status.COMPLETE, len(content)))
+        self.assertTrue(upload.file.endswith('/cv.pdf'))
+        with self.storage.open(upload.file) as stored:
+            self.assertEqual(stored.read(), content)
+
+        # Unknown content, or a size that does not match, has to be sent
+        for sha256, size in ((hashlib.sha256(b'other').hexdigest(), len(content)), (digest, len(content) + 1)):
+            upload = ChunkedUploadService.start(
+                None, 'contact-attachment', 'cv.pdf', size, ip_address='203.0.113.1', sha256=sha256
+            )
+            self.assertEqual((upload.status, upload.offset), (ChunkedUpload.Status.UPLOADING, 0))
+
+
+class ImageVariantServiceTests(BlogTestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        # Publishing indexes the posts for related posts, the index must not outlive the test's rows
+        self.patch_attributes(RelatedPostsService, _index=None)
+        self.addCleanup(cache.delete, RelatedPostsService.MODEL_KEY)
+        self.author = self.create_user('author')
+
+    @staticmethod
+    def png(width, height):
+        output = io.BytesIO()
+        Image.new('RGB', (width, height), (200, 40, 40)).save(output, 'PNG')
+        return output.getvalue()
+
+    def create_post(self, title, data):
+        post = BlogPost(
+            author=self.author, title=title, content='Body', status=BlogPost.PostStatus.PUBLISHED,
+            published_at=timezone.now()
+        )
+        post.featured_image.save('cover.png', ContentFile(data), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        return post
+
+    def test_variants_are_rendered_once_per_distinct_image(self):
+        data = self.png(1000, 500)
+        post = self.create_post('Cover', data)
+
+        manifest = post.featured_image_variants
+        self.assertEqual(manifest['source'], post.featured_image.name)
+        self.assertEqual((manifest['width'], manifest['height']), (1000, 500))
+        # Never upscaled: the widest copy is the original width
+        for kind in ('webp', 'jpeg'):
+            self.assertEqual([width for width, _ in manifest['files'][kind]], [320, 640, 960, 1000])
+        self.assertTrue(default_storage.exists(manifest['thumbnail']))
+
+        # Same bytes under another post: the stored manifest is reused, nothing is rendered
+        with mock.patch.object(images, 'render_variants', wraps=images.render_variants) as render:
+            copy = self.create_post('Copy', data)
+        render.assert_not_called()
+        self.assertEqual(copy.featured_image_variants['files'], manifest['files'])
+
+        # Listings link the 640px JPEG, the detail gets the srcsets
+        item = next(
+            item for item in self.api_client(self.author).get('/api/blog/posts/').data['results']
+            if item['slug'] == post.slug
+        )
+        self.assertTrue(item['featured_image'].endswith('jpeg-640.jpg'))
+        srcset = self.api_client(self.author).get(f'/api/blog/posts/{post.slug}/').data['featured_image_variants']
+        self.assertIn(' 1000w', srcset['srcset']['webp'])
+
+    def test_removing_the_image_drops_its_variants(self):
+        post = self.create_post('Cover', self.png(400, 300))
+        self.assertTrue(post.featured_image_variants)
+
+        post.featured_image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.featured_image_variants, {})
+        self.assertIsNone(ImageVariantService.urls(post.featured_image_variants))
+
+
+class BlogSearchServiceTests(BlogTestCase):
+
+    def indexed(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {BlogSearchService.FTS_TABLE} WHERE post_id = %s", [post_id.hex])
+            return cursor.fetchone()[0]
+
+    def test_deleting_a_post_removes_its_search_document(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("PostgreSQL keeps the search document on the post row")
+        author = self.create_user('author')
+        post = BlogPost.objects.create(author=author, title='Profiling Django', content='Where the time goes')
+        post_id = post.pk
+        self.assertEqual(self.indexed(post_id), 1)
+        self.assertEqual(BlogSearchService.search(BlogPost.objects.all(), 'profiling').count(), 1)
+
+        post.delete()
+        self.assertEqual(self.indexed(post_id), 0)
+
+
+@override_settings(BLOG_TRENDING_SIZE=3)
+class TrendingFeedTests(BlogTestCase):
+
+    def setUp(self):
+        # The feed is served from this cached value
+        cache.set(TrendingService.FEED_CACHE_KEY, {'computed_at': None, 'results': [{'rank': rank} for rank in range(3)]})
+        self.addCleanup(cache.delete, TrendingService.FEED_CACHE_KEY)
+
+        self.client = self.api_client(self.create_user('reader'))
+
+    def test_limit_must_be_a_positive_integer(self):
+        for limit in ('0', '-5', 'ten'):
+            response = self.client.get('/api/blog/posts/trending/', {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+
+    def test_limit_is_capped_at_the_feed_size(self):
+        for limit, expected in (('1', 1), ('50', 3), (None, 3)):
+            response = self.client.get('/api/blog/posts/trending/', {'limit': limit} if limit else {})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), expected)
+        self.assertEqual(len(TrendingService.get_feed(limit=-2)['results']), 1)
+
+    def test_reading_the_feed_never_computes_scores(self):
+        cache.delete(TrendingService.FEED_CACHE_KEY)
+        with mock.patch.object(TrendingService, 'compute') as compute:
+            feed = TrendingService.get_feed()
+        compute.assert_not_called()
+        self.assertEqual(feed['results'], [])
+        self.assertNotIn('blog_trending', [thread.name for thread in threading.enumerate()])
+
+
+class FeedVersionTests(BlogTestCase):
+
+    def setUp(self):
+        self.post = BlogPost.objects.create(
+            author=self.create_user('author'), title='Profiling Django', content='...',
+            status=BlogPost.PostStatus.PUBLISHED, published_at=timezone.now() - timedelta(hours=1)
+        )
+        self.category = Category.objects.create(name='Performance')
+
+    def fetch(self, path='/api/blog/feeds/rss/', etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(path, **headers)
+
+    def test_a_change_made_by_another_process_retires_the_cached_feed(self):
+        response = self.fetch()
+        etag = response['ETag']
+        self.assertEqual(self.fetch(etag=etag).status_code, 304)
+
+        # A queryset update runs no signals, as a write from another worker never reaches this process
+        BlogPost.objects.filter(pk=self.post.pk).update(
+            title='Profiling Django, revisited', updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        response = self.fetch(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Profiling Django, revisited', response.content.decode())
+
+    def test_deleting_a_post_changes_the_stamp(self):
+        etag = self.fetch()['ETag']
+        BlogPost.objects.filter(pk=self.post.pk).delete()
+        response = self.fetch(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Profiling Django', response.content.decode())
+
+    def test_adding_a_post_to_a_category_changes_its_feed(self):
+        path = f'/api/blog/feeds/category/{self.category.slug}/atom/'
+        etag = self.fetch(path)['ETag']
+        self.post.categories.add(self.category)
+        response = self.fetch(path, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Profiling Django', response.content.decode())
+
+
+class HyperLogLogTests(SimpleTestCase):
+
+    def sketch(self, values, precision=12):
+        sketch = HyperLogLog(precision)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def test_estimates_stay_within_three_standard_errors(self):
+        for size in (10, 1000, 50000):
+            sketch = self.sketch(f'visitor-{number}' for number in range(size))
+            self.assertLessEqual(abs(sketch.count() - size), max(1, 3 * sketch.error * size), size)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_merging_counts_the_union(self):
+        first = self.sketch(f'visitor-{number}' for number in range(0, 6000))
+        second = self.sketch(f'visitor-{number}' for number in range(4000, 10000))
+        merged = HyperLogLog.union([first, second])
+        self.assertLessEqual(abs(merged.count() - 10000), 3 * merged.error * 10000)
+        with self.assertRaises(ValueError):
+            first.update(HyperLogLog(10))
+
+    def test_sparse_and_dense_layouts_round_trip(self):
+        for size, layout in ((50, HyperLogLog.SPARSE), (20000, HyperLogLog.DENSE)):
+            sketch = self.sketch(f'visitor-{number}' for number in range(size))
+            data = sketch.to_bytes()
+            self.assertEqual(data[0], layout)
+            restored = HyperLogLog.from_bytes(data)
+            self.assertTrue(np.array_equal(restored.registers, sketch.registers))
+            self.assertEqual(restored.count(), sketch.count())
+        self.assertEqual(HyperLogLog.from_bytes(b'').count(), 0)
+        for corrupt in (bytes([9, 12]), bytes([HyperLogLog.DENSE, 12, 0, 0])):
+            with self.assertRaises(ValueError):
+                HyperLogLog.from_bytes(corrupt)
+
+
+@override_settings(TIME_ZONE='UTC')
+class VisitorSketchServiceTests(BlogTestCase):
+
+    def setUp(self):
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.patch_attributes(VisitorSketchService, _pending={}, _flusher=True)
+        author = self.create_user('author')
+        self.posts = [
+            BlogPost.objects.create(author=author, title=f'Post {number}', content='...') for number in range(2)
+        ]
+        self.days = [datetime(2026, 3, day, 12, tzinfo=dt_timezone.utc) for day in (1, 2)]
+
+    def record(self):
+        # Visitors 0-29 read the first post on both days, 20-39 the second one on the second day
+        for day in self.days:
+            for number in range(30):
+                VisitorSketchService.record(self.posts[0].pk, f'ip:visitor-{number}', day)
+        for number in range(20, 40):
+            VisitorSketchService.record(self.posts[1].pk, f'ip:visitor-{number}', self.days[1])
+        return VisitorSketchService.flush()
+
+    def test_flushed_sketches_answer_range_and_per_post_queries(self):
+        first, second = (day.date() for day in self.days)
+        self.assertEqual(self.record(), 5)
+        # Merging the same visitors again counts nobody twice
+        self.record()
+
+        self.assertEqual(VisitorSketchService.unique_visitors(first, second), 40)
+        self.assertEqual(VisitorSketchService.unique_visitors(first, first), 30)
+        self.assertEqual(VisitorSketchService.unique_visitors(first, second, post_id=self.posts[0].pk), 30)
+        self.assertEqual(
+            VisitorSketchService.unique_visitors_by_post([post.pk for post in self.posts], second),
+            {self.posts[0].pk: 30, self.posts[1].pk: 20}
+        )
+        per_post, per_site = VisitorSketchService.daily_estimates([first, second])
+        self.assertEqual(per_post[(self.posts[1].pk, second)], 20)
+        self.assertEqual(per_site, {first: 30, second: 40})
+
+    def test_rebuild_reads_the_stored_views(self):
+        reader = self.create_user('reader')
+        for day, user, ip_address in (
+            (self.days[0], reader, '203.0.113.1'),
+            (self.days[0], reader, '203.0.113.2'),
+            (self.days[0], None, '203.0.113.1'),
+            (self.days[1], None, '203.0.113.1'),
+        ):
+            view = PostView.objects.create(post=self.posts[0], user=user, ip_address=ip_address)
+            PostView.objects.filter(pk=view.pk).update(viewed_at=day)
+
+        self.assertEqual(VisitorSketchService.rebuild(), 4)
+        first, second = (day.date() for day in self.days)
+        # The signed-in reader counts once from either address
+        self.assertEqual(VisitorSketchService.unique_visitors(first, first), 2)
+        self.assertEqual(VisitorSketchService.unique_visitors(first, second), 2)
+
+
+@override_settings(BLOG_READ_PROGRESS_COMPLETE_PERCENT=90, BLOG_READ_PROGRESS_SESSION_GAP=1800)
+class ReadRollupTests(BlogTestCase):
+
+    def setUp(self):
+        self.reader = self.create_user('reader')
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+        self.patch_attributes(ReadingProgressService, _store=LocalReadingProgressStore(), _flusher=True)
+        self.start = datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc)
+
+    def read(self, minute, percentage):
+        seen_at = (self.start + timedelta(minutes=minute)).timestamp()
+        with mock.patch('time.time', return_value=seen_at):
+            ReadingProgressService.record(self.reader.id, self.post.id, 100, percentage)
+        ReadingProgressService.flush()
+
+    def rollup(self, minute):
+        AnalyticsRollupService.run(until=self.start + timedelta(minutes=minute))
+
+    def totals(self):
+        stats = PostDailyStats.objects.get(post=self.post)
+        return stats.reads, stats.completed_reads
+
+    def test_a_session_spanning_several_runs_counts_once(self):
+        # One session touched on every run, completed halfway, touched again after completing
+        for minute, percentage in ((0, 10.0), (1, 50.0), (2, 95.0), (3, 100.0)):
+            self.read(minute, percentage)
+            self.rollup(minute)
+        self.assertEqual(self.totals(), (1, 1))
+
+        # A second session after the gap is a new read, completing again is not
+        self.read(60, 20.0)
+        self.read(61, 99.0)
+        self.rollup(61)
+        self.assertEqual(self.totals(), (2, 1))
+        self.assertEqual(ReadHistory.objects.get(user=self.reader, post=self.post).read_count, 2)
+
+        # Rebuilding from scratch gives the same numbers as the incremental runs
+        AnalyticsRollupService.reset()
+        self.rollup(61)
+        self.assertEqual(self.totals(), (2, 1))
+        self.assertEqual(SiteDailyStats.objects.get(date=self.start.date()).reads, 2)
+
+
+@override_settings(BLOG_ARCHIVE_RETENTION_DAYS=30, BLOG_ARCHIVE_CHUNK_SIZE=2)
+class RetentionServiceTests(BlogTestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(BLOG_ARCHIVE_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.now = datetime(2026, 6, 15, tzinfo=dt_timezone.utc)
+        self.user = self.create_user('reader')
+        # Five expired searches over two months, one recent one that stays
+        self.moments = [
+            datetime(2026, 3, 30, 8, tzinfo=dt_timezone.utc),
+            datetime(2026, 3, 31, 23, 59, tzinfo=dt_timezone.utc),
+            datetime(2026, 4, 1, 0, 1, tzinfo=dt_timezone.utc),
+            datetime(2026, 4, 1, 12, tzinfo=dt_timezone.utc),
+            datetime(2026, 4, 20, tzinfo=dt_timezone.utc),
+        ]
+        for number, moment in enumerate(self.moments + [self.now - timedelta(days=1)]):
+            search = SearchQuery.objects.create(
+                query=f'query {number % 2}',
+                user=self.user if number % 2 else None,
+                ip_address=None if number == 3 else f'203.0.113.{number}',
+                results_count=number * 10,
+            )
+            SearchQuery.objects.filter(pk=search.pk).update(created_at=moment)
+        self.expected = [
+            {
+                'id': str(search.id),
+                'query': search.query,
+                'user_id': str(search.user_id) if search.user_id else None,
+                'ip_address': search.ip_address,
+                'results_count': search.results_count,
+                'created_at': search.created_at,
+            }
+            for search in SearchQuery.objects.filter(created_at__lt=self.now - timedelta(days=30)).order_by('created_at')
+        ]
+
+    def archive(self):
+        return RetentionService.archive(names=['searches'], now=self.now)['searches']
+
+    def archived_rows(self):
+        return RetentionService.query('searches').rows()
+
+    def test_expired_rows_round_trip_through_the_archive(self):
+        self.assertEqual(self.archive(), 5)
+        self.assertEqual(SearchQuery.objects.count(), 1)
+        self.assertEqual(self.archived_rows(), self.expected)
+
+        # Chunks of two are appended as segments of their own month, nothing is rewritten
+        store = RetentionService._archive('searches')
+        self.assertEqual(store.months(), ['2026-03', '2026-04'])
+        self.assertEqual([store.meta(segment)['rows'] for segment in store.segments()], [2, 2, 1])
+        self.assertEqual(store.pending(), [])
+
+        # A second run finds nothing left to archive
+        self.assertEqual(self.archive(), 0)
+        self.assertEqual(len(self.archived_rows()), 5)
+
+    def test_interrupted_run_resumes_without_losing_or_duplicating_rows(self):
+        store = RetentionService._archive('searches')
+
+        # Killed after deleting a chunk but before committing its segment
+        with mock.patch.object(archive.ColumnarArchive, 'commit', side_effect=RuntimeError('killed')):
+            with self.assertRaises(RuntimeError):
+                self.archive()
+        self.assertEqual(len(store.pending()), 1)
+        self.assertEqual(SearchQuery.objects.count(), 4)
+
+        # Killed after writing a segment but before deleting its rows
+        next_search = SearchQuery.objects.order_by('created_at').first()
+        store.append('2026-03', RetentionService._kinds(SearchQuery), {
+            column: [getattr(next_search, column)] for column in RetentionService._kinds(SearchQuery)
+        }, 'id', 'created_at')
+        self.assertEqual(len(store.pending()), 2)
+
+        self.assertEqual(self.archive(), 3)
+        self.assertEqual(store.pending(), [])
+        self.assertEqual(SearchQuery.objects.count(), 1)
+        self.assertEqual(sorted(self.archived_rows(), key=lambda row: row['created_at']), self.expected)
+
+    def test_queries_aggregate_over_the_archived_segments(self):
+        self.archive()
+        query = RetentionService.query('searches')
+
+        self.assertEqual(query.count(), 5)
+        self.assertEqual(query.sum('results_count'), 100)
+        self.assertEqual(query.where(user_id=self.user.id).count(), 2)
+        self.assertEqual(query.where(user_id='unknown').count(), 0)
+        self.assertEqual(query.count_by('query'), {'query 0': 3, 'query 1': 2})
+        april = query.between(datetime(2026, 4, 1, tzinfo=dt_timezone.utc), datetime(2026, 5, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(april.count(), 3)
+        self.assertEqual(
+            april.count_by_day(),
+            {datetime(2026, 4, 1).date(): 2, datetime(2026, 4, 20).date(): 1}
+        )
+        self.assertEqual([row['results_count'] for row in query.rows('results_count', limit=3)], [0, 10, 20])
+
+
+@override_settings(BLOG_ARCHIVE_RETENTION_DAYS=30, BLOG_ARCHIVE_CHUNK_SIZE=2, TIME_ZONE='Europe/Berlin')
+class ArchivedRollupTests(BlogTestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(BLOG_ARCHIVE_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        # Creating views feeds the view counter and visitor sketches, their flushers would outlive the test database
+        self.patch_attributes(ViewCounterService, _store=LocalViewCounterStore(), _flusher=True)
+        self.patch_attributes(VisitorSketchService, _pending={}, _flusher=True)
+
+        self.now = datetime(2026, 6, 15, tzinfo=dt_timezone.utc)
+        reader = self.create_user('reader')
+        self.post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+        # 23:30 UTC on March 31st is already April 1st in Berlin
+        for moment, time_spent in (
+            (datetime(2026, 3, 31, 10, tzinfo=dt_timezone.utc), 30),
+            (datetime(2026, 3, 31, 23, 30, tzinfo=dt_timezone.utc), 0),
+            (datetime(2026, 4, 2, 9, tzinfo=dt_timezone.utc), 90),
+            (self.now - timedelta(days=2), 10),
+        ):
+            view = PostView.objects.create(post=self.post, ip_address='203.0.113.1', time_spent=time_spent)
+            PostView.objects.filter(pk=view.pk).update(viewed_at=moment)
+        for moment, event_type in (
+            (datetime(2026, 3, 31, 10, tzinfo=dt_timezone.utc), ReadEvent.EventType.STARTED),
+            (datetime(2026, 3, 31, 10, 5, tzinfo=dt_timezone.utc), ReadEvent.EventType.COMPLETED),
+            (datetime(2026, 4, 2, 9, tzinfo=dt_timezone.utc), ReadEvent.EventType.STARTED),
+        ):
+            ReadEvent.objects.create(user=reader, post=self.post, event_type=event_type, occurred_at=moment)
+
+    def rollups(self):
+        return list(
+            PostDailyStats.objects.filter(post=self.post).order_by('date')
+            .values_list('date', 'views', 'timed_views', 'total_time_spent', 'reads', 'completed_reads')
+        )
+
+    def test_rebuild_reads_archived_rows_back(self):
+        AnalyticsRollupService.run(until=self.now)
+        expected = self.rollups()
+        self.assertEqual(expected[:3], [
+            (datetime(2026, 3, 31).date(), 1, 1, 30, 1, 1),
+            (datetime(2026, 4, 1).date(), 1, 0, 0, 0, 0),
+            (datetime(2026, 4, 2).date(), 1, 1, 90, 1, 0),
+        ])
+
+        archived = RetentionService.archive(names=['views', 'reads'], now=self.now)
+        self.assertEqual(archived, {'views': 3, 'reads': 3})
+        self.assertEqual((PostView.objects.count(), ReadEvent.objects.count()), (1, 0))
+
+        AnalyticsRollupService.reset()
+        AnalyticsRollupService.run(until=self.now)
+        self.assertEqual(self.rollups(), expected)
+
+    def test_rows_wait_in_the_table_until_they_are_rolled_up(self):
+        self.assertEqual(RetentionService.archive(names=['views', 'reads'], now=self.now), {'views': 0, 'reads': 0})
+
+
+@override_settings(BLOG_PUBLISHING_RESCAN_INTERVAL=300)
+class PublishingSchedulerTests(BlogTransactionTestCase):
+
+    def test_scheduling_a_post_wakes_the_scheduler(self):
+        post = BlogPost.objects.create(author=self.create_user('author'), title='Profiling Django', content='...')
+        self.patch_attributes(PublishingService, _heap=[], _wakeup=threading.Event())
+        stop = threading.Event()
+        scheduler = threading.Thread(target=PublishingService.run_forever, args=(stop,), daemon=True)
+        scheduler.start()
+        self.addCleanup(scheduler.join, 5)
+        self.addCleanup(PublishingService._wakeup.set)
+        self.addCleanup(stop.set)
+
+        # Nothing is scheduled, the scheduler sleeps until its next rescan
+        time.sleep(0.2)
+        post.status = BlogPost.PostStatus.SCHEDULED
+        post.scheduled_at = timezone.now() + timedelta(seconds=1)
+        post.save()
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            post.refresh_from_db()
+            if post.status == BlogPost.PostStatus.PUBLISHED:
+                break
+            time.sleep(0.1)
+        self.assertEqual(post.status, BlogPost.PostStatus.PUBLISHED)
+        self.assertEqual(post.published_at, post.scheduled_at)
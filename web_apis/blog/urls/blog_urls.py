@@ -9,12 +9,20 @@ from web_apis.blog.views.blog_views import (
     BlogPostViewSet,
     BlogPostRevisionViewSet
 )
+from web_apis.blog.views.analytics_views import AnalyticsViewSet
+from web_apis.blog.views.upload_views import ChunkedUploadViewSet
+from web_apis.blog.views.notification_views import NotificationViewSet, AdminNotificationViewSet
+from web_apis.blog.views import feed_views
 
 # Main router
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'posts', BlogPostViewSet, basename='post')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'uploads', ChunkedUploadViewSet, basename='upload')
+router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'admin-notifications', AdminNotificationViewSet, basename='admin-notification')
 
 # Nested router for revisions
 posts_router = DefaultRouter()
@@ -46,6 +54,9 @@ urlpatterns = [
     path('posts/<slug:slug>/revisions/',  # Endpoint to list all revisions for a post
         BlogPostViewSet.as_view({'get': 'revisions'}),
         name='post-revisions'),
+    path('posts/<slug:slug>/revision-diff/',  # Diff between two revisions of a post
+        BlogPostViewSet.as_view({'get': 'revision_diff'}),
+        name='post-revision-diff'),
 
     path('categories/<uuid:id>/restore/',
         CategoryViewSet.as_view({'post': 'restore'}),
@@ -61,6 +72,23 @@ urlpatterns = [
         TagViewSet.as_view({'delete': 'hard_delete'}),
         name='tag-hard-delete'),
     
+    # Feeds and sitemaps
+    path('feeds/<str:kind>/',
+        feed_views.post_feed,
+        name='blog-feed'),
+    path('feeds/category/<slug:slug>/<str:kind>/',
+        feed_views.post_feed, {'scope': 'category'},
+        name='blog-category-feed'),
+    path('feeds/tag/<slug:slug>/<str:kind>/',
+        feed_views.post_feed, {'scope': 'tag'},
+        name='blog-tag-feed'),
+    path('sitemap.xml',
+        feed_views.sitemap_index,
+        name='blog-sitemap-index'),
+    path('sitemap-<str:section>-<int:page>.xml',
+        feed_views.sitemap,
+        name='blog-sitemap'),
+
     path('posts/<slug:slug>/toggle-status/',
         BlogPostViewSet.as_view({'post': 'toggle_status'}),
         name='post-toggle-status'),
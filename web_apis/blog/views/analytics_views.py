@@ -0,0 +1,97 @@
+# blog/views/analytics_views.py
+
+from datetime import timedelta
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from django.shortcuts import get_object_or_404
+from django.db.models import Sum
+from django.utils import timezone
+from web_apis.blog.models.blog_models import BlogPost
+from web_apis.blog.models.analytics_models import PostDailyStats, SiteDailyStats
+from web_apis.blog.services.visitor_sketch_service import VisitorSketchService
+from web_apis.blog.serializers.analytics_serializers import (
+    PostAnalyticsSerializer,
+    TrendAnalysisSerializer
+)
+
+
+
+# Analytics View -------------------------------------------------------------------------
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Dashboard analytics, read from the daily rollup tables (see AnalyticsRollupService).
+    Every endpoint takes ?days= (default 30, at most 366).
+    """
+    permission_classes = [IsAdminUser]
+    lookup_field = 'slug'
+    default_days = 30
+    max_days = 366
+    top_posts_limit = 20
+
+    def list(self, request):
+        """Top posts of the period by views"""
+        start = self.get_start_date()
+        rows = (
+            PostDailyStats.objects.filter(date__gte=start)
+            .values('post_id')
+            .annotate(**self.totals())
+            .order_by('-views')[:self.top_posts_limit]
+        )
+        posts = BlogPost.objects.only('id', 'title', 'slug', 'published_at').in_bulk([row['post_id'] for row in rows])
+        visitors = VisitorSketchService.unique_visitors_by_post(list(posts), start)
+        data = [
+            self.post_analytics(posts[row['post_id']], row, visitors.get(row['post_id'], 0))
+            for row in rows if row['post_id'] in posts
+        ]
+        return Response(PostAnalyticsSerializer(data, many=True).data)
+
+    def retrieve(self, request, slug=None):
+        """Totals of one post over the period"""
+        post = get_object_or_404(BlogPost.objects.only('id', 'title', 'slug', 'published_at'), slug=slug)
+        start = self.get_start_date()
+        totals = PostDailyStats.objects.filter(post=post, date__gte=start).aggregate(**self.totals())
+        visitors = VisitorSketchService.unique_visitors(start, post_id=post.id)
+        return Response(PostAnalyticsSerializer(self.post_analytics(post, totals, visitors)).data)
+
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """Daily views, reads and shares, site-wide or for ?post=<slug>"""
+        slug = request.query_params.get('post')
+        if slug:
+            stats = PostDailyStats.objects.filter(post__slug=slug)
+        else:
+            stats = SiteDailyStats.objects.all()
+        rows = stats.filter(date__gte=self.get_start_date()).order_by('date').values('date', 'views', 'reads', 'shares')
+        return Response(TrendAnalysisSerializer(rows, many=True).data)
+
+    def get_start_date(self):
+        try:
+            days = int(self.request.query_params.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+        days = min(max(days, 1), self.max_days)
+        return timezone.localdate() - timedelta(days=days - 1)
+
+    @staticmethod
+    def totals():
+        return {
+            column: Sum(column)
+            for column in ('views', 'timed_views', 'total_time_spent', 'reads', 'completed_reads')
+        }
+
+    @staticmethod
+    def post_analytics(post, totals, unique_visitors):
+        # unique_visitors is a HyperLogLog estimate over the whole period, not a sum of days
+        timed_views = totals['timed_views'] or 0
+        reads = totals['reads'] or 0
+        return {
+            'post': post,
+            'total_views': totals['views'] or 0,
+            'unique_visitors': unique_visitors,
+            'unique_visitors_error': VisitorSketchService.error(),
+            'average_time_spent': (totals['total_time_spent'] or 0) / timed_views if timed_views else 0.0,
+            'completion_rate': (totals['completed_reads'] or 0) / reads if reads else 0.0,
+        }
@@ -8,28 +8,45 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, JSONParser
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Count
 from django.core.exceptions import PermissionDenied
 from web_apis.blog.models.blog_models import Category, Tag, BlogPost, BlogPostRevision
+from web_apis.blog.models.engagement_models import Comment
 from web_apis.blog.serializers.blog_serializers import (
     CategorySerializer,
     TagSerializer,
     BlogPostListSerializer,
     BlogPostDetailSerializer,
     BlogPostCreateUpdateSerializer,
-    BlogPostRevisionSerializer
+    BlogPostRevisionSerializer,
+    BlogPostRevisionListSerializer
 )
+from web_apis.blog.serializers.analytics_serializers import ReadingProgressSerializer
 from web_apis.blog.services.blog_service import BlogPostService
+from web_apis.blog.services.view_counter_service import ViewCounterService
+from web_apis.blog.services.search_service import BlogSearchService
+from web_apis.blog.services.trending_service import TrendingService
+from web_apis.blog.services.reading_progress_service import ReadingProgressService
+from web_apis.blog.services.comment_tree_service import CommentTreeService
+from web_apis.blog.services.revision_service import RevisionService
+from web_apis.blog.query_plans import BlogPostQueryPlan, SparseQueryPlan
 from web_apis.blog.validators.blog_validators import BlogPostValidator
 from user_account.permissions import IsStaffOrReadOnly, IsAuthorOrReadOnly
 from rest_framework.pagination import PageNumberPagination
+from web_apis.blog.pagination import (
+    CursorPaginationMixin,
+    BlogPostCursorPagination,
+    NameCursorPagination,
+    RevisionCursorPagination,
+    CommentThreadCursorPagination
+)
 
 
 
 # Category View -------------------------------------------------------------------------
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cursor_pagination_class = NameCursorPagination
     lookup_field = 'id'
     permission_classes = [IsStaffOrReadOnly]
 
@@ -37,6 +54,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         if not self.request.user.is_staff:
             queryset = queryset.filter(is_active=True)
+        if self.action in ('list', 'retrieve'):
+            serializer = self.get_serializer()
+            if serializer.is_sparse():
+                queryset = SparseQueryPlan.narrow(queryset, serializer, always=('name',))
         return queryset
 
     def destroy(self, request, *args, **kwargs):
@@ -66,9 +87,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
 
 # Tag View -------------------------------------------------------------------------
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cursor_pagination_class = NameCursorPagination
     lookup_field = 'id'
     permission_classes = [IsStaffOrReadOnly]
 
@@ -76,6 +98,10 @@ class TagViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         if not self.request.user.is_staff:
             queryset = queryset.filter(is_active=True)
+        if self.action in ('list', 'retrieve'):
+            serializer = self.get_serializer()
+            if serializer.is_sparse():
+                queryset = SparseQueryPlan.narrow(queryset, serializer, always=('name',))
         return queryset
     
     def destroy(self, request, *args, **kwargs):
@@ -119,13 +145,20 @@ class TagViewSet(viewsets.ModelViewSet):
 
 
 # Blog Post View -------------------------------------------------------------------------
-class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
+class BlogPostViewSet(CursorPaginationMixin, viewsets.ModelViewSet, PageNumberPagination):
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostListSerializer
     lookup_field = 'slug'
     parser_classes = [MultiPartParser, JSONParser]
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
     page_size = 12
+    cursor_pagination_class = BlogPostCursorPagination
+
+    def use_cursor_pagination(self):
+        # Ranked search results are not ordered by the feed key
+        if self.request.query_params.get('search'):
+            return False
+        return super().use_cursor_pagination()
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -136,62 +169,36 @@ class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.order_by('-published_at', '-created_at')
+        search = self.request.query_params.get('search')
+        if search and self.action == 'list':
+            # Ranked full-text search mode
+            queryset = BlogSearchService.search(queryset, search)
+        else:
+            queryset = queryset.order_by('-published_at', '-created_at')
+
+        if self.action in ('list', 'retrieve'):
+            serializer = self.get_serializer()
+            if serializer.is_sparse():
+                return BlogPostQueryPlan.narrow(queryset, serializer)
+        return BlogPostQueryPlan.for_action(self.action, queryset)
     
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        posts = page if page is not None else list(queryset)
+        # Show buffered views on top of the persisted count
+        ViewCounterService.apply_buffered_counts(posts)
+        serializer = self.get_serializer(posts, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.view_count += 1
-        instance.save()
+        instance.view_count += BlogPostService.increment_view_count(instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
-        # Apply filters
-        params = self.request.query_params
-        status_filter = params.get('status')
-        category = params.get('category')
-        tag = params.get('tag')
-        featured = params.get('featured')
-        search = params.get('search')
-        author = params.get('author')
-
-        # Base filtering
-        if not self.request.user.is_staff:
-            queryset = queryset.filter(
-                Q(status=BlogPost.PostStatus.PUBLISHED) &
-                Q(published_at__lte=timezone.now())
-            )
-        elif status_filter:
-            queryset = queryset.filter(status=status_filter)
-
-        if category:
-            queryset = queryset.filter(categories__id=category)
-
-        if tag:
-            queryset = queryset.filter(tags__id=tag)
-
-        if featured:
-            queryset = queryset.filter(is_featured=True)
-
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(content__icontains=search) |
-                Q(excerpt__icontains=search)
-            )
-
-        if author:
-            queryset = queryset.filter(author__id=author)
-
-        # Optimize queries
-        queryset = queryset.select_related('author')
-        queryset = queryset.prefetch_related('categories', 'tags', 'related_posts')
-        queryset = queryset.annotate(
-            num_comments=Count('comments', distinct=True), # Changed the annotation name
-            num_likes=Count('likes', distinct=True)        # Changed the annotation name
-        )
-
-        return queryset.order_by('-published_at', '-created_at')
-
     def perform_create(self, serializer):
         # BlogPostValidator.validate_post_create(self.request.data)
         serializer.save(author=self.request.user)  # Keep setting author here
@@ -221,6 +228,45 @@ class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """Posts ranked by time-decayed recent engagement, served from cache (?limit=1..feed size)"""
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return Response(
+                    {'error': "'limit' must be a positive integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(TrendingService.get_feed(limit=limit))
+
+    @action(detail=True, methods=['post'])
+    def progress(self, request, slug=None):
+        """Report the reader's scroll position and document height; buffered and written in bulk"""
+        serializer = ReadingProgressSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post_id = get_object_or_404(BlogPost.objects.values_list('id', flat=True), slug=slug)
+        ReadingProgressService.record(
+            request.user.id,
+            post_id,
+            serializer.validated_data['scroll_position'],
+            serializer.validated_data['read_percentage']
+        )
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, slug=None):
+        """Approved comments as a nested thread, paginated by root comment"""
+        post_id = get_object_or_404(BlogPost.objects.values_list('id', flat=True), slug=slug)
+        thread = CommentTreeService.get_thread(post_id)
+        paginator = CommentThreadCursorPagination()
+        page = paginator.paginate_thread(thread, Comment, request)
+        return paginator.get_paginated_response(page)
+
     @action(detail=True, methods=['post'])
     def publish(self, request, slug=None):
         """Publish a draft post"""
@@ -247,10 +293,35 @@ class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
     def revisions(self, request, slug=None):
         """Get all revisions for a post"""
         post = self.get_object()
-        revisions = post.revisions.all().order_by('-revision_number')
-        serializer = BlogPostRevisionSerializer(revisions, many=True)
+        revisions = BlogPostQueryPlan.revisions(post.revisions.all()).order_by('-revision_number')
+        if self.use_cursor_pagination():
+            paginator = RevisionCursorPagination()
+            page = paginator.paginate_queryset(revisions, request, view=self)
+            serializer = BlogPostRevisionListSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        serializer = BlogPostRevisionListSerializer(revisions, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='revision-diff')
+    def revision_diff(self, request, slug=None):
+        """Diff between two revisions: ?from=<number>&to=<number>&mode=unified|words"""
+        post_id = get_object_or_404(BlogPost.objects.values_list('id', flat=True), slug=slug)
+        try:
+            old_number = int(request.query_params['from'])
+            new_number = int(request.query_params['to'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Please provide "from" and "to" revision numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        mode = request.query_params.get('mode', 'unified')
+        try:
+            return Response(RevisionService.diff(post_id, old_number, new_number, mode))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except BlogPostRevision.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
     @action(detail=True, methods=['post'])
     def restore_revision(self, request, slug=None, revision_number=None):
         """Restore a specific revision"""
@@ -260,7 +331,7 @@ class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
             revision_number=request.data.get('revision_number')
         )
         post.title = revision.title
-        post.content = revision.content
+        post.content = RevisionService.content(revision)
         post.excerpt = revision.excerpt
         post.save()
         return Response({'status': 'Revision restored'})
@@ -342,15 +413,25 @@ class BlogPostViewSet(viewsets.ModelViewSet, PageNumberPagination):
 
 
 # Blog Post Revision View -------------------------------------------------------------------------
-class BlogPostRevisionViewSet(mixins.RetrieveModelMixin,
+class BlogPostRevisionViewSet(CursorPaginationMixin,
+                            mixins.RetrieveModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     queryset = BlogPostRevision.objects.all()
     serializer_class = BlogPostRevisionSerializer
+    cursor_pagination_class = RevisionCursorPagination
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
     
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BlogPostRevisionListSerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
         post_id = self.kwargs.get('post_id')
-        return BlogPostRevision.objects.filter(
-            post__id=post_id
-        ).order_by('-revision_number')
\ No newline at end of file
+        queryset = BlogPostRevision.objects.filter(post__id=post_id)
+        if self.action == 'list':
+            queryset = BlogPostQueryPlan.revisions(queryset)
+        else:
+            queryset = BlogPostQueryPlan.revision_detail(queryset)
+        return queryset.order_by('-revision_number')
\ No newline at end of file
@@ -0,0 +1,64 @@
+# blog/views/feed_views.py
+
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition, require_GET
+from web_apis.blog.services.feed_service import FeedService
+
+
+FEED_CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+}
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+
+def _base_url(request):
+    return request.build_absolute_uri('/').rstrip('/')
+
+
+def _version(request):
+    # Read once per request, the ETag, Last-Modified and cache key share it
+    if not hasattr(request, '_feed_version'):
+        request._feed_version = FeedService.version()
+    return request._feed_version
+
+
+def _last_modified(request, *args, **kwargs):
+    return FeedService.last_modified(_version(request))
+
+
+def _etag(request, *args, **kwargs):
+    # The path names the document, the version stamp covers its content
+    return FeedService.etag(_version(request), request.path)
+
+
+# Feed Views -------------------------------------------------------------------------
+# Unchanged documents answer 304 from the version stamp alone, without a cache read
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def post_feed(request, kind, scope=None, slug=None):
+    """Latest posts as RSS or Atom, site-wide or for one category or tag"""
+    if kind not in FeedService.KINDS:
+        raise Http404("Unknown feed format")
+    document = FeedService.feed(_version(request), kind, _base_url(request), scope=scope, slug=slug)
+    if document is None:
+        raise Http404("No such category or tag")
+    return HttpResponse(document, content_type=FEED_CONTENT_TYPES[kind])
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def sitemap_index(request):
+    """Index of the post, category and tag sitemaps"""
+    return HttpResponse(FeedService.sitemap_index(_version(request), _base_url(request)), content_type=SITEMAP_CONTENT_TYPE)
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def sitemap(request, section, page):
+    """One page of a sitemap section"""
+    document = FeedService.sitemap(_version(request), section, page, _base_url(request))
+    if document is None:
+        raise Http404("No such sitemap")
+    return HttpResponse(document, content_type=SITEMAP_CONTENT_TYPE)
@@ -0,0 +1,86 @@
+# blog/views/notification_views.py
+
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from web_apis.blog.models.notification_models import Notification, AdminNotification
+from web_apis.blog.pagination import KeysetCursorPagination
+from web_apis.blog.serializers.notification_serializers import (
+    NotificationSerializer,
+    AdminNotificationSerializer,
+    MarkReadSerializer
+)
+from web_apis.blog.services.notification_service import NotificationService
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's notifications, newest first (?unread=true for unread only).
+        GET  /notifications/unread-count/      badge count, served from cache
+        POST /notifications/<id>/read/         mark one as read
+        POST /notifications/read-all/          {until?} mark everything (created up to until) as read
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    lookup_value_regex = '[0-9a-f-]{36}'
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user).select_related('related_post', 'user')
+        if self.request.query_params.get('unread', '').lower() in ('true', '1'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': NotificationService.unread_count(request.user.id)})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        if not Notification.objects.filter(pk=pk, user=request.user).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        NotificationService.mark_read(request.user.id, pk)
+        return Response({'unread': NotificationService.unread_count(request.user.id)})
+
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = NotificationService.mark_all_read(request.user.id, serializer.validated_data.get('until'))
+        return Response({'updated': updated, 'unread': NotificationService.unread_count(request.user.id)})
+
+
+class AdminNotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The shared admin inbox, with the same read-state endpoints as /notifications/
+    """
+    queryset = AdminNotification.objects.all()
+    serializer_class = AdminNotificationSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    lookup_value_regex = '[0-9a-f-]{36}'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get('unread', '').lower() in ('true', '1'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': NotificationService.admin_unread_count()})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        if not AdminNotification.objects.filter(pk=pk).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        NotificationService.admin_mark_read(pk)
+        return Response({'unread': NotificationService.admin_unread_count()})
+
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = NotificationService.admin_mark_all_read(serializer.validated_data.get('until'))
+        return Response({'updated': updated, 'unread': NotificationService.admin_unread_count()})
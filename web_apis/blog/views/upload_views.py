@@ -0,0 +1,143 @@
+# blog/views/upload_views.py
+
+from django.core.exceptions import PermissionDenied, ValidationError
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, FormParser
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
+from web_apis.blog.models.content_models import ChunkedUpload
+from web_apis.blog.serializers.content_serializers import ChunkedUploadSerializer
+from web_apis.blog.services.upload_service import ChunkedUploadService, OffsetMismatch, UploadLimitExceeded
+
+
+class UploadStartThrottle(UserRateThrottle):
+    """
+    Starting uploads, per user or per IP address for anonymous clients (rate 'upload_start')
+    """
+    scope = 'upload_start'
+
+
+class ChunkedUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable uploads:
+        POST   /uploads/                 {target, filename, size, owner_id?, sha256?}  start an upload
+        PUT    /uploads/<id>/            raw chunk, Upload-Offset header               append a chunk
+        GET    /uploads/<id>/            current offset, to resume after a dropped connection
+        POST   /uploads/<id>/finalize/   {checksum?}                                   join and attach
+        DELETE /uploads/<id>/            abandon the upload
+
+    An optional Upload-Checksum header holds the CRC32 of a chunk in hex, the
+    finalize checksum the CRC32 of the whole file. A PUT at the wrong offset
+    answers 409 with the offset to continue from. When sha256 (hex digest of
+    the whole file) names content that is already stored, the upload starts
+    out complete and no chunks are sent. Starting uploads is throttled,
+    and an uploader with too many unfinished uploads gets 429.
+    """
+    # Access is decided per upload target by ChunkedUploadService, anonymous clients
+    # may only send contact attachments
+    permission_classes = [AllowAny]
+    parser_classes = [JSONParser, FormParser]
+
+    def get_throttles(self):
+        throttles = super().get_throttles()
+        if self.action == 'create':
+            throttles.append(UploadStartThrottle())
+        return throttles
+
+    def create(self, request):
+        try:
+            upload = ChunkedUploadService.start(
+                request.user,
+                request.data.get('target'),
+                request.data.get('filename', ''),
+                int(request.data.get('size', 0)),
+                owner_id=request.data.get('owner_id', ''),
+                content_type=request.data.get('content_type', ''),
+                ip_address=request.META.get('REMOTE_ADDR'),
+                sha256=request.data.get('sha256')
+            )
+        except UploadLimitExceeded as e:
+            return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        except (TypeError, ValueError, ValidationError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionDenied as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        return Response(self._serialize(upload), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        upload, error = self._get(request, pk)
+        if error:
+            return error
+        return Response(self._serialize(upload), headers={'Upload-Offset': str(upload.offset)})
+
+    def update(self, request, pk=None):
+        upload, error = self._get(request, pk)
+        if error:
+            return error
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            chunk_checksum = request.headers.get('Upload-Checksum')
+            chunk_checksum = int(chunk_checksum, 16) if chunk_checksum else None
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Please provide the Upload-Offset and Content-Length headers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            # The body is read from the raw stream, request.data would buffer it
+            ChunkedUploadService.write_chunk(upload, offset, request.stream, length, chunk_checksum)
+        except OffsetMismatch as e:
+            return self._conflict(e)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._serialize(upload), headers={'Upload-Offset': str(upload.offset)})
+
+    def destroy(self, request, pk=None):
+        upload, error = self._get(request, pk)
+        if error:
+            return error
+        ChunkedUploadService.abort(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload, error = self._get(request, pk)
+        if error:
+            return error
+        try:
+            checksum = request.data.get('checksum')
+            checksum = int(checksum, 16) if checksum else None
+        except (TypeError, ValueError):
+            # A JSON number is not the hex CRC32 either
+            return Response(
+                {'error': 'The checksum must be the CRC32 of the file in hex.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ChunkedUploadService.finalize(upload, checksum)
+        except OffsetMismatch as e:
+            return self._conflict(e)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._serialize(upload))
+
+    def _get(self, request, pk):
+        try:
+            return ChunkedUploadService.get(pk, request.user), None
+        except (ChunkedUpload.DoesNotExist, ValidationError):
+            return None, Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionDenied as e:
+            return None, Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+    def _conflict(self, error):
+        return Response(
+            {'error': str(error), 'offset': error.offset},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Upload-Offset': str(error.offset)}
+        )
+
+    def _serialize(self, upload):
+        return ChunkedUploadSerializer(upload, context={'request': self.request}).data
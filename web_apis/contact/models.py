@@ -4,7 +4,6 @@
 
 
 import os
-import uuid
 from django.db import models
 from django.conf import settings
 from django.core.validators import (
@@ -15,11 +14,12 @@ from django.core.validators import (
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 import phonenumbers
+from web_apis.blog.storage import blob_storage
 
 def upload_contact_attachment_path(instance, filename):
-    """Generates a unique file path for contact attachments."""
+    """Generates the file path for contact attachments, BlobStorage keeps identical files once."""
     today = timezone.now()
-    return f"contact_attachments/{today.year}/{today.month}/{today.day}/{uuid.uuid4()}_{filename}"
+    return f"contact_attachments/{today.year}/{today.month}/{today.day}/{filename}"
 
 class Contact(models.Model):
     CONTACT_METHOD_CHOICES = [
@@ -167,6 +167,8 @@ class ContactAttachment(models.Model):
     )
     file = models.FileField(
         upload_to=upload_contact_attachment_path,
+        storage=blob_storage,
+        max_length=255,
         validators=[
             FileExtensionValidator(
                 allowed_extensions=['pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png', 'txt']
@@ -8,12 +8,13 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from ..models import Contact, ContactAttachment
 from django.utils import timezone
 from user_account.permissions import IsAdmin
+from web_apis.blog.services.upload_service import ChunkedUploadService
 
 logger = logging.getLogger(__name__)
 
 class ContactService:
     @staticmethod
-    def create_contact(data, files=None, request=None):
+    def create_contact(data, files=None, request=None, upload_ids=None):
         try:
             with transaction.atomic():
                 # Add request metadata
@@ -36,6 +37,10 @@ class ContactService:
                             file=file
                         )
 
+                # Attachments sent ahead through resumable uploads
+                if upload_ids:
+                    ChunkedUploadService.attach_many(upload_ids, 'contact-attachment', contact.pk)
+
                 return contact, None
 
         except Exception as e:
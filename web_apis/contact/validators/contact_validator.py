@@ -2,12 +2,18 @@
 
 # web_apis/contact/validators/contact_validators.py
 
+import uuid
+
 import phonenumbers
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from web_apis.blog.services.upload_service import ChunkedUploadService
 
 class ContactValidator:
+    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_ATTACHMENTS = 5
+
     @staticmethod
     def validate_email(value):
         try:
@@ -73,14 +79,35 @@ class ContactValidator:
 
     @staticmethod
     def validate_file(file):
-        max_size = 10 * 1024 * 1024  # 10MB
         allowed_types = ['pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png', 'txt']
         
-        if file.size > max_size:
+        if file.size > ContactValidator.MAX_FILE_SIZE:
             return None, _("File size cannot exceed 10MB.")
             
         ext = file.name.split('.')[-1].lower()
         if ext not in allowed_types:
             return None, _("Unsupported file type.")
             
-        return file, None
\ No newline at end of file
+        return file, None
+
+    @staticmethod
+    def validate_uploads(upload_ids, file_count=0):
+        """
+        Checks resumable uploads sent with the form: each must be a finished, unattached
+        contact attachment within the size limit, and together with the files sent
+        directly there may be at most MAX_ATTACHMENTS
+        """
+        upload_ids = list(dict.fromkeys(upload_ids))
+        if len(upload_ids) + file_count > ContactValidator.MAX_ATTACHMENTS:
+            return None, _(f"At most {ContactValidator.MAX_ATTACHMENTS} attachments are allowed.")
+        try:
+            upload_ids = [uuid.UUID(str(upload_id)) for upload_id in upload_ids]
+        except ValueError:
+            return None, _("Invalid upload id.")
+
+        sizes = dict(ChunkedUploadService.ready(upload_ids, 'contact-attachment').values_list('id', 'size'))
+        if len(sizes) != len(upload_ids):
+            return None, _("Uploads must be finished before the form is submitted.")
+        if any(size > ContactValidator.MAX_FILE_SIZE for size in sizes.values()):
+            return None, _("File size cannot exceed 10MB.")
+        return upload_ids, None
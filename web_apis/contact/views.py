@@ -108,6 +108,14 @@ class ContactSubmissionView(APIView):
                 'errors': {'attachments': file_errors}
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        upload_ids, upload_error = ContactValidator.validate_uploads(upload_ids, file_count=len(files))
+        if upload_error:
+            return Response({
+                'status': 'error',
+                'message': 'File validation failed',
+                'errors': {'upload_ids': [upload_error]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # Create contact and attachments
         contact, error = ContactService.create_contact(
             serializer.validated_data,
@@ -181,6 +189,8 @@ class ContactSubmissionView(APIView):
         # Prepare data
         data = request.data.dict()
         files = request.FILES.getlist('attachments')
+        # Finished resumable uploads (/api/blog/uploads/ with target contact-attachment)
+        upload_ids = request.data.getlist('upload_ids')
 
         # Validate individual fields
         errors = {}
@@ -266,11 +276,20 @@ class ContactSubmissionView(APIView):
                 'errors': {'attachments': file_errors}
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        upload_ids, upload_error = ContactValidator.validate_uploads(upload_ids, file_count=len(files))
+        if upload_error:
+            return Response({
+                'status': 'error',
+                'message': 'File validation failed',
+                'errors': {'upload_ids': [upload_error]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # Create contact and attachments
         contact, error = ContactService.create_contact(
             serializer.validated_data,
             files=validated_files,
-            request=request
+            request=request,
+            upload_ids=upload_ids
         )
 
         if error:
@@ -1,20 +1,20 @@
 # web_apis/evigdia_services/models.py
 
 import os
-import uuid
 from django.db import models
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
+from web_apis.blog.storage import blob_storage
 
 
 
 def upload_service_file_path(instance, filename):
-    """Generates a unique file path for service attachments."""
+    """Generates the file path for service attachments, BlobStorage keeps identical files once."""
     today = timezone.now()
-    return f"service_files/{today.year}/{today.month}/{today.day}/{uuid.uuid4()}_{filename}"
+    return f"service_files/{today.year}/{today.month}/{today.day}/{filename}"
 
 
 class Service(models.Model):
@@ -34,8 +34,15 @@ class Service(models.Model):
     sub_description = models.TextField(blank=True, null=True)
     
     # Images
-    service_image = models.ImageField(upload_to='services/', blank=True, null=True)
-    sub_service_image = models.ImageField(upload_to='sub_services/', blank=True, null=True)
+    service_image = models.ImageField(
+        upload_to='services/', storage=blob_storage, max_length=255, blank=True, null=True
+    )
+    sub_service_image = models.ImageField(
+        upload_to='sub_services/', storage=blob_storage, max_length=255, blank=True, null=True
+    )
+    # Resized copies of the images, maintained by ImageVariantService
+    service_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    sub_service_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Metadata
     date_posted = models.DateTimeField(default=timezone.now)
@@ -93,6 +100,8 @@ class ServiceAttachment(models.Model):
     )
     file = models.FileField(
         upload_to=upload_service_file_path,
+        storage=blob_storage,
+        max_length=255,
         validators=[
             FileExtensionValidator(
                 allowed_extensions=['pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png', 'txt', 'xls', 'xlsx', 'ppt', 'pptx']
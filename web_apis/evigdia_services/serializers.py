@@ -6,6 +6,8 @@ from rest_framework import serializers
 from .models import Service, ServiceAttachment
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
+from web_apis.blog.services.image_variant_service import ImageVariantService
+from web_apis.blog.serializers.image_serializers import ImageVariantsField
 
 class ServiceAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,6 +25,8 @@ class ServiceAttachmentSerializer(serializers.ModelSerializer):
 class ServiceSerializer(serializers.ModelSerializer):
     attachments = ServiceAttachmentSerializer(many=True, read_only=True)
     absolute_url = serializers.SerializerMethodField()
+    service_image_variants = ImageVariantsField()
+    sub_service_image_variants = ImageVariantsField()
     
     class Meta:
         model = Service
@@ -31,10 +35,11 @@ class ServiceSerializer(serializers.ModelSerializer):
             'service_image', 'sub_service_image', 'date_posted', 'created_at',
             'updated_at', 'status', 'created_by', 'attachments', 'slug',
             'meta_title', 'meta_description', 'meta_keywords', 'canonical_url',
-            'absolute_url'
+            'absolute_url', 'service_image_variants', 'sub_service_image_variants'
         ]
         read_only_fields = [
-            'id', 'created_at', 'updated_at', 'created_by', 'slug', 'absolute_url'
+            'id', 'created_at', 'updated_at', 'created_by', 'slug', 'absolute_url',
+            'service_image_variants', 'sub_service_image_variants'
         ]
     
     def get_absolute_url(self, obj):
@@ -70,6 +75,12 @@ class ServiceSerializer(serializers.ModelSerializer):
                 representation['service_image'] = request.build_absolute_uri(instance.service_image.url)
             if instance.sub_service_image:
                 representation['sub_service_image'] = request.build_absolute_uri(instance.sub_service_image.url)
+            # Service listings get a resized variant once it is rendered
+            if isinstance(self.parent, serializers.ListSerializer):
+                for field_name in ('service_image', 'sub_service_image'):
+                    src = ImageVariantService.src(getattr(instance, f'{field_name}_variants'), request)
+                    if src:
+                        representation[field_name] = src
             
             # Include attachments if they exist
             if instance.attachments.exists():